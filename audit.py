@@ -0,0 +1,277 @@
+"""Append-only audit log of stock changes, shared by cp.py and pos.py.
+
+Every change to an item's stock is recorded as one compact JSON line,
+[timestamp, actor, key, delta, quantity, reason], where quantity is the
+stock after the change (null once the item is deleted). Lines go to
+numbered segments of segment_events events each. When a segment is
+sealed, the stock of every item as of its last event is written next to
+it as a checkpoint, so stock as of any moment is rebuilt from the last
+checkpoint before it plus the events that follow, never from the whole
+history. Checkpoint 0 is the stock when the log was started.
+
+An audit directory holds:
+
+    segment-000001.log     events, oldest first
+    checkpoint-000001.json {"ts": ..., "segment": 1, "stock": {key: quantity}}
+    index.json             checkpoint times and, per item, the segments that mention it
+
+index.json is rewritten when a segment is sealed and on close; segments
+written after it are scanned when the log is opened. A line without its
+trailing newline is the remains of a write interrupted by a crash and is
+discarded.
+
+    python audit.py stock inventory.audit --at 2026-10-13T18:00
+    python audit.py history inventory.audit I0042 --since 2026-10-01
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+INDEX_FILE = 'index.json'
+
+def parse_time(text):
+    """Turn an ISO date or date and time into a timestamp."""
+    return datetime.fromisoformat(text.strip()).timestamp()
+
+def format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+def format_event(event):
+    timestamp, actor, _, delta, quantity, reason = event
+    stock = "deleted" if quantity is None else f"{quantity} on hand"
+    return f"{format_time(timestamp)} {actor}: {delta:+d} ({reason}), {stock}"
+
+class AuditLog:
+    """Segmented, append-only log of stock changes with checkpoints and an item-to-segment index."""
+    def __init__(self, directory, actor='', segment_events=10000, clock=time.time):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.actor = actor
+        self.segment_events = segment_events
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.checkpoints = []  # (timestamp, segment) in time order
+        self.segments = {}  # key -> segments mentioning it, ascending
+        self.stock = {}
+        self.last_time = 0.0
+        self.open()
+
+    def path(self, kind, number):
+        extension = 'log' if kind == 'segment' else 'json'
+        return os.path.join(self.directory, f"{kind}-{number:06d}.{extension}")
+
+    def open(self):
+        """Load the index and latest checkpoint, then scan the segments written after them."""
+        numbers = sorted(int(name[8:14]) for name in os.listdir(self.directory)
+                         if name.startswith('segment-') and name.endswith('.log'))
+        indexed = 0
+        index_path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, 'r') as file:
+                index = json.load(file)
+            indexed = index['sealed']
+            self.checkpoints = [tuple(checkpoint) for checkpoint in index['checkpoints']]
+            self.segments = index['keys']
+        if self.checkpoints:
+            self.last_time, checkpoint = self.checkpoints[-1]
+            self.stock = self.read_checkpoint(checkpoint)
+        else:
+            checkpoint = 0
+        for number in numbers:
+            if number <= checkpoint and number <= indexed:
+                continue
+            for event in self.read_segment(number):
+                if number > checkpoint:
+                    self.apply(self.stock, event)
+                    self.last_time = max(self.last_time, event[0])
+                if number > indexed:
+                    self.note(event[2], number)
+        self.segment = numbers[-1] if numbers else 1
+        self.count = sum(1 for _ in self.read_segment(self.segment))
+        self.repair(self.path('segment', self.segment))
+        self.file = open(self.path('segment', self.segment), 'a')
+
+    @staticmethod
+    def repair(path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as file:
+            data = file.read()
+            if data and not data.endswith(b'\n'):
+                file.truncate(data.rfind(b'\n') + 1)
+
+    def read_segment(self, number):
+        path = self.path('segment', number)
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as file:
+            for line in file:
+                if not line.endswith('\n'):
+                    break
+                yield json.loads(line)
+
+    def read_checkpoint(self, number):
+        with open(self.path('checkpoint', number), 'r') as file:
+            return json.load(file)['stock']
+
+    @staticmethod
+    def apply(stock, event):
+        if event[4] is None:
+            stock.pop(event[2], None)
+        else:
+            stock[event[2]] = event[4]
+
+    def note(self, key, number):
+        segments = self.segments.setdefault(key, [])
+        if not segments or segments[-1] != number:
+            segments.append(number)
+
+    def start(self, stock):
+        """Begin a new log at checkpoint 0 with stock, an iterable of (key, quantity).
+
+        On an existing log, record a 'reconcile' event for every item whose
+        stock differs from what the log last saw, so changes made with
+        auditing off are still accounted for.
+        """
+        stock = dict(stock)
+        with self.lock:
+            if not self.checkpoints:
+                self.write_checkpoint(0, self.timestamp(), stock)
+                self.write_index(0)
+                self.stock = stock
+                return
+        changes = [(key, self.stock.get(key, 0), quantity, 'reconcile')
+                   for key, quantity in stock.items() if self.stock.get(key) != quantity]
+        changes += [(key, quantity, None, 'reconcile') for key, quantity in self.stock.items() if key not in stock]
+        self.record_many(changes)
+
+    def timestamp(self):
+        """Now to the millisecond, never earlier than the last event, so segments stay in time order."""
+        self.last_time = max(math.floor(self.clock() * 1000) / 1000, self.last_time)
+        return self.last_time
+
+    def record(self, key, old, quantity, reason, actor=None):
+        """Log a change of key's stock from old to quantity (None for a deletion)."""
+        self.record_many([(key, old, quantity, reason)], actor)
+
+    def record_many(self, changes, actor=None):
+        """Log (key, old, quantity, reason) changes with a single write."""
+        if not changes:
+            return
+        actor = self.actor if actor is None else actor
+        with self.lock:
+            timestamp = self.timestamp()
+            lines = []
+            for key, old, quantity, reason in changes:
+                event = [timestamp, actor, key, (quantity or 0) - (old or 0), quantity, reason]
+                lines.append(json.dumps(event, separators=(',', ':')) + '\n')
+                self.apply(self.stock, event)
+                self.note(key, self.segment)
+            self.file.write(''.join(lines))
+            self.file.flush()
+            self.count += len(lines)
+            if self.count >= self.segment_events:
+                self.seal()
+
+    def write_checkpoint(self, number, timestamp, stock):
+        path = self.path('checkpoint', number)
+        with open(path + '.tmp', 'w') as file:
+            json.dump({'ts': timestamp, 'segment': number, 'stock': stock}, file, separators=(',', ':'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(path + '.tmp', path)
+        self.checkpoints.append((timestamp, number))
+
+    def write_index(self, sealed):
+        path = os.path.join(self.directory, INDEX_FILE)
+        with open(path + '.tmp', 'w') as file:
+            json.dump({'sealed': sealed, 'checkpoints': self.checkpoints, 'keys': self.segments}, file,
+                      separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+
+    def seal(self):
+        """Close the active segment, checkpoint the stock as of its last event and start the next one."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        self.write_checkpoint(self.segment, self.last_time, self.stock)
+        self.write_index(self.segment)
+        self.segment += 1
+        self.count = 0
+        self.file = open(self.path('segment', self.segment), 'a')
+
+    def stock_at(self, when):
+        """Return {key: quantity} as of timestamp when, from the last checkpoint before it plus the tail.
+
+        Raises ValueError if when is before the log was started.
+        """
+        with self.lock:
+            self.file.flush()
+            position = bisect.bisect_right(self.checkpoints, (when, float('inf'))) - 1
+            if position < 0:
+                raise ValueError(f"The audit log starts at {format_time(self.checkpoints[0][0])}."
+                                 if self.checkpoints else "The audit log has not been started.")
+            checkpoint = self.checkpoints[position][1]
+            last = self.segment
+        stock = self.read_checkpoint(checkpoint)
+        for number in range(checkpoint + 1, last + 1):
+            for event in self.read_segment(number):
+                if event[0] > when:
+                    return stock
+                self.apply(stock, event)
+        return stock
+
+    def history(self, key, since=None, until=None):
+        """Return key's events between timestamps since and until, reading only the segments that mention it."""
+        with self.lock:
+            self.file.flush()
+            segments = list(self.segments.get(key, ()))
+        events = []
+        for number in segments:
+            for event in self.read_segment(number):
+                if event[2] != key or (since is not None and event[0] < since):
+                    continue
+                if until is not None and event[0] > until:
+                    return events
+                events.append(event)
+        return events
+
+    def close(self):
+        with self.lock:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            self.write_index(self.segment - 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a cp or pos stock audit log")
+    commands = parser.add_subparsers(dest='command', required=True)
+    stock_parser = commands.add_parser('stock', help="stock of every item at a point in time")
+    stock_parser.add_argument('directory')
+    stock_parser.add_argument('--at', required=True, help="ISO date or date and time")
+    history_parser = commands.add_parser('history', help="stock changes of one item")
+    history_parser.add_argument('directory')
+    history_parser.add_argument('key', help="cp item name or pos item ID")
+    history_parser.add_argument('--since', help="ISO date or date and time")
+    history_parser.add_argument('--until', help="ISO date or date and time")
+    args = parser.parse_args()
+    log = AuditLog(args.directory)
+    try:
+        if args.command == 'stock':
+            for key, quantity in sorted(log.stock_at(parse_time(args.at)).items()):
+                print(f"{key}: {quantity}")
+        else:
+            since = parse_time(args.since) if args.since else None
+            until = parse_time(args.until) if args.until else None
+            for event in log.history(args.key, since, until):
+                print(format_event(event))
+    finally:
+        log.close()
+
+if __name__ == '__main__':
+    main()
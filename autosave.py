@@ -0,0 +1,90 @@
+"""Background autosave for cp.py and pos.py.
+
+Autosave runs a daemon thread that calls flush() every interval seconds,
+or as soon as threshold changes have been noted since the last flush,
+whichever comes first. flush() writes only the records changed since
+the previous flush and returns the number of bytes it wrote; Autosave
+keeps count of flushes, bytes and flush latency for stats().
+"""
+import threading
+import time
+
+class Autosave:
+    """Flush dirty records on a timer or once enough changes pile up."""
+    def __init__(self, flush, interval=30.0, threshold=500):
+        self.flush = flush
+        self.interval = interval
+        self.threshold = threshold
+        self.pending = 0
+        self.flushes = 0
+        self.bytes = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.errors = 0
+        self.last_error = None
+        self.stopped = False
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def note(self, count=1):
+        """Count changes; wakes the thread once threshold of them are waiting."""
+        with self.condition:
+            self.pending += count
+            if self.pending >= self.threshold:
+                self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                deadline = time.monotonic() + self.interval
+                while not self.stopped and self.pending < self.threshold:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                if self.stopped:
+                    return
+                if not self.pending:
+                    continue
+            self.flush_now()
+
+    def flush_now(self):
+        with self.condition:
+            self.pending = 0
+        start = time.perf_counter()
+        try:
+            written = self.flush()
+        except OSError as e:
+            self.errors += 1
+            self.last_error = e
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        self.flushes += 1
+        self.bytes += written
+        self.last_ms = elapsed
+        self.max_ms = max(self.max_ms, elapsed)
+        self.total_ms += elapsed
+
+    def stop(self):
+        """Stop the thread after flushing whatever is still pending."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        self.thread.join()
+        if self.pending:
+            self.flush_now()
+
+    def stats(self):
+        return {'flushes': self.flushes, 'bytes': self.bytes, 'last_ms': self.last_ms, 'max_ms': self.max_ms,
+                'mean_ms': self.total_ms / self.flushes if self.flushes else 0.0, 'pending': self.pending,
+                'errors': self.errors}
+
+    def summary(self):
+        stats = self.stats()
+        text = (f"Autosave: {stats['flushes']} flushes, {stats['bytes']} bytes written, "
+                f"{stats['mean_ms']:.2f} ms mean, {stats['max_ms']:.2f} ms max flush latency")
+        if self.errors:
+            text += f", {self.errors} failed ({self.last_error})"
+        return text
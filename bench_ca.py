@@ -0,0 +1,164 @@
+"""Headless benchmarks for the Space Shooter (SDL dummy video driver).
+
+collision: compares pygame.sprite.groupcollide/spritecollide against the
+SpatialHash broadphase at several entity counts. Half the entities are
+bullets and half enemies, scattered over the screen and jittered every
+frame. Both paths must report the same hits on every frame.
+
+render: plays the same seeded game with the full and the dirty-rect
+renderer and times Game.render per frame. The two renderers must leave
+identical pixels on screen after every frame.
+
+entities: times whole frames (update, collisions and full render) with
+one sprite per entity against the NumPy EntityArrays path.
+
+    python bench_ca.py collision --entities 100,1000,10000 --frames 10
+    python bench_ca.py render --enemies 50,500 --frames 300
+    python bench_ca.py entities --enemies 1000,10000,50000 --frames 60
+"""
+import argparse
+import hashlib
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import ca
+
+def scatter(sprites, rng):
+    for sprite in sprites:
+        sprite.rect.x = rng.randint(0, ca.WIDTH - sprite.rect.width)
+        sprite.rect.y = rng.randint(0, ca.HEIGHT - sprite.rect.height)
+
+def make_sprites(count, rng):
+    bullets = pygame.sprite.Group(ca.Bullet(0, 0) for _ in range(count // 2))
+    enemies = pygame.sprite.Group(ca.Enemy() for _ in range(count - count // 2))
+    scatter(bullets, rng)
+    scatter(enemies, rng)
+    return bullets, enemies
+
+def brute_force(bullets, enemies, player, grid):
+    hits = pygame.sprite.groupcollide(bullets, enemies, False, False)
+    return hits, pygame.sprite.spritecollide(player, enemies, False)
+
+def broadphase(bullets, enemies, player, grid):
+    grid.build(enemies)
+    return grid.groupcollide(bullets, False, False), grid.spritecollide(player)
+
+def run_collisions(count, frames, seed):
+    rng = random.Random(seed)
+    bullets, enemies = make_sprites(count, rng)
+    player = ca.Player()
+    grid = ca.SpatialHash()
+    timings = {brute_force: 0.0, broadphase: 0.0}
+    for _ in range(frames):
+        scatter(bullets, rng)
+        scatter(enemies, rng)
+        results = []
+        for method in timings:
+            start = time.perf_counter()
+            results.append(method(bullets, enemies, player, grid))
+            timings[method] += time.perf_counter() - start
+        if results[0] != results[1]:
+            raise AssertionError(f"broadphase disagrees with groupcollide at {count} entities")
+    return timings[brute_force] / frames, timings[broadphase] / frames
+
+def play(renderer, enemies, frames, seed):
+    """Play a seeded game and return (render times, screen hashes) per frame."""
+    random.seed(seed)
+    game = ca.Game(renderer=renderer)
+    for _ in range(enemies - len(game.enemies)):
+        game.new_enemy()
+    game.player.rect.top = ca.HEIGHT + 100  # out of reach, so the game never ends
+    times = []
+    hashes = []
+    for frame in range(frames):
+        if frame % 4 == 0:
+            game.player.rect.centerx = random.randint(0, ca.WIDTH)
+            game.fire_bullet()
+        game.update()
+        game.check_collisions()
+        start = time.perf_counter()
+        game.render()
+        times.append(time.perf_counter() - start)
+        hashes.append(hashlib.md5(pygame.image.tobytes(ca.screen, "RGB")).digest())
+    return times, hashes
+
+def frame_times(entities, enemies, frames, seed):
+    """Time update + collisions + render for frames frames of a seeded game."""
+    random.seed(seed)
+    game = ca.Game(entities=entities, enemies=enemies)
+    game.player.rect.top = ca.HEIGHT + 100
+    times = []
+    for frame in range(frames):
+        if frame % 4 == 0:
+            game.player.rect.centerx = random.randint(0, ca.WIDTH)
+            game.fire_bullet()
+        start = time.perf_counter()
+        game.update()
+        game.check_collisions()
+        game.render()
+        times.append(time.perf_counter() - start)
+    return times
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def collision_main(args):
+    print(f"{'entities':>8} {'groupcollide ms':>16} {'spatial hash ms':>16} {'speedup':>8}")
+    for count in [int(n) for n in args.entities.split(",")]:
+        brute, hashed = run_collisions(count, args.frames, args.seed)
+        print(f"{count:>8} {brute * 1000:>16.2f} {hashed * 1000:>16.2f} {brute / hashed:>7.1f}x")
+
+def render_main(args):
+    print(f"{'enemies':>7} {'renderer':>8} {'mean ms':>8} {'p95 ms':>8}")
+    for enemies in [int(n) for n in args.enemies.split(",")]:
+        reference = None
+        for renderer in ("full", "dirty"):
+            times, hashes = play(renderer, enemies, args.frames, args.seed)
+            if reference is None:
+                reference = hashes
+            elif hashes != reference:
+                raise AssertionError(f"{renderer} renderer drew different pixels with {enemies} enemies")
+            print(f"{enemies:>7} {renderer:>8} {sum(times) / len(times) * 1000:>8.3f} "
+                  f"{percentile(times, 0.95) * 1000:>8.3f}")
+
+def entities_main(args):
+    print(f"{'enemies':>7} {'entities':>8} {'mean ms':>8} {'p95 ms':>8} {'fps':>6}")
+    for enemies in [int(n) for n in args.enemies.split(",")]:
+        for entities in ("sprites", "arrays"):
+            times = frame_times(entities, enemies, args.frames, args.seed)
+            mean = sum(times) / len(times)
+            print(f"{enemies:>7} {entities:>8} {mean * 1000:>8.2f} "
+                  f"{percentile(times, 0.95) * 1000:>8.2f} {1 / mean:>6.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks for ca.py")
+    commands = parser.add_subparsers(dest="command", required=True)
+    collision = commands.add_parser("collision", help="collision time per frame")
+    collision.add_argument("--entities", default="100,1000,10000", help="comma-separated entity counts")
+    collision.add_argument("--frames", type=int, default=10)
+    render = commands.add_parser("render", help="render time per frame, full vs dirty-rect")
+    render.add_argument("--enemies", default="5,50,500", help="comma-separated enemy counts")
+    render.add_argument("--frames", type=int, default=300)
+    entities = commands.add_parser("entities", help="frame time per frame, sprites vs NumPy arrays")
+    entities.add_argument("--enemies", default="1000,10000,50000", help="comma-separated enemy counts")
+    entities.add_argument("--frames", type=int, default=60)
+    for command in (collision, render, entities):
+        command.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.command == "collision":
+        collision_main(args)
+    elif args.command == "render":
+        render_main(args)
+    else:
+        entities_main(args)
+    pygame.quit()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Startup and lookup benchmark for eager vs lazily loaded POS customers.
+
+For each customer count, writes the same customers as customers.json
+(read whole by DictStorage) and as a CustomerStore (customers.ndjson plus
+its index), then times opening each and a run of skewed random lookups:
+most lookups hit a small set of regulars, the rest are spread over the
+whole base, as at a real register.
+
+    python bench_customers.py --customers 10000,100000,1000000 --cache 10000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import pos
+
+def write_customers(directory, count):
+    customers = [pos.Customer(f"C{i:08d}", f"customer-{i}", f"c{i}@example.com", "555-0100") for i in range(count)]
+    json_path = os.path.join(directory, "customers.json")
+    with open(json_path, "w") as file:
+        json.dump({"customers": [customer.__dict__ for customer in customers]}, file)
+    store = pos.CustomerStore(os.path.join(directory, "customers.ndjson"))
+    for start in range(0, count, 100000):
+        store.upsert(customers[start:start + 100000])
+    store.close()
+    return json_path
+
+def lookups(customers, count, total, rng):
+    regulars = max(1, count // 100)
+    start = time.perf_counter()
+    for _ in range(total):
+        index = rng.randrange(regulars) if rng.random() < 0.8 else rng.randrange(count)
+        customers[f"C{index:08d}"]
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Eager vs lazy customer loading")
+    parser.add_argument("--customers", default="10000,100000,1000000", help="comma-separated customer counts")
+    parser.add_argument("--cache", type=int, default=10000, help="CustomerStore cache size")
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'customers':>9} {'mode':>5} {'startup s':>10} {'lookup us':>10} {'hit rate':>9}")
+    for count in [int(n) for n in args.customers.split(",")]:
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = write_customers(directory, count)
+            for lazy in (False, True):
+                storage = pos.DictStorage(os.path.join(directory, "inventory.json"), json_path,
+                                          lazy_customers=lazy, cache_size=args.cache)
+                start = time.perf_counter()
+                storage.load()
+                startup = time.perf_counter() - start
+                seconds = lookups(storage.customers, count, args.lookups, random.Random(args.seed))
+                if lazy:
+                    stats = storage.customers.stats()
+                    hit_rate = f"{stats['hits'] / (stats['hits'] + stats['misses']):>9.1%}"
+                else:
+                    hit_rate = f"{'-':>9}"
+                print(f"{count:>9} {'lazy' if lazy else 'eager':>5} {startup:>10.3f} "
+                      f"{seconds / args.lookups * 1e6:>10.2f} {hit_rate}")
+                storage.close()
+                del storage
+
+if __name__ == "__main__":
+    main()
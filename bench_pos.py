@@ -0,0 +1,94 @@
+"""Stress benchmark for concurrent checkout lanes sharing one POS.
+
+Each lane is a thread calling POS.process_sale with random carts against a
+deliberately small stock, so lanes fight over the same items. After every
+run the remaining stock is checked against the units recorded in the
+transactions: nothing may go negative and nothing may be sold twice.
+
+    python bench_pos.py --lanes 1,2,4,8 --sales 20000 --storage sqlite
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import pos
+
+def build_pos(storage, directory, item_count, stock, customer_count):
+    if storage == "sqlite":
+        engine = pos.SQLiteStorage(os.path.join(directory, "pos.db"), batch_size=100)
+    else:
+        engine = pos.DictStorage(os.path.join(directory, "inventory.json"),
+                                 os.path.join(directory, "customers.json"))
+    pos_system = pos.POS(engine)
+    for i in range(item_count):
+        pos_system.add_item(f"I{i:05d}", f"item-{i}", round(random.uniform(1, 50), 2), stock)
+    for i in range(customer_count):
+        pos_system.add_customer(f"C{i:05d}", f"customer-{i}", f"c{i}@example.com", "555-0100")
+    return pos_system
+
+def run_lanes(pos_system, lanes, sales, item_count, customer_count, cart_size, seed):
+    per_lane = sales // lanes
+    completed = [0] * lanes
+    start_barrier = threading.Barrier(lanes + 1)
+
+    def lane(index):
+        rng = random.Random(seed + index)
+        start_barrier.wait()
+        for _ in range(per_lane):
+            cart = {f"I{rng.randrange(item_count):05d}": rng.randint(1, 3) for _ in range(cart_size)}
+            try:
+                pos_system.process_sale(f"C{rng.randrange(customer_count):05d}", cart)
+            except pos.OutOfStockError:
+                continue
+            completed[index] += 1
+
+    threads = [threading.Thread(target=lane, args=(i,)) for i in range(lanes)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return per_lane * lanes, sum(completed), elapsed
+
+def check_stock(pos_system, stock):
+    sold = {}
+    for transaction in pos_system.transactions.values():
+        for line in transaction.items:
+            sold[line.item_id] = sold.get(line.item_id, 0) + line.quantity
+    oversells = 0
+    for item in pos_system.inventory.values():
+        if item.quantity < 0 or item.quantity + sold.get(item.item_id, 0) != stock:
+            oversells += 1
+    return oversells
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-lane POS.process_sale stress benchmark")
+    parser.add_argument("--lanes", default="1,2,4,8", help="comma-separated lane counts")
+    parser.add_argument("--sales", type=int, default=20000, help="sales attempted per run")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--stock", type=int, default=100, help="starting quantity per item")
+    parser.add_argument("--customers", type=int, default=100)
+    parser.add_argument("--cart-size", type=int, default=3)
+    parser.add_argument("--storage", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'lanes':>5} {'attempted':>10} {'completed':>10} {'seconds':>8} {'sales/s':>10} {'oversells':>9}")
+    for lanes in [int(n) for n in args.lanes.split(",")]:
+        random.seed(args.seed)
+        with tempfile.TemporaryDirectory() as directory:
+            pos_system = build_pos(args.storage, directory, args.items, args.stock, args.customers)
+            attempted, completed, elapsed = run_lanes(pos_system, lanes, args.sales, args.items,
+                                                      args.customers, args.cart_size, args.seed)
+            oversells = check_stock(pos_system, args.stock)
+            pos_system.storage.close()
+        print(f"{lanes:>5} {attempted:>10} {completed:>10} {elapsed:>8.2f} "
+              f"{attempted / elapsed:>10.0f} {oversells:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Receipt benchmark for large (wholesale) carts.
+
+Prices a cart of N lines and renders its receipt, over and over, three
+ways: the original float pricing with string += receipts (reproduced here
+as the baseline), the Pricing engine with a cold per-item cache (a fresh
+engine for every receipt) and with a warm one. Categories get their own
+tax rates so the rule lookup is exercised.
+
+    python bench_receipts.py --lines 1000,10000 --receipts 200
+"""
+import argparse
+import random
+import time
+
+import pos
+
+CATEGORIES = ["grocery", "hardware", "clothing", "books", "toys"]
+
+def legacy_receipt(transaction_id, customer, items, date):
+    """The original Transaction totals and generate_receipt, for comparison."""
+    total_amount = sum(item.price * item.quantity for item in items)
+    tax = total_amount * pos.TAX_RATE
+    final_amount = total_amount + tax
+    receipt = f"Receipt for Transaction ID: {transaction_id}\n"
+    receipt += f"Customer: {customer.name} | {customer.email}\n"
+    receipt += f"Date: {date.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    receipt += "-" * 40 + "\n"
+    for item in items:
+        receipt += f"{item.name} (x{item.quantity}) - ${item.price * item.quantity}\n"
+    receipt += "-" * 40 + "\n"
+    receipt += f"Subtotal: ${total_amount}\n"
+    receipt += f"Tax (10%): ${tax}\n"
+    receipt += f"Total: ${final_amount}\n"
+    receipt += "-" * 40 + "\n"
+    return receipt
+
+def make_cart(lines, rng):
+    return [pos.Item(f"I{i:06d}", f"item-{i}", round(rng.uniform(0.5, 200), 2), rng.randint(1, 24),
+                     rng.choice(CATEGORIES)) for i in range(lines)]
+
+def run(lines, receipts, seed):
+    rng = random.Random(seed)
+    items = make_cart(lines, rng)
+    customer = pos.Customer("C1", "Wholesale Buyer", "buyer@example.com", "555-0100")
+    rules = pos.TaxRules(0.1, {"grocery": 0.0, "books": 0.05, "clothing": 0.0825})
+    date = pos.datetime.now()
+    warm = pos.Pricing(rules)
+    timings = {}
+
+    start = time.perf_counter()
+    for n in range(receipts):
+        legacy_receipt(n, customer, items, date)
+    timings["legacy"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for n in range(receipts):
+        pos.Transaction(n, customer, items, date, pos.Pricing(rules)).generate_receipt()
+    timings["cold"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for n in range(receipts):
+        pos.Transaction(n, customer, items, date, warm).generate_receipt()
+    timings["warm"] = time.perf_counter() - start
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Receipts/sec on large carts")
+    parser.add_argument("--lines", default="1000,10000", help="comma-separated cart sizes")
+    parser.add_argument("--receipts", type=int, default=200, help="receipts rendered per cart size and engine")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'lines':>6} {'engine':>7} {'receipts/s':>11} {'ms/receipt':>11}")
+    for lines in [int(n) for n in args.lines.split(",")]:
+        for engine, seconds in run(lines, args.receipts, args.seed).items():
+            print(f"{lines:>6} {engine:>7} {args.receipts / seconds:>11.1f} {seconds / args.receipts * 1000:>11.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Throughput of POS.process_sales_batch against a loop over process_sale.
+
+Both sides start from the same seeded catalog, customers and carts (see
+bench_suite.py) on a fresh storage engine and sell every cart; the batch
+side hands them over batch_size at a time. Stock levels afterwards must
+match, or the run fails.
+
+    python bench_sales_batch.py --storage json,sqlite --sales 20000 --batch-size 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pos
+from bench_suite import carts, catalog, customers
+
+def build(storage, directory, args):
+    if storage == "sqlite":
+        engine = pos.SQLiteStorage(os.path.join(directory, "pos.db"), batch_size=args.sqlite_batch)
+    else:
+        engine = pos.DictStorage(os.path.join(directory, "inventory.json"), os.path.join(directory, "customers.json"))
+    system = pos.POS(engine)
+    rng = random.Random(args.seed)
+    system.upsert_items([pos.Item(key, name, price, quantity, category)
+                         for key, name, category, quantity, price in catalog(args.items, rng)])
+    system.upsert_customers(customers(args.customers))
+    return system
+
+def sales(args):
+    rng = random.Random(args.seed + 1)
+    return [(f"C{rng.randrange(args.customers):07d}", cart)
+            for cart in carts(args.sales, args.items, args.cart, rng)]
+
+def loop(system, orders, args):
+    start = time.perf_counter()
+    for customer_id, cart in orders:
+        try:
+            system.process_sale(customer_id, cart)
+        except pos.POSError:
+            pass
+    system.storage.commit()
+    return time.perf_counter() - start
+
+def batched(system, orders, args):
+    start = time.perf_counter()
+    for offset in range(0, len(orders), args.batch_size):
+        system.process_sales_batch(orders[offset:offset + args.batch_size])
+    system.storage.commit()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch sales throughput against looping over process_sale")
+    parser.add_argument("--storage", default="json,sqlite", help="comma-separated storage engines: json, sqlite")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--sales", type=int, default=20000)
+    parser.add_argument("--cart", type=int, default=4, help="most lines per cart")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--sqlite-batch", type=int, default=1, help="SQLiteStorage batch_size for the loop side")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    orders = sales(args)
+    print(f"Items: {args.items}, Sales: {args.sales}, Batch size: {args.batch_size}")
+    print(f"{'storage':<8} {'loop sales/sec':>15} {'batch sales/sec':>16} {'speedup':>8}")
+    for storage in args.storage.split(","):
+        timings = []
+        stock = []
+        for run in (loop, batched):
+            with tempfile.TemporaryDirectory() as directory:
+                system = build(storage, directory, args)
+                timings.append(run(system, orders, args))
+                stock.append({item.item_id: item.quantity for item in system.inventory.values()})
+                system.storage.close()
+        if stock[0] != stock[1]:
+            print(f"{storage}: stock levels differ between loop and batch")
+            sys.exit(1)
+        print(f"{storage:<8} {len(orders) / timings[0]:>15.0f} {len(orders) / timings[1]:>16.0f} "
+              f"{timings[0] / timings[1]:>8.2f}")
+
+if __name__ == "__main__":
+    main()
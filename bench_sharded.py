@@ -0,0 +1,88 @@
+"""Scaling benchmark for the sharded inventory at 1 to 16 workers.
+
+For each worker count, loads the same seeded catalog into a fresh
+ShardedInventory, then times a stream of pipelined updates (routed by
+name, batched per shard), the same number of one-at-a-time view_item
+round trips, and a fan-out total_value query. A single in-process
+journaled cp.Inventory running the same updates is the baseline.
+Throughput only scales with workers up to the number of CPUs.
+
+    python bench_sharded.py --workers 1,2,4,8,16 --items 100000 --updates 200000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import cp
+import sharded
+from bench_suite import catalog
+
+def rows(items, seed):
+    return [(key, category, quantity, price) for key, _, category, quantity, price
+            in catalog(items, random.Random(seed))]
+
+def updates(items, count, seed):
+    rng = random.Random(seed + 1)
+    return [(f"I{rng.randrange(items):07d}", rng.randint(0, 1000), None) for _ in range(count)]
+
+def baseline(args):
+    with tempfile.TemporaryDirectory() as directory:
+        inventory = cp.Inventory(os.path.join(directory, "inventory.json"), journal=True)
+        inventory.upsert_items(rows(args.items, args.seed))
+        stream = updates(args.items, args.updates, args.seed)
+        start = time.perf_counter()
+        for name, quantity, price in stream:
+            inventory.update_item(name, quantity, price)
+        elapsed = time.perf_counter() - start
+        inventory.close()
+    return len(stream) / elapsed
+
+def run(args, workers):
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        inventory = sharded.ShardedInventory(directory, workers, batch_size=args.batch_size)
+        started = time.perf_counter() - start
+        inventory.upsert_items(rows(args.items, args.seed))
+        stream = updates(args.items, args.updates, args.seed)
+
+        start = time.perf_counter()
+        results = inventory.update_many(stream)
+        pipelined = len(stream) / (time.perf_counter() - start)
+        errors = sum(isinstance(result, Exception) for result in results)
+
+        names = [name for name, _, _ in stream[:args.round_trips]]
+        start = time.perf_counter()
+        for name in names:
+            inventory.view_item(name)
+        round_trip = (time.perf_counter() - start) / len(names) * 1e6
+
+        start = time.perf_counter()
+        inventory.total_value()
+        fan_out = (time.perf_counter() - start) * 1000
+        inventory.close()
+    return started, pipelined, round_trip, fan_out, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark for sharded.ShardedInventory")
+    parser.add_argument("--workers", default="1,2,4,8,16", help="comma-separated worker counts")
+    parser.add_argument("--items", type=int, default=100000)
+    parser.add_argument("--updates", type=int, default=200000)
+    parser.add_argument("--round-trips", type=int, default=2000, help="unpipelined view_item calls to time")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()}, Items: {args.items}, Updates: {args.updates}")
+    single = baseline(args)
+    print(f"{'workers':>7} {'start s':>8} {'updates/sec':>12} {'speedup':>8} {'round trip us':>14} "
+          f"{'fan-out ms':>11}")
+    print(f"{'inline':>7} {'-':>8} {single:>12.0f} {1.0:>8.2f} {'-':>14} {'-':>11}")
+    for workers in map(int, args.workers.split(",")):
+        started, pipelined, round_trip, fan_out, errors = run(args, workers)
+        print(f"{workers:>7} {started:>8.2f} {pipelined:>12.0f} {pipelined / single:>8.2f} {round_trip:>14.1f} "
+              f"{fan_out:>11.1f}" + (f"  ({errors} errors)" if errors else ""))
+
+if __name__ == "__main__":
+    main()
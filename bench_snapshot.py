@@ -0,0 +1,77 @@
+"""Startup benchmark for JSON vs binary snapshot inventories.
+
+For each item count, writes the same inventory as inventory.json and as
+inventory.snap (see snapshot.py), then times opening each the way the app
+does (cp.Inventory or pos.DictStorage.load) and a run of random item
+lookups afterwards, since the snapshot defers its work to first access.
+Loading 5M items from JSON needs several GB of memory; pass smaller
+--items on small machines.
+
+    python bench_snapshot.py --app cp --items 10000,1000000,5000000
+    python bench_snapshot.py --app pos --items 10000,1000000
+"""
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+
+import cp
+import pos
+import snapshot
+
+CATEGORIES = ["tools", "garden", "kitchen", "toys", "books", "office", "sports", "auto"]
+
+def make_rows(app, count):
+    if app == "cp":
+        return [(f"item-{i:08d}", "", CATEGORIES[i % len(CATEGORIES)], i % 500, 1.0 + i % 1000 / 4)
+                for i in range(count)]
+    return [(f"I{i:08d}", f"item-{i}", CATEGORIES[i % len(CATEGORIES)], i % 500, 1.0 + i % 1000 / 4)
+            for i in range(count)]
+
+def open_inventory(app, path, directory):
+    """Open path as the app would and return its item mapping."""
+    if app == "cp":
+        return cp.Inventory(path).items
+    storage = pos.DictStorage(path, os.path.join(directory, "customers.json"))
+    storage.load()
+    return storage.inventory
+
+def lookups(items, keys, total, rng):
+    start = time.perf_counter()
+    for _ in range(total):
+        items[keys[rng.randrange(len(keys))]].quantity
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON vs binary snapshot startup")
+    parser.add_argument("--app", choices=["cp", "pos"], default="cp")
+    parser.add_argument("--items", default="10000,1000000,5000000", help="comma-separated item counts")
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'items':>9} {'format':>8} {'file MB':>8} {'startup s':>10} {'lookup us':>10}")
+    for count in [int(n) for n in args.items.split(",")]:
+        with tempfile.TemporaryDirectory() as directory:
+            rows = make_rows(args.app, count)
+            keys = [row[0] for row in rows]
+            paths = {"json": os.path.join(directory, "inventory.json"),
+                     "snapshot": os.path.join(directory, "inventory.snap")}
+            meta = {"users": []} if args.app == "cp" else {}
+            snapshot.write_json(paths["json"], args.app, rows, meta)
+            snapshot.write(paths["snapshot"], args.app, rows, meta)
+            del rows
+            for fmt, path in paths.items():
+                gc.collect()
+                start = time.perf_counter()
+                items = open_inventory(args.app, path, directory)
+                startup = time.perf_counter() - start
+                seconds = lookups(items, keys, args.lookups, random.Random(args.seed))
+                print(f"{count:>9} {fmt:>8} {os.path.getsize(path) / 1e6:>8.1f} {startup:>10.3f} "
+                      f"{seconds / args.lookups * 1e6:>10.2f}")
+                del items
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Benchmark suite for the inventory, POS and game hot paths, with baselines.
+
+Every case builds its data from seeded generators (catalogs, customers,
+carts, sprite counts) at each requested scale, then times one operation
+at a time: inventory load and save, add/update/delete, sales, report
+generation and headless game frames. Each case runs twice, once for
+timings and once under tracemalloc for peak memory, so tracing overhead
+never shows up in the latencies.
+
+Results are saved as JSON. Given a baseline from an earlier run, cases
+whose ops/sec fell, p95 latency rose or peak memory grew by more than
+--threshold are flagged as regressions and the exit status is 1.
+
+    python bench_suite.py --scale small,medium --save bench.json
+    python bench_suite.py --scale small --baseline bench.json --threshold 0.15
+    python bench_suite.py --cases pos.,ca.frame --scale large
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import cp
+import pos
+
+SCALES = {
+    "small": {"items": 1000, "customers": 100, "ops": 1000, "sales": 1000, "cart": 3, "enemies": 20,
+              "frames": 120, "repeat": 20},
+    "medium": {"items": 10000, "customers": 1000, "ops": 5000, "sales": 5000, "cart": 4, "enemies": 200,
+               "frames": 240, "repeat": 10},
+    "large": {"items": 100000, "customers": 10000, "ops": 20000, "sales": 20000, "cart": 5, "enemies": 2000,
+              "frames": 240, "repeat": 3},
+}
+CATEGORIES = ["tools", "garden", "kitchen", "toys", "books", "office", "sports", "auto"]
+
+def catalog(count, rng):
+    """Yield (key, name, category, quantity, price) rows."""
+    for i in range(count):
+        yield (f"I{i:07d}", f"item-{i}", CATEGORIES[rng.randrange(len(CATEGORIES))],
+               rng.randint(1000, 100000), round(rng.uniform(0.5, 200), 2))
+
+def customers(count):
+    return [pos.Customer(f"C{i:07d}", f"customer-{i}", f"c{i}@example.com", "555-0100") for i in range(count)]
+
+def carts(count, items, size, rng):
+    """Yield carts of up to size lines, skewed towards a popular fifth of the catalog."""
+    popular = max(1, items // 5)
+    for _ in range(count):
+        lines = rng.randint(1, size)
+        yield {f"I{(rng.randrange(popular) if rng.random() < 0.8 else rng.randrange(items)):07d}": rng.randint(1, 3)
+               for _ in range(lines)}
+
+def cp_inventory(directory, sizes, rng):
+    inventory = cp.Inventory(os.path.join(directory, "inventory.json"))
+    inventory.upsert_items((key, category, quantity, price) for key, _, category, quantity, price
+                           in catalog(sizes["items"], rng))
+    return inventory
+
+def pos_system(directory, sizes, rng):
+    system = pos.POS(pos.DictStorage(os.path.join(directory, "pos_inventory.json"),
+                                     os.path.join(directory, "customers.json")))
+    system.upsert_items([pos.Item(key, name, price, quantity, category)
+                         for key, name, category, quantity, price in catalog(sizes["items"], rng)])
+    system.upsert_customers(customers(sizes["customers"]))
+    return system
+
+def timed(operations):
+    """Run each zero-argument callable and return its latency in seconds."""
+    latencies = []
+    for operation in operations:
+        start = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def cp_load(directory, sizes, rng):
+    cp_inventory(directory, sizes, rng).save_inventory()
+    path = os.path.join(directory, "inventory.json")
+    return timed(lambda: cp.Inventory(path) for _ in range(sizes["repeat"]))
+
+def cp_save(directory, sizes, rng):
+    inventory = cp_inventory(directory, sizes, rng)
+    return timed(inventory.save_inventory for _ in range(sizes["repeat"]))
+
+def cp_add(directory, sizes, rng):
+    inventory = cp_inventory(directory, sizes, rng)
+    return timed((lambda i=i: inventory.add_item(f"N{i:07d}", "new", 10, 1.0)) for i in range(sizes["ops"]))
+
+def cp_update(directory, sizes, rng):
+    inventory = cp_inventory(directory, sizes, rng)
+    names = [f"I{rng.randrange(sizes['items']):07d}" for _ in range(sizes["ops"])]
+    return timed((lambda name=name: inventory.update_item(name, quantity=rng.randint(0, 100),
+                                                          price=round(rng.uniform(0.5, 200), 2)))
+                 for name in names)
+
+def cp_delete(directory, sizes, rng):
+    inventory = cp_inventory(directory, sizes, rng)
+    next(inventory.search(prefix="I"))  # build the secondary index, as an interactive session would
+    names = rng.sample(list(inventory.items), min(sizes["ops"], sizes["items"]))
+    return timed((lambda name=name: inventory.delete_item(name)) for name in names)
+
+def pos_load(directory, sizes, rng):
+    pos_system(directory, sizes, rng).save_inventory()
+    inventory_path = os.path.join(directory, "pos_inventory.json")
+    customers_path = os.path.join(directory, "customers.json")
+    return timed(lambda: pos.POS(pos.DictStorage(inventory_path, customers_path)) for _ in range(sizes["repeat"]))
+
+def pos_save(directory, sizes, rng):
+    system = pos_system(directory, sizes, rng)
+    return timed(system.save_inventory for _ in range(sizes["repeat"]))
+
+def pos_sale(directory, sizes, rng):
+    system = pos_system(directory, sizes, rng)
+    customer_ids = list(system.customers)
+    sales = list(carts(sizes["sales"], sizes["items"], sizes["cart"], rng))
+    return timed((lambda cart=cart: system.process_sale(rng.choice(customer_ids), cart)) for cart in sales)
+
+def pos_batch(directory, sizes, rng):
+    """Time process_sales_batch over batches of 100 carts."""
+    system = pos_system(directory, sizes, rng)
+    customer_ids = list(system.customers)
+    sales = [(rng.choice(customer_ids), cart) for cart in carts(sizes["sales"], sizes["items"], sizes["cart"], rng)]
+    return timed((lambda batch=sales[start:start + 100]: system.process_sales_batch(batch))
+                 for start in range(0, len(sales), 100))
+
+def pos_report(directory, sizes, rng):
+    system = pos_system(directory, sizes, rng)
+    customer_ids = list(system.customers)
+    for cart in carts(sizes["sales"], sizes["items"], sizes["cart"], rng):
+        system.process_sale(rng.choice(customer_ids), cart)
+    return timed(system.generate_sales_report for _ in range(sizes["repeat"]))
+
+def game(enemies, renderer):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import ca
+    return ca, ca.Game(renderer=renderer, enemies=enemies)
+
+def ca_frames(sizes, rng, renderer):
+    random.seed(rng.random())
+    ca, current = game(sizes["enemies"], renderer)
+
+    def frame():
+        nonlocal current
+        if current.game_over:
+            current = ca.Game(renderer=renderer, enemies=sizes["enemies"])
+        current.autopilot()
+        current.tick()
+        if renderer is not None:
+            current.render(1.0)
+    return timed(frame for _ in range(sizes["frames"]))
+
+def ca_tick(directory, sizes, rng):
+    return ca_frames(sizes, rng, None)
+
+def ca_frame(directory, sizes, rng):
+    return ca_frames(sizes, rng, "full")
+
+CASES = [
+    ("cp.load", cp_load), ("cp.save", cp_save), ("cp.add", cp_add), ("cp.update", cp_update),
+    ("cp.delete", cp_delete), ("pos.load", pos_load), ("pos.save", pos_save), ("pos.sale", pos_sale),
+    ("pos.batch", pos_batch), ("pos.report", pos_report), ("ca.tick", ca_tick), ("ca.frame", ca_frame),
+]
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_case(function, sizes, seed, memory):
+    """Time one case, then rerun it under tracemalloc for its peak memory."""
+    with tempfile.TemporaryDirectory() as directory:
+        gc.collect()
+        latencies = sorted(function(directory, sizes, random.Random(seed)))
+    result = {
+        "ops": len(latencies),
+        "seconds": sum(latencies),
+        "ops_per_sec": len(latencies) / sum(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_kb": None,
+    }
+    if memory:
+        with tempfile.TemporaryDirectory() as directory:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                function(directory, sizes, random.Random(seed))
+                result["peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+            finally:
+                tracemalloc.stop()
+    return result
+
+def compare(results, baseline, threshold):
+    """Return (name, metric, old, new, change) for every metric that got worse by more than threshold."""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric, higher_is_better in (("ops_per_sec", True), ("p95_ms", False), ("peak_kb", False)):
+            if not old.get(metric) or result.get(metric) is None:
+                continue
+            change = result[metric] / old[metric] - 1
+            if (-change if higher_is_better else change) > threshold:
+                regressions.append((name, metric, old[metric], result[metric], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for cp, pos and ca")
+    parser.add_argument("--scale", default="small", help=f"comma-separated scales from {', '.join(SCALES)}")
+    parser.add_argument("--cases", help="comma-separated case name prefixes (default: all)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change flagged as a regression")
+    args = parser.parse_args()
+
+    prefixes = args.cases.split(",") if args.cases else [""]
+    results = {}
+    print(f"{'case':<18} {'ops':>6} {'ops/sec':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'peak KB':>10}")
+    for scale in args.scale.split(","):
+        sizes = SCALES[scale]
+        for name, function in CASES:
+            if not any(name.startswith(prefix) for prefix in prefixes):
+                continue
+            key = f"{name}@{scale}"
+            try:
+                result = results[key] = run_case(function, sizes, args.seed, not args.no_memory)
+            except ImportError as e:
+                print(f"{key:<18} skipped: {e}")
+                continue
+            peak = "-" if result["peak_kb"] is None else f"{result['peak_kb']:.0f}"
+            print(f"{key:<18} {result['ops']:>6} {result['ops_per_sec']:>10.1f} {result['p50_ms']:>9.3f} "
+                  f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} {peak:>10}")
+
+    if args.save:
+        run = {
+            "meta": {"date": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                     "platform": platform.platform(), "seed": args.seed, "scales": args.scale.split(",")},
+            "results": results,
+        }
+        with open(args.save, "w") as file:
+            json.dump(run, file, indent=4)
+        print(f"Saved {len(results)} results to {args.save}.")
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new, change in regressions:
+            print(f"REGRESSION {name} {metric}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Bulk import and export of inventory data as streaming CSV or NDJSON.
+
+Rows are read one at a time, validated, and applied in batches through
+Inventory.upsert_items / POS.upsert_items / POS.upsert_customers, so a feed
+of any size is imported without per-row output and the file is never held
+in memory. Bad rows are counted and reported at the end instead of
+stopping the import.
+
+    python bulk.py import cp supplier_feed.csv --journal
+    python bulk.py import pos customers.ndjson --kind customers --storage sqlite
+    python bulk.py export pos items.csv --storage sqlite
+"""
+import argparse
+import csv
+import json
+import sys
+
+import cp
+import pos
+
+FIELDS = {
+    ('cp', 'items'): ('name', 'category', 'quantity', 'price'),
+    ('pos', 'items'): ('item_id', 'name', 'price', 'quantity', 'category'),
+    ('pos', 'customers'): ('customer_id', 'name', 'email', 'phone'),
+}
+
+class ImportResult:
+    def __init__(self, max_errors=100):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_number, message))
+
+    def __str__(self):
+        lines = [f"Rows: {self.rows}, Inserted: {self.inserted}, Updated: {self.updated}, Errors: {self.error_count}"]
+        lines += [f"  line {line_number}: {message}" for line_number, message in self.errors]
+        if self.error_count > len(self.errors):
+            lines.append(f"  ... {self.error_count - len(self.errors)} more")
+        return "\n".join(lines)
+
+def detect_format(path, fmt=None):
+    if fmt is not None:
+        return fmt
+    return 'ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv'
+
+def read_rows(path, fmt=None):
+    """Yield (line_number, row) pairs; NDJSON rows are left as text to be parsed per row."""
+    with open(path, 'r', newline='') as file:
+        if detect_format(path, fmt) == 'csv':
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line_number, line in enumerate(file, 1):
+                if line.strip():
+                    yield line_number, line
+
+def non_empty(row, field):
+    value = str(row[field]).strip()
+    if not value:
+        raise ValueError(f"{field} is empty")
+    return value
+
+def non_negative(value, field):
+    if value < 0:
+        raise ValueError(f"{field} cannot be negative")
+    return value
+
+def parse_cp_item(row):
+    return (non_empty(row, 'name'), str(row.get('category') or ''),
+            non_negative(int(row['quantity']), 'quantity'), non_negative(float(row['price']), 'price'))
+
+def parse_pos_item(row):
+    return pos.Item(non_empty(row, 'item_id'), str(row.get('name') or ''),
+                    non_negative(float(row['price']), 'price'), non_negative(int(row['quantity']), 'quantity'),
+                    str(row.get('category') or ''))
+
+def parse_pos_customer(row):
+    return pos.Customer(non_empty(row, 'customer_id'), str(row.get('name') or ''),
+                        str(row.get('email') or ''), str(row.get('phone') or ''))
+
+def import_file(target, path, kind='items', fmt=None, batch_size=50000):
+    """Stream a CSV/NDJSON file into an Inventory or POS and return an ImportResult."""
+    if isinstance(target, cp.Inventory):
+        parse, apply = parse_cp_item, target.upsert_items
+    elif kind == 'customers':
+        parse, apply = parse_pos_customer, target.upsert_customers
+    else:
+        parse, apply = parse_pos_item, target.upsert_items
+    result = ImportResult()
+    batch = []
+
+    def flush():
+        inserted, updated = apply(batch)
+        result.inserted += inserted
+        result.updated += updated
+        batch.clear()
+
+    for line_number, row in read_rows(path, fmt):
+        result.rows += 1
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+            batch.append(parse(row))
+        except KeyError as e:
+            result.error(line_number, f"missing field {e}")
+            continue
+        except (TypeError, ValueError, AttributeError) as e:
+            result.error(line_number, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
+
+def export_file(target, path, kind='items', fmt=None):
+    """Stream the current items or customers to a CSV/NDJSON file; returns the row count."""
+    if isinstance(target, cp.Inventory):
+        fields = FIELDS['cp', 'items']
+        rows = (item.to_dict() for item in target.items.values())
+    elif kind == 'customers':
+        fields = FIELDS['pos', 'customers']
+        rows = ({field: getattr(customer, field) for field in fields} for customer in target.customers.values())
+    else:
+        fields = FIELDS['pos', 'items']
+        rows = (item.to_dict() for item in target.inventory.values())
+    count = 0
+    with open(path, 'w', newline='') as file:
+        if detect_format(path, fmt) == 'csv':
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                file.write(json.dumps(row, separators=(',', ':')) + '\n')
+                count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import/export for cp.py and pos.py data")
+    parser.add_argument('action', choices=['import', 'export'])
+    parser.add_argument('system', choices=['cp', 'pos'])
+    parser.add_argument('path', help="CSV or NDJSON (.ndjson/.jsonl) file")
+    parser.add_argument('--kind', choices=['items', 'customers'], default='items',
+                        help="what to import/export (customers only for pos)")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="override detection by extension")
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--inventory', default=cp.INVENTORY_FILE, help="cp inventory file")
+    parser.add_argument('--journal', action='store_true', help="cp: journal the import instead of a full save")
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default='json', help="pos storage engine")
+    parser.add_argument('--db', default='pos.db', help="pos SQLite database path")
+    parser.add_argument('--lazy-customers', action='store_true',
+                        help="pos json storage: keep customers in customers.ndjson instead of memory")
+    args = parser.parse_args()
+    if args.system == 'cp' and args.kind != 'items':
+        parser.error("cp only supports --kind items")
+
+    if args.system == 'cp':
+        target = cp.Inventory(args.inventory, journal=args.journal)
+    elif args.storage == 'sqlite':
+        target = pos.POS(pos.SQLiteStorage(args.db))
+    else:
+        target = pos.POS(pos.DictStorage(lazy_customers=args.lazy_customers))
+
+    if args.action == 'import':
+        result = import_file(target, args.path, args.kind, args.format, args.batch_size)
+        target.save_inventory()
+        print(result)
+    else:
+        count = export_file(target, args.path, args.kind, args.format)
+        print(f"Exported {count} rows to {args.path}.")
+    if args.system == 'pos':
+        target.storage.close()
+    else:
+        target.close()
+    return 0 if args.action == 'export' or result.error_count == 0 else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,17 @@
+import argparse
+import cProfile
+import csv
+import heapq
+import json
 import pygame
 import random
 import time
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 # Initialize pygame
 pygame.init()
@@ -14,15 +25,148 @@ GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 FPS = 60
 
-# Screen setup
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Space Shooter")
+# Fixed-timestep simulation: speeds are in pixels per tick
+TICK_RATE = 60
+TICK = 1 / TICK_RATE
+MAX_FRAME_TIME = 0.25  # longest stall the simulation catches up on in one frame
+MAX_STEP = 32  # larger moves are respawns, drawn without interpolation
+GAME_OVER_TICKS = 2 * TICK_RATE
+AUTOPILOT_FIRE_TICKS = 6
+
+# Screen setup; opened by the first renderer, so headless runs never open a window
+screen = None
+
+def open_display():
+    global screen
+    if screen is None:
+        screen = pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Space Shooter")
+    return screen
 
 # Fonts
 font = pygame.font.SysFont("arial", 36)
 
+# Pre-rendered surfaces, shared by every sprite of the same size and color
+surfaces = {}
+
+def solid_surface(size, color):
+    surface = surfaces.get((size, color))
+    if surface is None:
+        surface = surfaces[(size, color)] = pygame.Surface(size)
+        surface.fill(color)
+    return surface
+
 # Classes
+class SpritePool:
+    """Free list of recycled sprites of one class.
+
+    acquire() hands out a released sprite, re-initialised with reset(), and
+    only constructs a new one when the pool is empty. Pooled sprites return
+    themselves on kill(); at most capacity of them are kept. allocations
+    counts every sprite the pool has had to construct.
+    """
+    def __init__(self, sprite_class, capacity):
+        self.sprite_class = sprite_class
+        self.capacity = capacity
+        self.free = []
+        self.allocations = 0
+        self.reuses = 0
+
+    def prefill(self, count, *args):
+        while len(self.free) < min(count, self.capacity):
+            sprite = self.sprite_class(*args)
+            sprite.pool = self
+            self.allocations += 1
+            self.free.append(sprite)
+
+    def acquire(self, *args):
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args)
+            self.reuses += 1
+        else:
+            sprite = self.sprite_class(*args)
+            sprite.pool = self
+            self.allocations += 1
+        return sprite
+
+    def release(self, sprite):
+        if len(self.free) < self.capacity:
+            self.free.append(sprite)
+
+class PooledSprite(pygame.sprite.Sprite):
+    pool = None
+    previous = None  # rect.topleft as of the last tick, for interpolation; None until the sprite has ticked
+
+    def kill(self):
+        was_alive = self.alive()
+        super().kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
+
+class SpatialHash:
+    """Uniform grid broadphase for rect collisions.
+
+    Sprites are bucketed by every cell their rect overlaps, so a query only
+    tests the sprites sharing a cell with it instead of the whole group.
+    spritecollide/groupcollide mirror pygame.sprite's functions of the same
+    name, including kill order and hit order.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.order = {}
+
+    def build(self, sprites):
+        self.cells.clear()
+        self.order.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def insert(self, sprite):
+        self.order[sprite] = len(self.order)
+        for cell in self.cells_for(sprite.rect):
+            bucket = self.cells.get(cell)
+            if bucket is None:
+                self.cells[cell] = ([sprite], [sprite.rect])
+            else:
+                bucket[0].append(sprite)
+                bucket[1].append(sprite.rect)
+
+    def cells_for(self, rect):
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield cx, cy
+
+    def spritecollide(self, sprite, dokill=False):
+        rect = sprite.rect
+        found = set()
+        for cell in self.cells_for(rect):
+            bucket = self.cells.get(cell)
+            if bucket is not None:
+                sprites = bucket[0]
+                found.update(sprites[i] for i in rect.collidelistall(bucket[1]))
+        hits = sorted((other for other in found if other.alive()), key=self.order.__getitem__)
+        if dokill:
+            for other in hits:
+                other.kill()
+        return hits
+
+    def groupcollide(self, group, dokill_a, dokill_b):
+        """Collide every sprite in group against the sprites in the grid."""
+        crashed = {}
+        for sprite in group.sprites():
+            hits = self.spritecollide(sprite, dokill_b)
+            if hits:
+                crashed[sprite] = hits
+                if dokill_a:
+                    sprite.kill()
+        return crashed
+
 class Player(pygame.sprite.Sprite):
+    previous = None
+
     def __init__(self):
         super().__init__()
         self.image = pygame.Surface((50, 50))
@@ -30,37 +174,43 @@ class Player(pygame.sprite.Sprite):
         self.rect = self.image.get_rect()
         self.rect.center = (WIDTH // 2, HEIGHT - 50)
         self.speed = 5
+        self.direction = 0
 
     def update(self):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT] and self.rect.left > 0:
+        if self.direction < 0 and self.rect.left > 0:
             self.rect.x -= self.speed
-        if keys[pygame.K_RIGHT] and self.rect.right < WIDTH:
+        if self.direction > 0 and self.rect.right < WIDTH:
             self.rect.x += self.speed
 
-class Bullet(pygame.sprite.Sprite):
+class Bullet(PooledSprite):
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((5, 10))
-        self.image.fill(RED)
+        self.image = solid_surface((5, 10), RED)
         self.rect = self.image.get_rect()
+        self.reset(x, y)
+
+    def reset(self, x, y):
         self.rect.center = (x, y)
         self.speed = 7
+        self.previous = None
 
     def update(self):
         self.rect.y -= self.speed
         if self.rect.bottom < 0:
             self.kill()
 
-class Enemy(pygame.sprite.Sprite):
+class Enemy(PooledSprite):
     def __init__(self):
         super().__init__()
-        self.image = pygame.Surface((50, 50))
-        self.image.fill(RED)
+        self.image = solid_surface((50, 50), RED)
         self.rect = self.image.get_rect()
+        self.reset()
+
+    def reset(self):
         self.rect.x = random.randint(0, WIDTH - 50)
         self.rect.y = random.randint(-100, -40)
         self.speed = random.randint(2, 5)
+        self.previous = None
 
     def update(self):
         self.rect.y += self.speed
@@ -68,11 +218,355 @@ class Enemy(pygame.sprite.Sprite):
             self.rect.x = random.randint(0, WIDTH - 50)
             self.rect.y = random.randint(-100, -40)
 
-class Game:
+class EntityArrays:
+    """Enemies and bullets stored as NumPy structure-of-arrays.
+
+    Positions are rect top-left corners; the first enemy_count and
+    bullet_count slots of each array are live. step() moves every entity
+    at once, respawns enemies that fell off the bottom and culls bullets
+    that left the top. collide() runs the bullet/enemy AABB tests as
+    batched array comparisons and removes whatever hit by compacting the
+    arrays with boolean masks. draw() rasterises all rects with a 2-D
+    prefix sum, so its cost depends on the screen size, not the entity
+    count. Entities are drawn at their current tick, without interpolation.
+    Random numbers come from a generator seeded from random, so seeding
+    random replays the game.
+    """
+    ENEMY_SIZE = (50, 50)
+    BULLET_SIZE = (5, 10)
+    BULLET_SPEED = 7
+    COLLIDE_CHUNK = 1 << 20  # bullet/enemy pairs compared per batch
+
+    def __init__(self, capacity=256):
+        if np is None:
+            raise ImportError("EntityArrays needs numpy")
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self.enemy_x = np.zeros(capacity, np.int32)
+        self.enemy_y = np.zeros(capacity, np.int32)
+        self.enemy_speed = np.zeros(capacity, np.int32)
+        self.enemy_count = 0
+        self.bullet_x = np.zeros(capacity, np.int32)
+        self.bullet_y = np.zeros(capacity, np.int32)
+        self.bullet_count = 0
+        self.layer = pygame.Surface((WIDTH, HEIGHT), 0, 8)
+        self.layer.set_palette([BLACK, RED])
+
+    @staticmethod
+    def grow(array, needed):
+        if needed <= len(array):
+            return array
+        grown = np.zeros(max(needed, 2 * len(array)), array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def spawn_enemies(self, count):
+        start, end = self.enemy_count, self.enemy_count + count
+        self.enemy_x = self.grow(self.enemy_x, end)
+        self.enemy_y = self.grow(self.enemy_y, end)
+        self.enemy_speed = self.grow(self.enemy_speed, end)
+        self.enemy_x[start:end] = self.rng.integers(0, WIDTH - 50, count, endpoint=True)
+        self.enemy_y[start:end] = self.rng.integers(-100, -40, count, endpoint=True)
+        self.enemy_speed[start:end] = self.rng.integers(2, 5, count, endpoint=True)
+        self.enemy_count = end
+
+    def fire(self, x, y):
+        """Add a bullet centred on (x, y)."""
+        width, height = self.BULLET_SIZE
+        end = self.bullet_count + 1
+        self.bullet_x = self.grow(self.bullet_x, end)
+        self.bullet_y = self.grow(self.bullet_y, end)
+        self.bullet_x[end - 1] = x - width // 2
+        self.bullet_y[end - 1] = y - height // 2
+        self.bullet_count = end
+
+    def keep_enemies(self, keep):
+        count = self.enemy_count
+        kept = int(keep.sum())
+        for array in (self.enemy_x, self.enemy_y, self.enemy_speed):
+            array[:kept] = array[:count][keep]
+        self.enemy_count = kept
+
+    def keep_bullets(self, keep):
+        count = self.bullet_count
+        kept = int(keep.sum())
+        for array in (self.bullet_x, self.bullet_y):
+            array[:kept] = array[:count][keep]
+        self.bullet_count = kept
+
+    def step(self):
+        y = self.enemy_y[:self.enemy_count]
+        y += self.enemy_speed[:self.enemy_count]
+        fallen = np.flatnonzero(y > HEIGHT)
+        if fallen.size:
+            self.enemy_x[fallen] = self.rng.integers(0, WIDTH - 50, fallen.size, endpoint=True)
+            y[fallen] = self.rng.integers(-100, -40, fallen.size, endpoint=True)
+
+        y = self.bullet_y[:self.bullet_count]
+        y -= self.BULLET_SPEED
+        gone = y + self.BULLET_SIZE[1] < 0
+        if gone.any():
+            self.keep_bullets(~gone)
+
+    def collide(self):
+        """Remove overlapping bullets and enemies; return the number of bullets that hit.
+
+        Matches pygame.sprite.groupcollide(bullets, enemies, True, True):
+        bullets are taken in order, so each enemy falls to the first bullet
+        overlapping it, and a bullet whose enemies were all taken by
+        earlier bullets misses and stays.
+        """
+        enemies, bullets = self.enemy_count, self.bullet_count
+        if not enemies or not bullets:
+            return 0
+        enemy_width, enemy_height = self.ENEMY_SIZE
+        bullet_width, bullet_height = self.BULLET_SIZE
+        left, top = self.enemy_x[:enemies], self.enemy_y[:enemies]
+        right, bottom = left + enemy_width, top + enemy_height
+        first = np.full(enemies, bullets)  # first bullet overlapping each enemy, bullets for none
+        chunk = max(1, self.COLLIDE_CHUNK // enemies)
+        for start in range(0, bullets, chunk):
+            x = self.bullet_x[start:min(start + chunk, bullets), None]
+            y = self.bullet_y[start:min(start + chunk, bullets), None]
+            overlap = (x < right) & (left < x + bullet_width) & (y < bottom) & (top < y + bullet_height)
+            found = (first == bullets) & overlap.any(axis=0)
+            first[found] = start + overlap.argmax(axis=0)[found]
+        enemy_hit = first < bullets
+        bullet_hit = np.zeros(bullets, bool)
+        bullet_hit[np.unique(first[enemy_hit])] = True
+        hits = int(bullet_hit.sum())
+        if hits:
+            self.keep_bullets(~bullet_hit)
+            self.keep_enemies(~enemy_hit)
+        return hits
+
+    def collides(self, rect):
+        """True if any enemy overlaps rect."""
+        left, top = self.enemy_x[:self.enemy_count], self.enemy_y[:self.enemy_count]
+        width, height = self.ENEMY_SIZE
+        return bool(((rect.left < left + width) & (left < rect.right) &
+                     (rect.top < top + height) & (top < rect.bottom)).any())
+
+    def lowest_enemy_centerx(self):
+        if not self.enemy_count:
+            return None
+        lowest = int(np.argmax(self.enemy_y[:self.enemy_count]))
+        return int(self.enemy_x[lowest]) + self.ENEMY_SIZE[0] // 2
+
+    def draw(self, surface):
+        """Paint every entity onto an opaque black layer and blit it over surface."""
+        rows = HEIGHT + 1
+        plus, minus = [], []
+        for x, y, (width, height) in (
+                (self.enemy_x[:self.enemy_count], self.enemy_y[:self.enemy_count], self.ENEMY_SIZE),
+                (self.bullet_x[:self.bullet_count], self.bullet_y[:self.bullet_count], self.BULLET_SIZE)):
+            x0, x1 = np.clip(x, 0, WIDTH), np.clip(x + width, 0, WIDTH)
+            y0, y1 = np.clip(y, 0, HEIGHT), np.clip(y + height, 0, HEIGHT)
+            plus += [x0 * rows + y0, x1 * rows + y1]
+            minus += [x1 * rows + y0, x0 * rows + y1]
+        size = (WIDTH + 1) * rows
+        cover = np.bincount(np.concatenate(plus), minlength=size) - np.bincount(np.concatenate(minus), minlength=size)
+        cover = cover.reshape(WIDTH + 1, rows)
+        np.cumsum(cover, axis=0, out=cover)
+        np.cumsum(cover, axis=1, out=cover)
+        pygame.surfarray.blit_array(self.layer, (cover[:WIDTH, :HEIGHT] > 0).view(np.uint8))
+        surface.blit(self.layer, (0, 0))
+
+class FullRenderer:
+    """Clears and redraws the whole screen every frame."""
+    def __init__(self):
+        open_display()
+
+    def render(self, game):
+        screen.fill(BLACK)
+        if game.world is not None:
+            game.world.draw(screen)
+        game.all_sprites.draw(screen)
+        for surface, position in game.text_surfaces():
+            screen.blit(surface, position)
+
+    def present(self):
+        pygame.display.flip()
+
+class DirtyRenderer:
+    """Repaints and updates only the parts of the screen that changed.
+
+    Needs game.all_sprites to be a RenderUpdates group, which reports the
+    old and new rects of every sprite it draws. The text area is repainted
+    only when its text changes or a sprite moved through it.
+    """
     def __init__(self):
+        open_display()
+        self.background = pygame.Surface((WIDTH, HEIGHT))
+        self.background.fill(BLACK)
+        self.text_area = None
+        self.texts = None
+        self.dirty = []
+        screen.blit(self.background, (0, 0))
+        pygame.display.flip()
+
+    def render(self, game):
+        sprites = game.all_sprites
+        sprites.clear(screen, self.background)
+        dirty = sprites.draw(screen)
+
+        texts = game.text_surfaces()
+        rects = [surface.get_rect(topleft=position) for surface, position in texts]
+        if self.text_area is not None:
+            rects.append(self.text_area)
+        area = rects[0].unionall(rects[1:])
+        if texts != self.texts or area.collidelist(dirty) != -1:
+            screen.blit(self.background, area, area)
+            for sprite in sprites:
+                if area.colliderect(sprite.rect):
+                    screen.blit(sprite.image, sprite.rect)
+            for surface, position in texts:
+                screen.blit(surface, position)
+            dirty.append(area)
+            self.texts = texts
+            self.text_area = rects[0].unionall(rects[1:len(texts)])
+        self.dirty = dirty
+
+    def present(self):
+        pygame.display.update(self.dirty)
+
+class FrameProfiler:
+    """Per-phase timings of every frame of the game loop.
+
+    lap(phase) charges the time since the previous lap to phase in the
+    current frame and end_frame() closes the frame. The last window frames
+    of each phase are kept for p50/p95/p99, shown by the overlay (F3) and
+    by summary(). With trace=True every frame is also kept for
+    write_trace(); with worst > 0 every frame runs under cProfile and the
+    captures of the worst frames are kept for write_profiles().
+    """
+    PHASES = ("events", "update", "groupcollide", "spritecollide", "render", "flip")
+    OVERLAY_REFRESH = 30  # frames between overlay redraws
+
+    def __init__(self, window=600, trace=False, worst=0, overlay=True):
+        self.windows = {phase: deque(maxlen=window) for phase in self.PHASES + ("frame",)}
+        self.current = dict.fromkeys(self.PHASES, 0.0)
+        self.frames = [] if trace else None
+        self.worst = worst
+        self.worst_frames = []  # min-heap of (seconds, frame, profile)
+        self.profile = None
+        self.frame = 0
+        self.enemies = self.bullets = 0
+        self.start = self.last = 0.0
+        self.overlay = overlay
+        self.overlay_texts = None
+        self.font = pygame.font.SysFont("monospace", 16)
+
+    def start_frame(self):
+        for phase in self.current:
+            self.current[phase] = 0.0
+        if self.worst:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self, enemies, bullets):
+        seconds = time.perf_counter() - self.start
+        if self.profile is not None:
+            self.profile.disable()
+            if len(self.worst_frames) < self.worst:
+                heapq.heappush(self.worst_frames, (seconds, self.frame, self.profile))
+            elif seconds > self.worst_frames[0][0]:
+                heapq.heapreplace(self.worst_frames, (seconds, self.frame, self.profile))
+            self.profile = None
+        for phase, elapsed in self.current.items():
+            self.windows[phase].append(elapsed)
+        self.windows["frame"].append(seconds)
+        if self.frames is not None:
+            row = {"frame": self.frame, "total_ms": seconds * 1000}
+            row.update((f"{phase}_ms", elapsed * 1000) for phase, elapsed in self.current.items())
+            row["enemies"], row["bullets"] = enemies, bullets
+            self.frames.append(row)
+        self.enemies, self.bullets = enemies, bullets
+        self.frame += 1
+        if self.frame % self.OVERLAY_REFRESH == 0:
+            self.overlay_texts = None
+
+    def percentiles(self, phase):
+        """Return (p50, p95, p99) of phase over the window, in milliseconds."""
+        values = sorted(self.windows[phase])
+        if not values:
+            return 0.0, 0.0, 0.0
+        return tuple(values[min(len(values) - 1, int(len(values) * q))] * 1000 for q in (0.5, 0.95, 0.99))
+
+    def summary(self):
+        lines = [f"{'ms':<13} {'p50':>6} {'p95':>6} {'p99':>6}"]
+        for phase in ("frame",) + self.PHASES:
+            lines.append(f"{phase:<13} " + " ".join(f"{value:>6.2f}" for value in self.percentiles(phase)))
+        lines.append(f"enemies {self.enemies}  bullets {self.bullets}")
+        return lines
+
+    def overlay_surfaces(self):
+        """Return the overlay's (surface, position) texts, redrawn every OVERLAY_REFRESH frames."""
+        if self.overlay_texts is None:
+            self.overlay_texts = []
+            for row, line in enumerate(self.summary()):
+                surface = self.font.render(line, True, GREEN)
+                self.overlay_texts.append((surface, (WIDTH - surface.get_width() - 10, 10 + row * 18)))
+        return self.overlay_texts
+
+    def write_trace(self, path):
+        """Write every recorded frame as CSV, or as JSON unless path ends in .csv."""
+        with open(path, "w", newline="") as file:
+            if path.endswith(".csv"):
+                writer = csv.DictWriter(file, fieldnames=list(self.frames[0]) if self.frames else ["frame"])
+                writer.writeheader()
+                writer.writerows(self.frames)
+            else:
+                json.dump(self.frames, file)
+
+    def write_profiles(self, prefix):
+        """Dump the cProfile capture of each worst frame to <prefix>-frame<N>.prof, slowest first."""
+        paths = []
+        for seconds, frame, profile in sorted(self.worst_frames, reverse=True):
+            path = f"{prefix}-frame{frame}.prof"
+            profile.dump_stats(path)
+            paths.append(path)
+        return paths
+
+class Game:
+    def __init__(self, broadphase=True, pooling=True, renderer="full", entities="sprites", enemies=5,
+                 profiler=None):
         self.running = True
+        self.profiler = profiler
+        if entities == "arrays":
+            if renderer == "dirty":
+                raise ValueError("The dirty renderer needs sprite entities.")
+            self.world = EntityArrays()
+            broadphase = pooling = False
+        else:
+            self.world = None
+        if renderer == "dirty":
+            self.renderer = DirtyRenderer()
+            self.all_sprites = pygame.sprite.RenderUpdates()
+        elif renderer == "full":
+            self.renderer = FullRenderer()
+            self.all_sprites = pygame.sprite.Group()
+        else:
+            self.renderer = None  # headless: simulate only
+            self.all_sprites = pygame.sprite.Group()
+        self.ticks = 0
+        self.game_over_ticks = 0
+        self.score_text = None
+        self.score_text_value = None
+        self.game_over_text = font.render("GAME OVER", True, WHITE)
+        self.grid = SpatialHash() if broadphase else None
+        self.bullet_pool = SpritePool(Bullet, 256) if pooling else None
+        self.enemy_pool = SpritePool(Enemy, 256) if pooling else None
+        if pooling:
+            self.bullet_pool.prefill(64, 0, 0)
+        self.allocations = 0
+        self.frame_allocations = 0
         self.clock = pygame.time.Clock()
-        self.all_sprites = pygame.sprite.Group()
         self.bullets = pygame.sprite.Group()
         self.enemies = pygame.sprite.Group()
         self.player = Player()
@@ -81,70 +575,258 @@ class Game:
         self.game_over = False
 
         # Create enemies
-        for i in range(5):
-            enemy = Enemy()
-            self.all_sprites.add(enemy)
-            self.enemies.add(enemy)
+        if self.world is not None:
+            self.world.spawn_enemies(enemies)
+        else:
+            for i in range(enemies):
+                self.new_enemy()
 
     def new_enemy(self):
-        enemy = Enemy()
+        if self.world is not None:
+            self.world.spawn_enemies(1)
+            return None
+        enemy = self.enemy_pool.acquire() if self.enemy_pool else Enemy()
         self.all_sprites.add(enemy)
         self.enemies.add(enemy)
+        return enemy
+
+    def fire_bullet(self):
+        x, y = self.player.rect.centerx, self.player.rect.top
+        if self.world is not None:
+            self.world.fire(x, y)
+            return
+        bullet = self.bullet_pool.acquire(x, y) if self.bullet_pool else Bullet(x, y)
+        self.all_sprites.add(bullet)
+        self.bullets.add(bullet)
+
+    def count_allocations(self):
+        """Update frame_allocations with the sprites constructed since the last call."""
+        if self.bullet_pool is None:
+            return
+        total = self.bullet_pool.allocations + self.enemy_pool.allocations
+        self.frame_allocations = total - self.allocations
+        self.allocations = total
 
     def run(self):
+        """Simulate in fixed TICK steps and render once per frame, however long rendering takes."""
+        previous = time.perf_counter()
+        lag = 0.0
         while self.running:
+            if self.profiler is not None:
+                self.profiler.start_frame()
+            now = time.perf_counter()
+            lag += min(now - previous, MAX_FRAME_TIME)
+            previous = now
+
+            self.handle_events()
+            if self.profiler is not None:
+                self.profiler.lap("events")
+            while lag >= TICK and self.running:
+                self.tick()
+                lag -= TICK
+            self.render(lag / TICK)
+            if self.profiler is not None:
+                self.profiler.end_frame(*self.entity_counts())
             self.clock.tick(FPS)
 
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.running = False
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE and not self.game_over:
-                        bullet = Bullet(self.player.rect.centerx, self.player.rect.top)
-                        self.all_sprites.add(bullet)
-                        self.bullets.add(bullet)
+    def handle_events(self):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.running = False
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE and not self.game_over:
+                    self.fire_bullet()
+                if event.key == pygame.K_F3 and self.profiler is not None:
+                    self.profiler.overlay = not self.profiler.overlay
+        keys = pygame.key.get_pressed()
+        self.player.direction = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
 
-            self.update()
+    def autopilot(self):
+        """Scripted input for headless runs: chase the lowest enemy and fire every few ticks."""
+        if self.world is not None:
+            target = self.world.lowest_enemy_centerx()
+        else:
+            lowest = max(self.enemies, key=lambda enemy: enemy.rect.bottom, default=None)
+            target = None if lowest is None else lowest.rect.centerx
+        if target is None:
+            self.player.direction = 0
+        else:
+            offset = target - self.player.rect.centerx
+            self.player.direction = (offset > 0) - (offset < 0)
+        if self.ticks % AUTOPILOT_FIRE_TICKS == 0 and not self.game_over:
+            self.fire_bullet()
 
-            # Check for collisions between bullets and enemies
-            hits = pygame.sprite.groupcollide(self.bullets, self.enemies, True, True)
-            if hits:
-                for hit in hits:
-                    self.score += 10
-                    self.new_enemy()
+    def tick(self):
+        """Advance the simulation by one fixed step."""
+        self.ticks += 1
+        if self.game_over:
+            self.game_over_ticks -= 1
+            if self.game_over_ticks <= 0:
+                self.running = False
+            return
+        self.update()
+        self.check_collisions()
+        self.count_allocations()
 
-            # Check if player collides with enemies
-            if pygame.sprite.spritecollide(self.player, self.enemies, False):
-                self.game_over = True
+    def check_collisions(self):
+        if self.world is not None:
+            hits = self.world.collide()
+            self.score += 10 * hits
+            self.world.spawn_enemies(hits)
+            if self.profiler is not None:
+                self.profiler.lap("groupcollide")
+            collided = self.world.collides(self.player.rect)
+            if self.profiler is not None:
+                self.profiler.lap("spritecollide")
+            if collided:
                 self.display_game_over()
+            return
+
+        if self.grid is not None:
+            self.grid.build(self.enemies)
+
+        # Check for collisions between bullets and enemies
+        if self.grid is not None:
+            hits = self.grid.groupcollide(self.bullets, True, True)
+        else:
+            hits = pygame.sprite.groupcollide(self.bullets, self.enemies, True, True)
+        if hits:
+            for hit in hits:
+                self.score += 10
+                enemy = self.new_enemy()
+                if self.grid is not None:
+                    self.grid.insert(enemy)
+        if self.profiler is not None:
+            self.profiler.lap("groupcollide")
 
-            self.render()
+        # Check if player collides with enemies
+        if self.grid is not None:
+            collided = self.grid.spritecollide(self.player)
+        else:
+            collided = pygame.sprite.spritecollide(self.player, self.enemies, False)
+        if self.profiler is not None:
+            self.profiler.lap("spritecollide")
+        if collided:
+            self.game_over = True
+            self.display_game_over()
 
     def update(self):
         if not self.game_over:
+            if self.renderer is not None:
+                for sprite in self.all_sprites:
+                    sprite.previous = sprite.rect.topleft
             self.all_sprites.update()
+            if self.world is not None:
+                self.world.step()
+            if self.profiler is not None:
+                self.profiler.lap("update")
 
-    def render(self):
-        screen.fill(BLACK)
-        self.all_sprites.draw(screen)
-
-        # Display score
-        score_text = font.render(f"Score: {self.score}", True, WHITE)
-        screen.blit(score_text, (10, 10))
+    def entity_counts(self):
+        """Return (enemies, bullets) currently alive."""
+        if self.world is not None:
+            return self.world.enemy_count, self.world.bullet_count
+        return len(self.enemies), len(self.bullets)
 
+    def text_surfaces(self):
+        """Return the (surface, position) text overlays, re-rendering the score only when it changes."""
+        if self.score != self.score_text_value:
+            self.score_text = font.render(f"Score: {self.score}", True, WHITE)
+            self.score_text_value = self.score
+        texts = [(self.score_text, (10, 10))]
         if self.game_over:
-            game_over_text = font.render("GAME OVER", True, WHITE)
-            screen.blit(game_over_text, (WIDTH // 2 - 100, HEIGHT // 2))
+            texts.append((self.game_over_text, (WIDTH // 2 - 100, HEIGHT // 2)))
+        if self.profiler is not None and self.profiler.overlay:
+            texts.extend(self.profiler.overlay_surfaces())
+        return texts
 
-        pygame.display.flip()
+    def render(self, alpha=1.0):
+        """Draw the game with each sprite alpha of the way from its previous tick to its current one."""
+        moved = []
+        if alpha < 1.0:
+            for sprite in self.all_sprites:
+                if sprite.previous is None:
+                    continue
+                x, y = sprite.previous
+                rect = sprite.rect
+                dx, dy = rect.x - x, rect.y - y
+                if (dx or dy) and abs(dx) <= MAX_STEP and abs(dy) <= MAX_STEP:
+                    moved.append((rect, rect.topleft))
+                    rect.topleft = (x + round(dx * alpha), y + round(dy * alpha))
+        self.renderer.render(self)
+        for rect, position in moved:
+            rect.topleft = position
+        if self.profiler is not None:
+            self.profiler.lap("render")
+        self.renderer.present()
+        if self.profiler is not None:
+            self.profiler.lap("flip")
 
     def display_game_over(self):
-        time.sleep(2)
-        self.running = False
+        """Stop the simulation and keep GAME OVER on screen for GAME_OVER_TICKS before quitting."""
         self.game_over = True
+        self.game_over_ticks = GAME_OVER_TICKS
+
+def fast_forward(ticks, seed=0, broadphase=True, pooling=True, entities="sprites", enemies=5, profiler=None):
+    """Run ticks simulation steps headless on autopilot, as fast as possible.
+
+    A new round starts whenever the player dies. The same seed always
+    replays the same game. With a profiler, every tick is one profiled
+    frame. Returns (rounds, total score, seconds).
+    """
+    random.seed(seed)
+    game = Game(broadphase, pooling, None, entities, enemies, profiler)
+    rounds, score = 1, 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if game.game_over:
+            score += game.score
+            game = Game(broadphase, pooling, None, entities, enemies, profiler)
+            rounds += 1
+        if profiler is not None:
+            profiler.start_frame()
+        game.autopilot()
+        game.tick()
+        if profiler is not None:
+            profiler.end_frame(*game.entity_counts())
+    return rounds, score + game.score, time.perf_counter() - start
 
 # Main loop
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Space Shooter")
+    parser.add_argument("--renderer", choices=["full", "dirty"], default="full",
+                        help="redraw the whole screen, or only the regions that changed")
+    parser.add_argument("--entities", choices=["sprites", "arrays"], default="sprites",
+                        help="one pygame sprite per entity, or NumPy arrays (needs numpy)")
+    parser.add_argument("--enemies", type=int, default=5, help="enemies at the start of each round")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate --ticks steps on autopilot without rendering and report ticks/sec")
+    parser.add_argument("--ticks", type=int, default=100000)
+    parser.add_argument("--seed", type=int, help="seed random for a reproducible game")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each phase of every frame; F3 toggles the overlay")
+    parser.add_argument("--trace", help="write the per-frame trace to this .csv or .json file (implies --profile)")
+    parser.add_argument("--cprofile", metavar="PREFIX",
+                        help="cProfile every frame and keep the worst as PREFIX-frame<N>.prof (implies --profile)")
+    parser.add_argument("--worst", type=int, default=5, help="frames kept by --cprofile")
+    args = parser.parse_args()
+    profiler = None
+    if args.profile or args.trace or args.cprofile:
+        profiler = FrameProfiler(trace=bool(args.trace), worst=args.worst if args.cprofile else 0)
+    if args.headless:
+        rounds, score, seconds = fast_forward(args.ticks, args.seed or 0, entities=args.entities,
+                                             enemies=args.enemies, profiler=profiler)
+        print(f"Ticks: {args.ticks}, Rounds: {rounds}, Score: {score}, "
+              f"Seconds: {seconds:.2f}, Ticks/sec: {args.ticks / seconds:.0f}")
+    else:
+        if args.seed is not None:
+            random.seed(args.seed)
+        game = Game(renderer=args.renderer, entities=args.entities, enemies=args.enemies, profiler=profiler)
+        game.run()
+    if profiler is not None:
+        print("\n".join(profiler.summary()))
+        if args.trace:
+            profiler.write_trace(args.trace)
+        if args.cprofile:
+            for path in profiler.write_profiles(args.cprofile):
+                print(f"Wrote {path}")
     pygame.quit()
@@ -1,5 +1,52 @@
+import argparse
+import bisect
+import getpass
+import heapq
 import json
 import os
+import threading
+from array import array
+
+import shared
+import snapshot
+from autosave import Autosave
+from audit import AuditLog, format_event, format_time, parse_time
+from reorder import ReorderQueue, ReorderRules, format_cover
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+INVENTORY_FILE = 'inventory.json'
+
+class InventoryError(Exception):
+    """Base class for errors reported by the Inventory API."""
+
+class ItemExistsError(InventoryError):
+    pass
+
+class ItemNotFoundError(InventoryError, KeyError):
+    def __str__(self):
+        return str(self.args[0])
+
+class UserExistsError(InventoryError):
+    pass
+
+class UserNotFoundError(InventoryError, KeyError):
+    def __str__(self):
+        return str(self.args[0])
+
+class InvalidValueError(InventoryError, ValueError):
+    pass
+
+def check_quantity(quantity):
+    if quantity < 0:
+        raise InvalidValueError("Quantity cannot be negative.")
+
+def check_price(price):
+    if price < 0:
+        raise InvalidValueError("Price cannot be negative.")
 
 class Item:
     def __init__(self, name, category, quantity, price):
@@ -12,16 +59,12 @@ class Item:
         return f"Item: {self.name}, Category: {self.category}, Quantity: {self.quantity}, Price: ${self.price}"
 
     def update_quantity(self, quantity):
-        if quantity >= 0:
-            self.quantity = quantity
-        else:
-            print("Quantity cannot be negative.")
+        check_quantity(quantity)
+        self.quantity = quantity
     
     def update_price(self, price):
-        if price >= 0:
-            self.price = price
-        else:
-            print("Price cannot be negative.")
+        check_price(price)
+        self.price = price
     
     def to_dict(self):
         return {
@@ -31,6 +74,269 @@ class Item:
             "price": self.price
         }
 
+class ItemView(Item):
+    """An Item whose fields live in a row of a ColumnarItems store."""
+    __slots__ = ('store', 'name')
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+
+    @property
+    def category(self):
+        return self.store.categories[self.store.category_codes[self.store.index[self.name]]]
+
+    @property
+    def quantity(self):
+        return self.store.quantities[self.store.index[self.name]]
+
+    @quantity.setter
+    def quantity(self, quantity):
+        self.store.quantities[self.store.index[self.name]] = quantity
+
+    @property
+    def price(self):
+        return self.store.prices[self.store.index[self.name]]
+
+    @price.setter
+    def price(self, price):
+        self.store.prices[self.store.index[self.name]] = price
+
+class ColumnarItems:
+    """Dict-like item store keeping quantities and prices in typed columns.
+
+    Categories are dictionary-encoded as ints and names map to row numbers,
+    so an item costs a few bytes per column instead of a full Python object.
+    Lookups hand out ItemView objects. Deleting swaps the last row into the
+    hole so the columns stay dense. Queries run over the columns directly
+    and are vectorized with NumPy when it is installed.
+    """
+    def __init__(self):
+        self.names = []
+        self.index = {}
+        self.categories = []
+        self.category_index = {}
+        self.category_codes = array('i')
+        self.quantities = array('q')
+        self.prices = array('d')
+
+    def encode_category(self, category):
+        code = self.category_index.get(category)
+        if code is None:
+            code = self.category_index[category] = len(self.categories)
+            self.categories.append(category)
+        return code
+
+    def add(self, name, category, quantity, price):
+        row = self.index.get(name)
+        if row is None:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+            self.category_codes.append(self.encode_category(category))
+            self.quantities.append(quantity)
+            self.prices.append(price)
+        else:
+            self.category_codes[row] = self.encode_category(category)
+            self.quantities[row] = quantity
+            self.prices[row] = price
+
+    def __setitem__(self, name, item):
+        self.add(name, item.category, item.quantity, item.price)
+
+    def __getitem__(self, name):
+        if name not in self.index:
+            raise KeyError(name)
+        return ItemView(self, name)
+
+    def get(self, name, default=None):
+        return ItemView(self, name) if name in self.index else default
+
+    def __delitem__(self, name):
+        row = self.index.pop(name)
+        last = len(self.names) - 1
+        if row != last:
+            moved = self.names[last]
+            self.names[row] = moved
+            self.index[moved] = row
+            self.category_codes[row] = self.category_codes[last]
+            self.quantities[row] = self.quantities[last]
+            self.prices[row] = self.prices[last]
+        self.names.pop()
+        self.category_codes.pop()
+        self.quantities.pop()
+        self.prices.pop()
+
+    def pop(self, name, *default):
+        row = self.index.get(name)
+        if row is None:
+            if default:
+                return default[0]
+            raise KeyError(name)
+        item = Item(name, self.categories[self.category_codes[row]], self.quantities[row], self.prices[row])
+        del self[name]
+        return item
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __iter__(self):
+        return iter(list(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (ItemView(self, name) for name in list(self.names))
+
+    def items(self):
+        return ((name, ItemView(self, name)) for name in list(self.names))
+
+    def filter(self, category=None, min_price=None, max_price=None, min_quantity=None, max_quantity=None):
+        """Yield the names of items matching every given bound (inclusive)."""
+        if category is not None and category not in self.category_index:
+            return
+        code = self.category_index.get(category)
+        if np is not None:
+            mask = np.ones(len(self.names), dtype=bool)
+            prices = np.frombuffer(self.prices, dtype=np.float64)
+            quantities = np.frombuffer(self.quantities, dtype=np.int64)
+            if code is not None:
+                mask &= np.frombuffer(self.category_codes, dtype=np.int32) == code
+            if min_price is not None:
+                mask &= prices >= min_price
+            if max_price is not None:
+                mask &= prices <= max_price
+            if min_quantity is not None:
+                mask &= quantities >= min_quantity
+            if max_quantity is not None:
+                mask &= quantities <= max_quantity
+            rows = np.flatnonzero(mask).tolist()
+            del prices, quantities
+        else:
+            rows = [row for row in range(len(self.names))
+                    if (code is None or self.category_codes[row] == code)
+                    and (min_price is None or self.prices[row] >= min_price)
+                    and (max_price is None or self.prices[row] <= max_price)
+                    and (min_quantity is None or self.quantities[row] >= min_quantity)
+                    and (max_quantity is None or self.quantities[row] <= max_quantity)]
+        names = self.names
+        for row in rows:
+            yield names[row]
+
+    def row_values(self):
+        if np is not None:
+            return np.frombuffer(self.quantities, dtype=np.int64) * np.frombuffer(self.prices, dtype=np.float64)
+        return [q * p for q, p in zip(self.quantities, self.prices)]
+
+    def total_value(self):
+        values = self.row_values()
+        return float(values.sum()) if np is not None else float(sum(values))
+
+    def value_by_category(self):
+        values = self.row_values()
+        if np is not None:
+            codes = np.frombuffer(self.category_codes, dtype=np.int32)
+            totals = np.bincount(codes, weights=values, minlength=len(self.categories)).tolist()
+        else:
+            totals = [0.0] * len(self.categories)
+            for code, value in zip(self.category_codes, values):
+                totals[code] += value
+        return {category: total for category, total in zip(self.categories, totals)}
+
+    def top_by_value(self, n):
+        """Return (name, value) for the n items with the highest stock value."""
+        values = self.row_values()
+        if n <= 0:
+            return []
+        if np is not None:
+            if n < len(values):
+                rows = np.argpartition(values, -n)[-n:]
+            else:
+                rows = np.arange(len(values))
+            rows = rows[np.argsort(values[rows])[::-1]].tolist()
+            return [(self.names[row], float(values[row])) for row in rows]
+        rows = heapq.nlargest(n, range(len(values)), key=values.__getitem__)
+        return [(self.names[row], values[row]) for row in rows]
+
+class ItemIndex:
+    """Secondary indexes over items: by category, by sorted name and by price.
+
+    Built from (name, category, price) entries the first time a query needs
+    it; Inventory then keeps it current from add_item/update_item/delete_item,
+    so category, name-prefix and price-range lookups never scan every item.
+    """
+    def __init__(self, entries=()):
+        self.by_category = {}
+        self.names = []
+        self.prices = []
+        for name, category, price in entries:
+            self.by_category.setdefault(category, set()).add(name)
+            self.names.append(name)
+            self.prices.append((price, name))
+        self.names.sort()
+        self.prices.sort()
+
+    def add(self, name, category, price):
+        self.by_category.setdefault(category, set()).add(name)
+        bisect.insort(self.names, name)
+        bisect.insort(self.prices, (price, name))
+
+    def remove(self, name, category, price):
+        names = self.by_category.get(category)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self.by_category[category]
+        del self.names[bisect.bisect_left(self.names, name)]
+        del self.prices[bisect.bisect_left(self.prices, (price, name))]
+
+    def replace_many(self, removed, added):
+        """Apply a batch of (name, category, price) removals, then additions.
+
+        Filters and re-sorts each list once instead of shifting it per item.
+        """
+        for name, category, price in removed:
+            names = self.by_category.get(category)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.by_category[category]
+        if removed:
+            gone = {name for name, category, price in removed}
+            self.names = [name for name in self.names if name not in gone]
+            gone = {(price, name) for name, category, price in removed}
+            self.prices = [entry for entry in self.prices if entry not in gone]
+        for name, category, price in added:
+            self.by_category.setdefault(category, set()).add(name)
+            self.names.append(name)
+            self.prices.append((price, name))
+        self.names.sort()
+        self.prices.sort()
+
+    def reprice(self, name, old_price, new_price):
+        del self.prices[bisect.bisect_left(self.prices, (old_price, name))]
+        bisect.insort(self.prices, (new_price, name))
+
+    def category(self, category):
+        return iter(sorted(self.by_category.get(category, ())))
+
+    def prefix(self, prefix):
+        names = self.names
+        i = bisect.bisect_left(names, prefix)
+        while i < len(names) and names[i].startswith(prefix):
+            yield names[i]
+            i += 1
+
+    def price_range(self, min_price=None, max_price=None):
+        prices = self.prices
+        i = 0 if min_price is None else bisect.bisect_left(prices, (min_price,))
+        while i < len(prices) and (max_price is None or prices[i][0] <= max_price):
+            yield prices[i][1]
+            i += 1
+
 class User:
     def __init__(self, username, role):
         self.username = username
@@ -39,107 +345,643 @@ class User:
     def __str__(self):
         return f"User: {self.username}, Role: {self.role}"
 
+class Journal:
+    """Append-only log of inventory changes, one compact JSON record per line.
+
+    Records carry the full new state of an item or user (or a deletion), so
+    replaying them is idempotent. A line without its trailing newline is the
+    remains of a write interrupted by a crash and is discarded.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.sealed_path = path + '.1'
+        self.count = 0
+        self.unsynced = 0
+        self.repair(path)
+        self.file = open(path, 'a')
+
+    @staticmethod
+    def repair(path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb+') as file:
+            file.seek(0, os.SEEK_END)
+            size = file.tell()
+            if size == 0:
+                return
+            file.seek(size - 1)
+            if file.read(1) == b'\n':
+                return
+            file.seek(0)
+            data = file.read()
+            file.truncate(data.rfind(b'\n') + 1)
+
+    @staticmethod
+    def read(path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as file:
+            for line in file:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    break
+
+    def append(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        self.file.write(line)
+        self.file.flush()
+        self.count += 1
+        self.unsynced += len(line)
+
+    def append_many(self, records):
+        data = ''.join([json.dumps(record, separators=(',', ':')) + '\n' for record in records])
+        self.file.write(data)
+        self.file.flush()
+        self.count += len(records)
+        self.unsynced += len(data)
+
+    def sync(self):
+        """fsync the journal; returns the bytes appended since the last sync."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        written, self.unsynced = self.unsynced, 0
+        return written
+
+    def rotate(self):
+        """Seal the current journal for compaction and start an empty one."""
+        self.sync()
+        self.file.close()
+        os.replace(self.path, self.sealed_path)
+        self.file = open(self.path, 'a')
+        self.count = 0
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+def item_from_row(row):
+    name, _, category, quantity, price = row
+    return Item(name, category, quantity, price)
+
+def row_from_item(item):
+    return item.name, '', item.category, item.quantity, item.price
+
+def apply_record(items, users, record, item_factory=dict):
+    op = record['op']
+    if op == 'item':
+        items[record['name']] = item_factory(**{k: record[k] for k in ('name', 'category', 'quantity', 'price')})
+    elif op == 'del_item':
+        items.pop(record['name'], None)
+    elif op == 'user':
+        users[record['username']] = {'username': record['username'], 'role': record['role']}
+    elif op == 'del_user':
+        users.pop(record['username'], None)
+
+def read_snapshot(path):
+    """Read a JSON or binary snapshot as dicts of item and user dicts."""
+    items, users = {}, {}
+    if snapshot.is_snapshot(path):
+        source = snapshot.SnapshotFile(path)
+        try:
+            items = {name: {'name': name, 'category': category, 'quantity': quantity, 'price': price}
+                     for name, _, category, quantity, price in source.rows()}
+            users = {user['username']: user for user in source.meta['users']}
+        finally:
+            source.close()
+    elif os.path.exists(path):
+        with open(path, 'r') as file:
+            data = json.load(file)
+        items = {item['name']: item for item in data['items']}
+        users = {user['username']: user for user in data['users']}
+    return items, users
+
+def read_columnar(path):
+    """Read a JSON or binary snapshot straight into a ColumnarItems store and a dict of user dicts.
+
+    Rows go into the columns as they are read, so no dict per item is
+    built (binary) or kept once its row is stored (JSON).
+    """
+    items, users = ColumnarItems(), {}
+    if snapshot.is_snapshot(path):
+        source = snapshot.SnapshotFile(path)
+        try:
+            for name, _, category, quantity, price in source.rows():
+                items.add(name, category, quantity, price)
+            users = {user['username']: user for user in source.meta['users']}
+        finally:
+            source.close()
+    elif os.path.exists(path):
+        with open(path, 'r') as file:
+            data = json.load(file)
+        records = data.pop('items')
+        for position, item in enumerate(records):
+            items.add(item['name'], item['category'], item['quantity'], item['price'])
+            records[position] = None
+        users = {user['username']: user for user in data['users']}
+    return items, users
+
+def write_snapshot(path, items, users, indent=None, binary=False):
+    """Write a snapshot atomically: temp file, fsync, then rename over path."""
+    if binary:
+        rows = ((item['name'], '', item['category'], item['quantity'], item['price']) for item in items)
+        snapshot.write(path, 'cp', rows, {'users': list(users)})
+        return
+    data = {'items': list(items), 'users': list(users)}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        if indent is None:
+            json.dump(data, file, separators=(',', ':'))
+        else:
+            json.dump(data, file, indent=indent)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+def fold_journal(snapshot_path, journal_path):
+    """Compact a sealed journal into the snapshot it was written against."""
+    binary = snapshot_path.endswith('.snap') or snapshot.is_snapshot(snapshot_path)
+    items, users = read_snapshot(snapshot_path)
+    for record in Journal.read(journal_path):
+        apply_record(items, users, record)
+    write_snapshot(snapshot_path, items.values(), users.values(), binary=binary)
+    os.remove(journal_path)
+
 class Inventory:
-    def __init__(self):
-        self.items = {}
+    def __init__(self, path=INVENTORY_FILE, journal=False, compact_threshold=10000, columnar=False, shared_file=False,
+                 reorder=None, audit=None):
+        if shared_file and (journal or columnar):
+            raise InvalidValueError("A shared inventory cannot be journaled or columnar.")
+        self.path = path
+        self.journal_path = os.path.splitext(path)[0] + '.journal'
+        self.columnar = columnar
+        self.binary = path.endswith('.snap') or snapshot.is_snapshot(path)
+        self.items = ColumnarItems() if columnar else {}
+        self.index = None
         self.users = {}
-        self.load_inventory()
+        self.journal = None
+        self.compact_threshold = compact_threshold
+        self.compactor = None
+        self.store = shared.SharedStore(path) if shared_file else None
+        self.reorder = reorder if reorder is not None else ReorderQueue()
+        self.audit = None
+        self.autosave = None
+        self.autosave_journal = None
+        self.dirty = {'items': set(), 'users': set()}
+        self.dirty_lock = threading.Lock()
+        self.save_lock = threading.Lock()
+        self.loaded = self.load_inventory()
+        if journal:
+            self.journal = Journal(self.journal_path)
+        if audit is not None:
+            if isinstance(self.items, snapshot.SnapshotItems):
+                # Read quantities off the snapshot rows instead of materializing every item.
+                audit.start((row[0], row[3]) for row in self.items.rows())
+            else:
+                audit.start((item.name, item.quantity) for item in self.items.values())
+            self.audit = audit
 
     def add_item(self, name, category, quantity, price):
+        """Add a new item and return it; raises ItemExistsError or InvalidValueError."""
         if name in self.items:
-            print(f"Item {name} already exists. Use update functionality instead.")
-        else:
-            new_item = Item(name, category, quantity, price)
-            self.items[name] = new_item
-            print(f"Item {name} added successfully.")
+            raise ItemExistsError(f"Item {name} already exists. Use update functionality instead.")
+        check_quantity(quantity)
+        check_price(price)
+        new_item = Item(name, category, quantity, price)
+        self.items[name] = new_item
+        if self.index is not None:
+            self.index.add(name, category, price)
+        self.reorder.update(name, quantity, category)
+        self.audited([(name, None, quantity, 'add')])
+        self.log('item', new_item.to_dict())
+        return new_item
 
     def update_item(self, name, quantity=None, price=None):
+        """Change an item's quantity and/or price and return it.
+
+        Both values are validated before either is applied.
+        """
         if name not in self.items:
-            print(f"Item {name} does not exist.")
-        else:
-            item = self.items[name]
-            if quantity is not None:
-                item.update_quantity(quantity)
-            if price is not None:
-                item.update_price(price)
-            print(f"Item {name} updated successfully.")
+            raise ItemNotFoundError(f"Item {name} does not exist.")
+        if quantity is not None:
+            check_quantity(quantity)
+        if price is not None:
+            check_price(price)
+        item = self.items[name]
+        old_price = item.price
+        if quantity is not None:
+            if quantity != item.quantity:
+                self.audited([(name, item.quantity, quantity, 'update')])
+            self.stock_changed(name, item.quantity, quantity)
+            item.update_quantity(quantity)
+        if price is not None:
+            item.update_price(price)
+        if item.price != old_price and self.index is not None:
+            self.index.reprice(name, old_price, item.price)
+        self.log('item', item.to_dict())
+        return item
     
     def delete_item(self, name):
-        if name in self.items:
-            del self.items[name]
-            print(f"Item {name} deleted successfully.")
-        else:
-            print(f"Item {name} not found.")
+        """Remove an item and return a detached copy of it."""
+        if name not in self.items:
+            raise ItemNotFoundError(f"Item {name} not found.")
+        item = Item(**self.items[name].to_dict())
+        if self.index is not None:
+            self.index.remove(name, item.category, item.price)
+        self.reorder.discard(name)
+        del self.items[name]
+        self.audited([(name, item.quantity, None, 'delete')])
+        self.log('del_item', {'name': name})
+        return item
     
     def view_item(self, name):
-        if name in self.items:
-            print(self.items[name])
-        else:
-            print(f"Item {name} not found.")
+        if name not in self.items:
+            raise ItemNotFoundError(f"Item {name} not found.")
+        return self.items[name]
     
     def list_items(self):
-        if not self.items:
-            print("No items in inventory.")
-        else:
-            for item in self.items.values():
-                print(item)
+        return iter(self.items.values())
     
+    def item_index(self):
+        """Return the secondary index, building it on first use."""
+        if self.index is None:
+            if isinstance(self.items, snapshot.SnapshotItems):
+                entries = ((name, category, price) for name, _, category, _, price in self.items.rows())
+            else:
+                entries = ((item.name, item.category, item.price) for item in self.items.values())
+            self.index = ItemIndex(entries)
+        return self.index
+
+    def stock_changed(self, name, old_quantity, quantity):
+        """Feed a stock change to the reorder queue; drops count as units sold."""
+        if quantity < old_quantity:
+            self.reorder.record_sale(name, old_quantity - quantity, quantity)
+        else:
+            self.reorder.update(name, quantity)
+
+    def reorder_queue(self):
+        """Return the reorder queue, loading current stock into it on first use."""
+        if not self.reorder.loaded:
+            self.reorder.load((item.name, item.quantity, item.category) for item in self.items.values())
+        return self.reorder
+
+    def most_urgent(self, k=10):
+        """Return up to k (item, days of cover) pairs, fewest days of cover first."""
+        return [(self.items[name], days) for name, days in self.reorder_queue().most_urgent(k)]
+
+    def low_stock(self):
+        """Return (item, threshold, days of cover) for items at or below their reorder threshold."""
+        return [(self.items[name], threshold, days) for name, _, threshold, days in self.reorder_queue().low_stock()]
+
+    def audited(self, changes):
+        """Record (name, old quantity, new quantity or None, reason) stock changes in the audit log."""
+        if self.audit is not None:
+            self.audit.record_many(changes)
+
+    def stock_at(self, when):
+        """Return {name: quantity} as of timestamp when, rebuilt from the audit log."""
+        if self.audit is None:
+            raise InvalidValueError("Stock auditing is off; start with --audit.")
+        try:
+            return self.audit.stock_at(when)
+        except ValueError as e:
+            raise InvalidValueError(str(e))
+
+    def stock_history(self, name, since=None, until=None):
+        """Return the audit events of one item between timestamps since and until."""
+        if self.audit is None:
+            raise InvalidValueError("Stock auditing is off; start with --audit.")
+        return self.audit.history(name, since, until)
+
+    def filter_items(self, category=None, min_price=None, max_price=None, min_quantity=None, max_quantity=None):
+        """Yield items matching every given bound (inclusive), scanning the columns when columnar."""
+        if isinstance(self.items, ColumnarItems):
+            return (self.items[name] for name in self.items.filter(category, min_price, max_price, min_quantity,
+                                                                   max_quantity))
+        return (item for item in self.items.values()
+                if (category is None or item.category == category)
+                and (min_price is None or item.price >= min_price)
+                and (max_price is None or item.price <= max_price)
+                and (min_quantity is None or item.quantity >= min_quantity)
+                and (max_quantity is None or item.quantity <= max_quantity))
+
+    def total_value(self):
+        """Return the stock value, quantity times price, summed over every item."""
+        if isinstance(self.items, ColumnarItems):
+            return self.items.total_value()
+        return sum(item.quantity * item.price for item in self.items.values())
+
+    def value_by_category(self):
+        if isinstance(self.items, ColumnarItems):
+            return self.items.value_by_category()
+        totals = {}
+        for item in self.items.values():
+            totals[item.category] = totals.get(item.category, 0.0) + item.quantity * item.price
+        return totals
+
+    def top_by_value(self, n):
+        """Return (name, value) for the n items with the highest stock value."""
+        if isinstance(self.items, ColumnarItems):
+            return self.items.top_by_value(n)
+        return [(name, value) for value, name in heapq.nlargest(
+            n, ((item.quantity * item.price, item.name) for item in self.items.values()))]
+
+    def items_in_category(self, category):
+        return (self.items[name] for name in self.item_index().category(category))
+
+    def items_with_prefix(self, prefix):
+        return (self.items[name] for name in self.item_index().prefix(prefix))
+
+    def items_in_price_range(self, min_price=None, max_price=None):
+        return (self.items[name] for name in self.item_index().price_range(min_price, max_price))
+
+    def search(self, category=None, prefix=None, min_price=None, max_price=None):
+        """Yield items matching every given criterion, driven by one index."""
+        if prefix is not None:
+            items = self.items_with_prefix(prefix)
+        elif category is not None:
+            items = self.items_in_category(category)
+        else:
+            items = self.items_in_price_range(min_price, max_price)
+        for item in items:
+            if category is not None and item.category != category:
+                continue
+            if min_price is not None and item.price < min_price:
+                continue
+            if max_price is not None and item.price > max_price:
+                continue
+            yield item
+
     def add_user(self, username, role):
         if username in self.users:
-            print(f"User {username} already exists.")
-        else:
-            new_user = User(username, role)
-            self.users[username] = new_user
-            print(f"User {username} added successfully.")
+            raise UserExistsError(f"User {username} already exists.")
+        new_user = User(username, role)
+        self.users[username] = new_user
+        self.log('user', new_user.__dict__)
+        return new_user
     
     def view_user(self, username):
-        if username in self.users:
-            print(self.users[username])
-        else:
-            print(f"User {username} not found.")
+        if username not in self.users:
+            raise UserNotFoundError(f"User {username} not found.")
+        return self.users[username]
     
     def delete_user(self, username):
-        if username in self.users:
-            del self.users[username]
-            print(f"User {username} deleted successfully.")
-        else:
-            print(f"User {username} not found.")
+        if username not in self.users:
+            raise UserNotFoundError(f"User {username} not found.")
+        user = self.users.pop(username)
+        self.log('del_user', {'username': username})
+        return user
     
+    def log(self, op, data):
+        section, key = ('items', data['name']) if op in ('item', 'del_item') else ('users', data['username'])
+        if self.store is not None:
+            self.store.mark(section, key)
+        if self.autosave is not None:
+            self.mark_dirty(section, (key,))
+        if self.journal is None:
+            return
+        self.journal.append({'op': op, **data})
+        if self.journal.count >= self.compact_threshold:
+            self.compact()
+
+    def upsert_items(self, rows):
+        """Insert or overwrite a batch of (name, category, quantity, price) rows.
+
+        Does no validation or printing and journals the batch with a single
+        write. Returns (inserted, updated) counts.
+        """
+        inserted = updated = 0
+        records = []
+        removed = []
+        added = {}
+        changes = []
+        for name, category, quantity, price in rows:
+            item = self.items.get(name)
+            if item is None:
+                inserted += 1
+            else:
+                if name not in added:
+                    removed.append((name, item.category, item.price))
+                updated += 1
+            if item is None or item.quantity != quantity:
+                changes.append((name, None if item is None else item.quantity, quantity, 'upsert'))
+            self.items[name] = Item(name, category, quantity, price)
+            added[name] = (name, category, price)
+            records.append({'op': 'item', 'name': name, 'category': category, 'quantity': quantity, 'price': price})
+            if self.store is not None:
+                self.store.mark('items', name)
+        if self.index is not None:
+            self.index.replace_many(removed, list(added.values()))
+        for name, category, price in added.values():
+            self.reorder.update(name, self.items[name].quantity, category)
+        self.audited(changes)
+        if self.autosave is not None:
+            self.mark_dirty('items', added)
+        if self.journal is not None and records:
+            self.journal.append_many(records)
+            if self.journal.count >= self.compact_threshold:
+                self.compact()
+        return inserted, updated
+
+    def compact(self, wait=False):
+        """Fold the journal into the snapshot on a background thread."""
+        if self.compactor is not None and self.compactor.is_alive():
+            if wait:
+                self.compactor.join()
+            return
+        if not os.path.exists(self.journal.sealed_path):
+            with self.save_lock:
+                self.journal.rotate()
+        self.compactor = threading.Thread(target=fold_journal, args=(self.path, self.journal.sealed_path), daemon=True)
+        self.compactor.start()
+        if wait:
+            self.compactor.join()
+
+    def mark_dirty(self, section, keys):
+        """Note records changed since the last flush and tell the autosave how many."""
+        with self.dirty_lock:
+            before = len(self.dirty[section])
+            self.dirty[section].update(keys)
+            added = len(self.dirty[section]) - before
+        self.autosave.note(added)
+
+    def start_autosave(self, interval=30.0, threshold=500):
+        """Flush changes on a background thread every interval seconds or threshold changed records."""
+        if self.store is not None:
+            raise InvalidValueError("A shared inventory syncs on every menu action and has no autosave.")
+        self.autosave = Autosave(self.flush_dirty, interval, threshold)
+        return self.autosave
+
+    def flush_dirty(self):
+        """Make the changes since the last flush durable; returns the bytes written.
+
+        A journaled inventory already holds every change in its journal and
+        only needs an fsync. Otherwise the items and users changed since
+        the last flush are appended to the journal, which load_inventory
+        replays over the snapshot; once it reaches compact_threshold records
+        it is folded into the snapshot (written by temp file and rename).
+        """
+        with self.save_lock:
+            with self.dirty_lock:
+                dirty, self.dirty = self.dirty, {'items': set(), 'users': set()}
+            if self.journal is not None:
+                return self.journal.sync()
+            records = []
+            for name in dirty['items']:
+                item = self.items.get(name)
+                records.append({'op': 'del_item', 'name': name} if item is None else {'op': 'item', **item.to_dict()})
+            for username in dirty['users']:
+                user = self.users.get(username)
+                records.append({'op': 'del_user', 'username': username} if user is None
+                               else {'op': 'user', **user.__dict__})
+            if not records:
+                return 0
+            if self.autosave_journal is None:
+                self.autosave_journal = Journal(self.journal_path)
+            self.autosave_journal.append_many(records)
+            written = self.autosave_journal.sync()
+            if self.autosave_journal.count >= self.compact_threshold:
+                if not os.path.exists(self.autosave_journal.sealed_path):
+                    self.autosave_journal.rotate()
+                fold_journal(self.path, self.autosave_journal.sealed_path)
+            return written
+
+    def close(self):
+        """Stop any autosave, wait for any running compaction and close the journal."""
+        if self.autosave is not None:
+            self.autosave.stop()
+        if self.compactor is not None:
+            self.compactor.join()
+        with self.save_lock:
+            for journal in (self.journal, self.autosave_journal):
+                if journal is not None:
+                    journal.close()
+            self.journal = self.autosave_journal = None
+        if self.audit is not None:
+            self.audit.close()
+            self.audit = None
+
+    def shared_record(self, section, key):
+        """Return this process's fields for a changed record, for SharedStore.sync."""
+        if section == 'items':
+            item = self.items.get(key)
+            return None if item is None else {'category': item.category, 'quantity': item.quantity, 'price': item.price}
+        user = self.users.get(key)
+        return None if user is None else {'role': user.role}
+
+    def apply_shared(self, changes):
+        """Bring items and users up to date with records changed in the shared file."""
+        if changes['items']:
+            self.index = None
+        audited = []
+        for name, record in changes['items'].items():
+            if record is None:
+                item = self.items.pop(name, None)
+                self.reorder.discard(name)
+                if item is not None:
+                    audited.append((name, item.quantity, None, 'sync'))
+                continue
+            item = self.items.get(name)
+            if item is None:
+                self.items[name] = Item(name, record['category'], record['quantity'], record['price'])
+                self.reorder.update(name, record['quantity'], record['category'])
+                audited.append((name, None, record['quantity'], 'sync'))
+            else:
+                if item.quantity != record['quantity']:
+                    audited.append((name, item.quantity, record['quantity'], 'sync'))
+                self.stock_changed(name, item.quantity, record['quantity'])
+                item.category, item.quantity, item.price = record['category'], record['quantity'], record['price']
+        for username, record in changes['users'].items():
+            if record is None:
+                self.users.pop(username, None)
+            else:
+                self.users[username] = User(username, record['role'])
+
+    def sync(self):
+        """Exchange changes with the shared inventory file (shared_file mode only)."""
+        self.apply_shared(self.store.sync(self.shared_record))
+
     def load_inventory(self):
-        if os.path.exists('inventory.json'):
-            with open('inventory.json', 'r') as file:
-                data = json.load(file)
-                self.items = {item['name']: Item(**item) for item in data['items']}
-                self.users = {user['username']: User(**user) for user in data['users']}
-                print("Inventory loaded successfully.")
+        """Load the snapshot and replay any journal; returns False if there was nothing to load.
+
+        A binary snapshot is memory-mapped rather than read: items are
+        materialized as they are accessed, and the secondary index waits
+        for the first query that needs it.
+        """
+        if self.store is not None:
+            self.apply_shared(self.store.load())
+            return self.store.version > 0
+        sealed_path = self.journal_path + '.1'
+        if not any(os.path.exists(p) for p in (self.path, sealed_path, self.journal_path)):
+            return False
+        self.index = None
+        if self.binary and not self.columnar and os.path.exists(self.path):
+            source = snapshot.SnapshotFile(self.path)
+            items = snapshot.SnapshotItems(source, item_from_row, row_from_item)
+            users = {user['username']: user for user in source.meta['users']}
+            item_factory = Item
+        elif self.columnar:
+            items, users = read_columnar(self.path)
+            item_factory = Item
         else:
-            print("No existing inventory found. Starting fresh.")
+            items, users = read_snapshot(self.path)
+            item_factory = dict
+        for path in (sealed_path, self.journal_path):
+            for record in Journal.read(path):
+                apply_record(items, users, record, item_factory)
+        if isinstance(items, (snapshot.SnapshotItems, ColumnarItems)):
+            self.items = items
+        else:
+            self.items = {name: Item(**item) for name, item in items.items()}
+        self.users = {username: User(**user) for username, user in users.items()}
+        return True
     
     def save_inventory(self):
-        data = {
-            'items': [item.to_dict() for item in self.items.values()],
-            'users': [user.__dict__ for user in self.users.values()]
-        }
-        with open('inventory.json', 'w') as file:
-            json.dump(data, file, indent=4)
-        print("Inventory saved successfully.")
+        if self.store is not None:
+            self.sync()
+            return
+        with self.save_lock:
+            with self.dirty_lock:
+                self.dirty = {'items': set(), 'users': set()}
+            if self.journal is not None:
+                self.journal.sync()
+                return
+            users = [user.__dict__ for user in self.users.values()]
+            if isinstance(self.items, snapshot.SnapshotItems):
+                snapshot.write(self.path, 'cp', self.items.rows(), {'users': users})
+            else:
+                write_snapshot(self.path, (item.to_dict() for item in self.items.values()), users,
+                               indent=4, binary=self.binary)
+            if self.autosave_journal is not None:
+                self.autosave_journal.close()
+                self.autosave_journal = None
+            for path in (self.journal_path + '.1', self.journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
     
     def login(self, username):
-        if username in self.users:
-            print(f"Welcome, {username}!")
-        else:
-            print(f"User {username} not found.")
-    
-    def logout(self):
-        print("Logged out successfully.")
+        return self.view_user(username)
 
 class InventorySystem:
-    def __init__(self):
-        self.inventory = Inventory()
+    """Interactive menu on top of Inventory; all printing happens here."""
+    def __init__(self, path=INVENTORY_FILE, journal=False, columnar=False, shared_file=False, reorder=None,
+                 audit=None, inventory=None):
+        if inventory is None:
+            inventory = Inventory(path, journal=journal, columnar=columnar, shared_file=shared_file, reorder=reorder,
+                                  audit=audit)
+        self.inventory = inventory
+        if self.inventory.loaded:
+            print("Inventory loaded successfully.")
+        else:
+            print("No existing inventory found. Starting fresh.")
         self.logged_in_user = None
 
     def main_menu(self):
         while True:
+            if self.inventory.store is not None:
+                self.inventory.sync()
             if self.logged_in_user:
                 print(f"\nWelcome {self.logged_in_user.username} ({self.logged_in_user.role})")
             else:
@@ -150,35 +992,58 @@ class InventorySystem:
             print("3. Update Item")
             print("4. Delete Item")
             print("5. View Item")
-            print("6. Manage Users")
-            print("7. Save Inventory")
-            print("8. Logout")
-            print("9. Exit")
+            print("6. Search Items")
+            print("7. Low Stock")
+            print("8. Stock Value")
+            print("9. Stock Audit")
+            print("10. Manage Users")
+            print("11. Save Inventory")
+            print("12. Logout")
+            print("13. Exit")
 
             choice = input("Choose an option: ")
-            if choice == '1':
-                self.view_items()
-            elif choice == '2':
-                self.add_item()
-            elif choice == '3':
-                self.update_item()
-            elif choice == '4':
-                self.delete_item()
-            elif choice == '5':
-                self.view_single_item()
-            elif choice == '6':
-                self.manage_users()
-            elif choice == '7':
-                self.inventory.save_inventory()
-            elif choice == '8':
-                self.logout()
-            elif choice == '9':
-                self.exit_system()
-            else:
-                print("Invalid choice. Please try again.")
+            try:
+                self.run_choice(choice)
+            except InventoryError as e:
+                print(e)
+
+    def run_choice(self, choice):
+        if choice == '1':
+            self.view_items()
+        elif choice == '2':
+            self.add_item()
+        elif choice == '3':
+            self.update_item()
+        elif choice == '4':
+            self.delete_item()
+        elif choice == '5':
+            self.view_single_item()
+        elif choice == '6':
+            self.search_items()
+        elif choice == '7':
+            self.low_stock()
+        elif choice == '8':
+            self.stock_value()
+        elif choice == '9':
+            self.stock_audit()
+        elif choice == '10':
+            self.manage_users()
+        elif choice == '11':
+            self.save_inventory()
+        elif choice == '12':
+            self.logout()
+        elif choice == '13':
+            self.exit_system()
+        else:
+            print("Invalid choice. Please try again.")
     
     def view_items(self):
-        self.inventory.list_items()
+        found = False
+        for item in self.inventory.list_items():
+            print(item)
+            found = True
+        if not found:
+            print("No items in inventory.")
     
     def add_item(self):
         name = input("Enter item name: ")
@@ -186,6 +1051,7 @@ class InventorySystem:
         quantity = int(input("Enter item quantity: "))
         price = float(input("Enter item price: "))
         self.inventory.add_item(name, category, quantity, price)
+        print(f"Item {name} added successfully.")
     
     def update_item(self):
         name = input("Enter item name to update: ")
@@ -194,15 +1060,68 @@ class InventorySystem:
         quantity = int(quantity) if quantity else None
         price = float(price) if price else None
         self.inventory.update_item(name, quantity, price)
+        print(f"Item {name} updated successfully.")
     
     def delete_item(self):
         name = input("Enter item name to delete: ")
         self.inventory.delete_item(name)
+        print(f"Item {name} deleted successfully.")
     
     def view_single_item(self):
         name = input("Enter item name to view: ")
-        self.inventory.view_item(name)
+        print(self.inventory.view_item(name))
+    
+    def search_items(self):
+        category = input("Category (leave blank for any): ") or None
+        prefix = input("Name starts with (leave blank for any): ") or None
+        min_price = input("Minimum price (leave blank for none): ")
+        max_price = input("Maximum price (leave blank for none): ")
+        min_price = float(min_price) if min_price else None
+        max_price = float(max_price) if max_price else None
+        found = False
+        for item in self.inventory.search(category, prefix, min_price, max_price):
+            print(item)
+            found = True
+        if not found:
+            print("No matching items found.")
     
+    def low_stock(self):
+        low_stock = self.inventory.low_stock()
+        for item, threshold, days in low_stock:
+            print(f"{item} (reorder at {threshold}, {format_cover(days)})")
+        if not low_stock:
+            print("No items at or below their reorder threshold.")
+        print("Most urgent:")
+        for item, days in self.inventory.most_urgent(10):
+            print(f"  {item.name}: {item.quantity} left, {format_cover(days)}")
+
+    def stock_value(self):
+        print(f"Total stock value: ${self.inventory.total_value():.2f}")
+        for category, value in sorted(self.inventory.value_by_category().items()):
+            print(f"  {category}: ${value:.2f}")
+        print("Highest value items:")
+        for name, value in self.inventory.top_by_value(10):
+            print(f"  {name}: ${value:.2f}")
+
+    def stock_audit(self):
+        name = input("Item name (leave blank for every item): ")
+        when = input("As of (YYYY-MM-DD HH:MM, leave blank for now): ")
+        when = parse_time(when) if when else None
+        if name:
+            for event in self.inventory.stock_history(name, until=when):
+                print(format_event(event))
+        if when is None:
+            return
+        stock = self.inventory.stock_at(when)
+        if name:
+            print(f"{name} as of {format_time(when)}: {stock.get(name, 'not in inventory')}")
+            return
+        print(f"Stock as of {format_time(when)}:")
+        for name, quantity in sorted(stock.items()):
+            print(f"  {name}: {quantity}")
+        if not stock:
+            print("  No items.")
+
     def manage_users(self):
         print("\nManage Users:")
         print("1. Add User")
@@ -226,28 +1145,69 @@ class InventorySystem:
         username = input("Enter username: ")
         role = input("Enter role (Admin/User): ")
         self.inventory.add_user(username, role)
+        print(f"User {username} added successfully.")
     
     def view_user(self):
         username = input("Enter username to view: ")
-        self.inventory.view_user(username)
+        print(self.inventory.view_user(username))
     
     def delete_user(self):
         username = input("Enter username to delete: ")
         self.inventory.delete_user(username)
+        print(f"User {username} deleted successfully.")
     
     def logout(self):
         print("Logging out...")
         self.logged_in_user = None
         self.main_menu()
     
+    def save_inventory(self):
+        self.inventory.save_inventory()
+        print("Inventory saved successfully.")
+    
     def exit_system(self):
         print("Saving data and exiting the system...")
-        self.inventory.save_inventory()
+        self.save_inventory()
+        self.inventory.close()
+        if self.inventory.autosave is not None:
+            print(self.inventory.autosave.summary())
         print("Goodbye!")
         exit()
 
 def main():
-    system = InventorySystem()
+    parser = argparse.ArgumentParser(description="Inventory management system")
+    parser.add_argument('--inventory', default=INVENTORY_FILE,
+                        help="inventory file; a binary snapshot (see snapshot.py) or a path ending in .snap loads lazily")
+    parser.add_argument('--shared', nargs='?', const=shared.SHARED_FILE, metavar='PATH',
+                        help="work on the inventory file shared with pos.py registers (default: %(const)s)")
+    parser.add_argument('--journal', action='store_true',
+                        help="append changes to inventory.journal instead of rewriting inventory.json")
+    parser.add_argument('--columnar', action='store_true',
+                        help="keep items in compact array columns instead of one object per item")
+    parser.add_argument('--reorder-rules', help="JSON file of reorder thresholds by category and item name")
+    parser.add_argument('--audit', nargs='?', const=True, metavar='DIR',
+                        help="log every stock change to an audit directory (default: <inventory>.audit)")
+    parser.add_argument('--actor', default=getpass.getuser(),
+                        help="name recorded in the audit log (default: %(default)s)")
+    parser.add_argument('--autosave', type=float, metavar='SECONDS',
+                        help="flush changed records in the background every SECONDS")
+    parser.add_argument('--autosave-changes', type=int, default=500, metavar='N',
+                        help="with --autosave, also flush as soon as N records have changed (default: %(default)s)")
+    args = parser.parse_args()
+    if args.autosave and args.shared:
+        parser.error("--autosave does not apply to --shared, which syncs on every menu action")
+    reorder = ReorderQueue(ReorderRules.load(args.reorder_rules)) if args.reorder_rules else None
+    path = args.shared or args.inventory
+    audit = None
+    if args.audit:
+        audit = AuditLog(os.path.splitext(path)[0] + '.audit' if args.audit is True else args.audit, args.actor)
+    if args.shared:
+        system = InventorySystem(args.shared, shared_file=True, reorder=reorder, audit=audit)
+    else:
+        system = InventorySystem(args.inventory, journal=args.journal, columnar=args.columnar, reorder=reorder,
+                                 audit=audit)
+    if args.autosave:
+        system.inventory.start_autosave(args.autosave, args.autosave_changes)
     system.main_menu()
 
 if __name__ == '__main__':
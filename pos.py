@@ -1,26 +1,90 @@
+import argparse
+import bisect
+import getpass
+import hashlib
+import heapq
+import itertools
 import json
+import mmap
 import os
+import sqlite3
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import ExitStack
 from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+
+import shared
+import snapshot
+from autosave import Autosave
+from audit import AuditLog, format_event, format_time, parse_time
+from reorder import ReorderQueue, ReorderRules, format_cover
+
+TAX_RATE = 0.1  # Assume 10% sales tax; the default rate of TaxRules
+RULE = "-" * 40 + "\n"
+
+class POSError(Exception):
+    """Base class for errors reported by the POS API."""
+
+class ItemExistsError(POSError):
+    pass
+
+class ItemNotFoundError(POSError, KeyError):
+    def __str__(self):
+        return str(self.args[0])
+
+class CustomerExistsError(POSError):
+    pass
+
+class CustomerNotFoundError(POSError, KeyError):
+    def __str__(self):
+        return str(self.args[0])
+
+class InvalidQuantityError(POSError, ValueError):
+    pass
+
+class OutOfStockError(POSError):
+    def __init__(self, message, item_ids=()):
+        super().__init__(message)
+        self.item_ids = list(item_ids)
+
+def to_cents(amount):
+    """Convert a dollar amount (float, str or Decimal) to integer cents, rounding half up."""
+    if isinstance(amount, (int, float)):
+        scaled = amount * 100
+        cents = round(scaled)
+        if abs(scaled - cents) < 1e-6:  # already a whole number of cents
+            return int(cents)
+    return int((Decimal(str(amount)) * 100).quantize(Decimal(1), ROUND_HALF_UP))
+
+def format_cents(cents):
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
 
 class Item:
-    def __init__(self, item_id, name, price, quantity):
+    def __init__(self, item_id, name, price, quantity, category=""):
         self.item_id = item_id
         self.name = name
         self.price = price
         self.quantity = quantity
+        self.category = category
     
     def update_quantity(self, quantity):
-        if quantity >= 0:
-            self.quantity = quantity
-        else:
-            print("Quantity cannot be negative.")
+        if quantity < 0:
+            raise InvalidQuantityError("Quantity cannot be negative.")
+        self.quantity = quantity
     
     def to_dict(self):
         return {
             "item_id": self.item_id,
             "name": self.name,
             "price": self.price,
-            "quantity": self.quantity
+            "quantity": self.quantity,
+            "category": self.category
         }
     
     def __str__(self):
@@ -36,146 +100,1467 @@ class Customer:
     def __str__(self):
         return f"Customer ID: {self.customer_id}, Name: {self.name}, Email: {self.email}, Phone: {self.phone}"
 
+class TaxRules:
+    """Sales-tax rates: per item ID first, then per category, then the default.
+
+    Rates are fractions (0.1 is 10%) kept as Decimals. A JSON rules file
+    looks like {"default": 0.1, "categories": {"food": 0.05}, "items": {"I1": 0}}.
+    """
+    def __init__(self, default=TAX_RATE, categories=None, items=None):
+        self.default = Decimal(str(default))
+        self.categories = {category: Decimal(str(rate)) for category, rate in (categories or {}).items()}
+        self.items = {item_id: Decimal(str(rate)) for item_id, rate in (items or {}).items()}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as file:
+            data = json.load(file)
+        return cls(data.get("default", TAX_RATE), data.get("categories"), data.get("items"))
+
+    def rate(self, item_id, category):
+        rate = self.items.get(item_id)
+        if rate is None:
+            rate = self.categories.get(category, self.default)
+        return rate
+
+class PricedItem:
+    """An item compiled for pricing: unit price in cents, tax rate in parts per
+    million, its rate label and receipt line prefix. key is the (name, price,
+    category) it was compiled from. lines memoizes line() per quantity."""
+    __slots__ = ("key", "unit_cents", "rate_ppm", "label", "prefix", "lines")
+    LINE_CACHE = 64  # quantities memoized per item
+
+    def __init__(self, key, unit_cents, rate_ppm, label, prefix):
+        self.key = key
+        self.unit_cents = unit_cents
+        self.rate_ppm = rate_ppm
+        self.label = label
+        self.prefix = prefix
+        self.lines = {}
+
+    def line(self, quantity):
+        """Return the (rate label, cents, tax cents, receipt text) of a line of quantity units."""
+        line = self.lines.get(quantity)
+        if line is None:
+            cents = self.unit_cents * quantity
+            line = (self.label, cents, (cents * self.rate_ppm + 500000) // 1000000,
+                    f"{self.prefix}{quantity}) - ${format_cents(cents)}\n")
+            if len(self.lines) < self.LINE_CACHE:
+                self.lines[quantity] = line
+        return line
+
+class Pricing:
+    """Prices transactions in integer cents and renders their receipts.
+
+    Each item is compiled once into a PricedItem cached by item ID; the
+    entry is rebuilt only when the item's name, price or category changes,
+    so the rule lookup and Decimal work happen once per item rather than
+    once per line, and each line's amounts and receipt text are memoized
+    per quantity. Tax is charged per line, rounded half up to the cent.
+    Reloaded transactions are re-priced with the current rules.
+    """
+    def __init__(self, rules=None):
+        self.rules = rules if rules is not None else TaxRules()
+        self.cache = {}
+        self.rates = {}  # Decimal rate -> (parts per million, label)
+
+    def compile(self, item):
+        rate = self.rules.rate(item.item_id, item.category)
+        compiled = self.rates.get(rate)
+        if compiled is None:
+            compiled = self.rates[rate] = (int(rate * 1000000), format((rate * 100).normalize(), "f"))
+        entry = PricedItem((item.name, item.price, item.category), to_cents(item.price), *compiled,
+                           f"{item.name} (x")
+        self.cache[item.item_id] = entry
+        return entry
+
+    def price(self, items):
+        """Return (lines, subtotal cents, tax cents by rate label) for a transaction's items."""
+        cache = self.cache
+        lines = []
+        subtotal = 0
+        taxes = {}
+        for item in items:
+            entry = cache.get(item.item_id)
+            if entry is None or entry.key != (item.name, item.price, item.category):
+                entry = self.compile(item)
+            line = entry.line(item.quantity)
+            lines.append(line)
+            subtotal += line[1]
+            taxes[line[0]] = taxes.get(line[0], 0) + line[2]
+        return lines, subtotal, taxes
+
+    def price_rows(self, rows):
+        """price() for (item_id, name, price, quantity, category) tuples, as kept by SaleRecord."""
+        cache = self.cache
+        lines = []
+        subtotal = 0
+        taxes = {}
+        for item_id, name, price, quantity, category in rows:
+            entry = cache.get(item_id)
+            if entry is None or entry.key != (name, price, category):
+                entry = self.compile(Item(item_id, name, price, quantity, category))
+            line = entry.line(quantity)
+            lines.append(line)
+            subtotal += line[1]
+            taxes[line[0]] = taxes.get(line[0], 0) + line[2]
+        return lines, subtotal, taxes
+
+    def render_receipt(self, transaction):
+        """Build the receipt in one pass from the transaction's memoized line texts."""
+        taxes = "".join(f"Tax ({label}%): ${format_cents(tax)}\n" for label, tax in transaction.taxes.items())
+        return (f"Receipt for Transaction ID: {transaction.transaction_id}\n"
+                f"Customer: {transaction.customer.name} | {transaction.customer.email}\n"
+                f"Date: {transaction.date.strftime('%Y-%m-%d %H:%M:%S')}\n{RULE}"
+                + "".join([line[3] for line in transaction.lines])
+                + f"{RULE}Subtotal: ${format_cents(transaction.subtotal_cents)}\n{taxes}"
+                f"Total: ${format_cents(transaction.final_cents)}\n{RULE}")
+
+DEFAULT_PRICING = Pricing()
+
 class Transaction:
-    def __init__(self, transaction_id, customer, items):
+    def __init__(self, transaction_id, customer, items, date=None, pricing=None):
         self.transaction_id = transaction_id
         self.customer = customer
         self.items = items
-        self.date = datetime.now()
+        self.date = date or datetime.now()
+        self.pricing = pricing if pricing is not None else DEFAULT_PRICING
+        self.lines, self.subtotal_cents, self.taxes = self.pricing.price(items)
+        self.tax_cents = sum(self.taxes.values())
+        self.final_cents = self.subtotal_cents + self.tax_cents
         self.total_amount = self.calculate_total()
         self.tax = self.calculate_tax()
-        self.final_amount = self.total_amount + self.tax
+        self.final_amount = self.final_cents / 100
+        self.receipt = None
     
     def calculate_total(self):
-        return sum(item.price * item.quantity for item in self.items)
+        return self.subtotal_cents / 100
     
     def calculate_tax(self):
-        return self.total_amount * 0.1  # Assume 10% sales tax
+        return self.tax_cents / 100
     
     def generate_receipt(self):
-        receipt = f"Receipt for Transaction ID: {self.transaction_id}\n"
-        receipt += f"Customer: {self.customer.name} | {self.customer.email}\n"
-        receipt += f"Date: {self.date.strftime('%Y-%m-%d %H:%M:%S')}\n"
-        receipt += "-" * 40 + "\n"
-        for item in self.items:
-            receipt += f"{item.name} (x{item.quantity}) - ${item.price * item.quantity}\n"
-        receipt += "-" * 40 + "\n"
-        receipt += f"Subtotal: ${self.total_amount}\n"
-        receipt += f"Tax (10%): ${self.tax}\n"
-        receipt += f"Total: ${self.final_amount}\n"
-        receipt += "-" * 40 + "\n"
-        return receipt
+        if self.receipt is None:
+            self.receipt = self.pricing.render_receipt(self)
+        return self.receipt
 
-class POS:
+class SaleResult:
+    """Outcome of process_sale: the recorded transaction, any skipped item IDs and
+    the IDs of items the sale took to or below their reorder threshold."""
+    def __init__(self, transaction, rejected, low_stock=()):
+        self.transaction = transaction
+        self.rejected = rejected
+        self.low_stock = list(low_stock)
+
+class SaleRecord:
+    """A sale made by process_sales_batch: a Transaction without the per-line Item copies.
+
+    sold holds (item_id, name, price, quantity, category) tuples and rejected
+    the item IDs the cart could not get. It has the attributes storage
+    engines, reports and the rollup read from a Transaction; items and the
+    receipt are only built when asked for.
+    """
+    __slots__ = ("transaction_id", "customer", "sold", "rejected", "date", "pricing", "lines", "subtotal_cents",
+                 "taxes", "tax_cents", "final_cents", "receipt")
+
+    def __init__(self, transaction_id, customer, sold, rejected, date, pricing):
+        self.transaction_id = transaction_id
+        self.customer = customer
+        self.sold = sold
+        self.rejected = rejected
+        self.date = date
+        self.pricing = pricing
+        self.lines, self.subtotal_cents, self.taxes = pricing.price_rows(sold)
+        self.tax_cents = sum(self.taxes.values())
+        self.final_cents = self.subtotal_cents + self.tax_cents
+        self.receipt = None
+
+    @property
+    def items(self):
+        return [Item(*row) for row in self.sold]
+
+    @property
+    def total_amount(self):
+        return self.subtotal_cents / 100
+
+    @property
+    def tax(self):
+        return self.tax_cents / 100
+
+    @property
+    def final_amount(self):
+        return self.final_cents / 100
+
+    def generate_receipt(self):
+        if self.receipt is None:
+            self.receipt = self.pricing.render_receipt(self)
+        return self.receipt
+
+class BatchResult:
+    """Outcome of process_sales_batch: per sale, in order, its SaleRecord or the
+    POSError that failed it, and the IDs of items the batch took to or below
+    their reorder threshold."""
+    __slots__ = ("results", "low_stock")
+
+    def __init__(self, results, low_stock=()):
+        self.results = results
+        self.low_stock = list(low_stock)
+
+    @property
+    def records(self):
+        return [result for result in self.results if isinstance(result, SaleRecord)]
+
+    @property
+    def errors(self):
+        return [result for result in self.results if isinstance(result, POSError)]
+
+class SalesRollup:
+    """Running revenue, tax and unit totals per day, customer and item.
+
+    Each bucket is a [revenue cents, tax cents, units] list updated by
+    add() as sales are recorded, so summaries never rescan the transaction
+    history.
+    """
     def __init__(self):
+        self.lock = threading.Lock()
+        self.by_day = {}
+        self.by_customer = {}
+        self.by_item = {}
+
+    @staticmethod
+    def bump(buckets, key, revenue, tax, units):
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = [revenue, tax, units]
+        else:
+            bucket[0] += revenue
+            bucket[1] += tax
+            bucket[2] += units
+
+    def add(self, transaction):
+        units = sum(item.quantity for item in transaction.items)
+        with self.lock:
+            self.bump(self.by_day, transaction.date.date().isoformat(),
+                      transaction.subtotal_cents, transaction.tax_cents, units)
+            self.bump(self.by_customer, transaction.customer.customer_id,
+                      transaction.subtotal_cents, transaction.tax_cents, units)
+            for item, (_, cents, tax, _) in zip(transaction.items, transaction.lines):
+                self.bump(self.by_item, item.item_id, cents, tax, item.quantity)
+
+    def add_records(self, records):
+        """add() for a batch of SaleRecords, under one lock and without building items."""
+        with self.lock:
+            for record in records:
+                units = sum(row[3] for row in record.sold)
+                self.bump(self.by_day, record.date.date().isoformat(), record.subtotal_cents, record.tax_cents, units)
+                self.bump(self.by_customer, record.customer.customer_id, record.subtotal_cents, record.tax_cents,
+                          units)
+                for row, (_, cents, tax, _) in zip(record.sold, record.lines):
+                    self.bump(self.by_item, row[0], cents, tax, row[3])
+
+def customer_key(customer_id):
+    """Stable 64-bit hash of a customer ID, the sort key of the customer index."""
+    return int.from_bytes(hashlib.blake2b(customer_id.encode(), digest_size=8).digest(), "little")
+
+class IndexKeys:
+    """Sequence view of the hash column of a memory-mapped customer index, for bisect."""
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        return self.store.indexed
+
+    def __getitem__(self, position):
+        return self.store.index_entry(position)[0]
+
+class CustomerStore(Mapping):
+    """Customers in an append-only NDJSON file, loaded on demand through an LRU cache.
+
+    <path> holds one JSON customer per line; a customer is updated by
+    appending a newer line. <path>.idx is a memory-mapped table of
+    (ID hash, offset, length) records sorted by hash, behind a header that
+    records how much of the data file it covers. Opening the store maps
+    the index and scans only lines appended after the last flush(), so
+    startup does not depend on the number of customers. Lookups go
+    through a cache of at most cache_size Customer objects, least recently
+    used first out; hits, misses and evictions are counted. Records written
+    since the last flush() are indexed by the in-memory pending dict until
+    flush() merges them into the index file.
+    """
+    HEADER = struct.Struct("<4sIQQ")  # magic, version, records, data bytes covered
+    RECORD = struct.Struct("<QQI")  # ID hash, offset, length
+    MAGIC = b"PCIX"
+    VERSION = 1
+
+    def __init__(self, path, cache_size=10000):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+        self.lock = threading.RLock()
+        self.pending = {}  # customer_id -> (offset, length, superseded indexed offset or None)
+        self.repair(path)
+        self.data = open(path, "a+b")
+        self.size = self.data.seek(0, os.SEEK_END)
+        if not os.path.exists(self.index_path):
+            self.write_index([], 0, 0)
+        self.map_index()
+        self.keys = IndexKeys(self)
+        self.length = self.indexed
+        if self.covered < self.size:
+            self.scan_tail()
+
+    @staticmethod
+    def repair(path):
+        """Drop a torn last line left by a crash mid-append."""
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as file:
+            size = file.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            file.seek(max(0, size - 65536))
+            tail = file.read()
+            if tail.endswith(b"\n"):
+                return
+            file.seek(0)
+            data = file.read()
+            file.truncate(data.rfind(b"\n") + 1)
+
+    def map_index(self):
+        with open(self.index_path, "rb") as file:
+            self.index = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.indexed, self.covered = self.HEADER.unpack_from(self.index)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f"{self.index_path} is not a version {self.VERSION} customer index.")
+
+    def write_index(self, records, count, covered):
+        """Write count sorted (hash, offset, length) records atomically as the new index file."""
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "wb") as file:
+            file.write(self.HEADER.pack(self.MAGIC, self.VERSION, count, covered))
+            batch = []
+            for record in records:
+                batch.append(self.RECORD.pack(*record))
+                if len(batch) >= 65536:
+                    file.write(b"".join(batch))
+                    batch.clear()
+            file.write(b"".join(batch))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.index_path)
+
+    def index_entry(self, position):
+        return self.RECORD.unpack_from(self.index, self.HEADER.size + position * self.RECORD.size)
+
+    def read(self, offset, length):
+        return json.loads(os.pread(self.data.fileno(), length, offset))
+
+    def find_indexed(self, customer_id, key=None):
+        """Return the (offset, length) of customer_id in the index file, or None."""
+        key = customer_key(customer_id) if key is None else key
+        position = bisect.bisect_left(self.keys, key)
+        while position < self.indexed:
+            entry_key, offset, length = self.index_entry(position)
+            if entry_key != key:
+                break
+            if self.read(offset, length)["customer_id"] == customer_id:
+                return offset, length
+            position += 1
+        return None
+
+    def find(self, customer_id):
+        entry = self.pending.get(customer_id)
+        if entry is not None:
+            return entry[:2]
+        return self.find_indexed(customer_id)
+
+    def scan_tail(self):
+        """Index the lines appended after the index file was last written."""
+        with open(self.path, "rb") as file:
+            file.seek(self.covered)
+            offset = self.covered
+            for line in file:
+                self.note(json.loads(line)["customer_id"], offset, len(line))
+                offset += len(line)
+
+    def note(self, customer_id, offset, length):
+        """Record that the newest line of customer_id is at offset; returns True if it is new."""
+        previous = self.pending.get(customer_id)
+        if previous is not None:
+            self.pending[customer_id] = (offset, length, previous[2])
+            return False
+        indexed = self.find_indexed(customer_id)
+        self.pending[customer_id] = (offset, length, None if indexed is None else indexed[0])
+        if indexed is None:
+            self.length += 1
+        return indexed is None
+
+    def remember(self, customer):
+        self.cache[customer.customer_id] = customer
+        self.cache.move_to_end(customer.customer_id)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+
+    def __getitem__(self, customer_id):
+        with self.lock:
+            customer = self.cache.get(customer_id)
+            if customer is not None:
+                self.hits += 1
+                self.cache.move_to_end(customer_id)
+                return customer
+            self.misses += 1
+            entry = self.find(customer_id)
+            if entry is None:
+                raise KeyError(customer_id)
+            customer = Customer(**self.read(*entry))
+            self.remember(customer)
+            return customer
+
+    def __contains__(self, customer_id):
+        try:
+            self[customer_id]
+        except KeyError:
+            return False
+        return True
+
+    def upsert(self, customers):
+        """Append customers in one write and return (inserted, updated)."""
+        lines = [(json.dumps(customer.__dict__, separators=(",", ":")) + "\n").encode() for customer in customers]
+        inserted = 0
+        with self.lock:
+            self.data.write(b"".join(lines))
+            self.data.flush()
+            offset = self.size
+            for customer, line in zip(customers, lines):
+                inserted += self.note(customer.customer_id, offset, len(line))
+                offset += len(line)
+                if customer.customer_id in self.cache:
+                    self.remember(customer)
+            self.size = offset
+        return inserted, len(customers) - inserted
+
+    def __setitem__(self, customer_id, customer):
+        self.upsert([customer])
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for customer in self.values():
+            yield customer.customer_id
+
+    def values(self):
+        """Stream the newest record of every customer in file order, bypassing the cache."""
+        with open(self.path, "rb") as file:
+            offset = 0
+            for line in file:
+                if offset >= self.size:
+                    break
+                data = json.loads(line)
+                if self.current(data["customer_id"], offset):
+                    yield Customer(**data)
+                offset += len(line)
+
+    def current(self, customer_id, offset):
+        """True if the line at offset is the newest record of customer_id."""
+        with self.lock:
+            entry = self.pending.get(customer_id)
+            if entry is not None:
+                return entry[0] == offset
+            key = customer_key(customer_id)
+            position = bisect.bisect_left(self.keys, key)
+            while position < self.indexed:
+                entry_key, entry_offset, _ = self.index_entry(position)
+                if entry_key != key:
+                    return False
+                if entry_offset == offset:
+                    return True
+                position += 1
+            return False
+
+    def stats(self):
+        return {"customers": self.length, "cached": len(self.cache), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+    def flush(self):
+        """fsync the data file and merge the pending records into the index file."""
+        with self.lock:
+            self.data.flush()
+            os.fsync(self.data.fileno())
+            if not self.pending:
+                return
+            superseded = {entry[2] for entry in self.pending.values() if entry[2] is not None}
+            added = sorted((customer_key(customer_id), offset, length)
+                           for customer_id, (offset, length, _) in self.pending.items())
+            view = memoryview(self.index)[self.HEADER.size:self.HEADER.size + self.indexed * self.RECORD.size]
+            try:
+                kept = (record for record in self.RECORD.iter_unpack(view) if record[1] not in superseded)
+                self.write_index(heapq.merge(kept, added), self.length, self.size)
+            finally:
+                view.release()
+            self.index.close()
+            self.map_index()
+            self.pending.clear()
+
+    def close(self):
+        self.flush()
+        self.index.close()
+        self.data.close()
+
+    @classmethod
+    def import_json(cls, json_path, path, cache_size=10000):
+        """Build a store at path from a {"customers": [...]} JSON file."""
+        store = cls(path, cache_size)
+        with open(json_path, "r") as file:
+            store.upsert([Customer(**customer) for customer in json.load(file)["customers"]])
+        store.flush()
+        return store
+
+def item_from_row(row):
+    item_id, name, category, quantity, price = row
+    return Item(item_id, name, price, quantity, category)
+
+def row_from_item(item):
+    return item.item_id, item.name, item.category, item.quantity, item.price
+
+class DictStorage:
+    """Default storage engine: everything lives in dicts and is saved to JSON.
+
+    If inventory_path is a binary snapshot (see snapshot.py) or ends in
+    .snap, the inventory is memory-mapped and its items are materialized
+    as they are accessed, and it is saved back in the same format.
+
+    Customers are saved in the inventory file alongside the items and
+    read back from it; customers_path is only read when the inventory
+    file has none. With lazy_customers, customers live in a CustomerStore
+    next to customers_path (customers.ndjson), imported from
+    customers_path the first time, and only cache_size of them are kept
+    in memory.
+
+    With an autosave running, the items and customers changed since the
+    last flush are appended to <inventory>.autosave, one JSON record per
+    line, which load() replays and save() folds into the inventory file.
+    """
+    def __init__(self, inventory_path="inventory.json", customers_path="customers.json",
+                 lazy_customers=False, cache_size=10000):
+        self.inventory_path = inventory_path
+        self.customers_path = customers_path
+        self.autosave_path = os.path.splitext(inventory_path)[0] + ".autosave"
+        self.lazy_customers = lazy_customers
+        self.cache_size = cache_size
+        self.binary = inventory_path.endswith(".snap") or snapshot.is_snapshot(inventory_path)
         self.inventory = {}
         self.customers = {}
         self.transactions = {}
-        self.load_inventory()
+        self.pricing = None
+        self.autosave = None
+        self.autosave_file = None
+        self.dirty = {"items": set(), "customers": set()}
+        self.dirty_lock = threading.Lock()
+        self.save_lock = threading.Lock()
 
-    def load_inventory(self):
-        """Load items and customers from JSON files."""
-        if os.path.exists("inventory.json"):
-            with open("inventory.json", "r") as file:
+    def load(self):
+        saved_customers = None
+        if self.binary and os.path.exists(self.inventory_path):
+            source = snapshot.SnapshotFile(self.inventory_path)
+            self.inventory = snapshot.SnapshotItems(source, item_from_row, row_from_item)
+            saved_customers = source.meta.get("customers")
+        elif os.path.exists(self.inventory_path):
+            with open(self.inventory_path, "r") as file:
                 data = json.load(file)
                 self.inventory = {item["item_id"]: Item(**item) for item in data["items"]}
-                print("Inventory loaded.")
-        if os.path.exists("customers.json"):
-            with open("customers.json", "r") as file:
+                saved_customers = data.get("customers")
+        if self.lazy_customers:
+            store_path = os.path.splitext(self.customers_path)[0] + ".ndjson"
+            if not os.path.exists(store_path) and os.path.exists(self.customers_path):
+                self.customers = CustomerStore.import_json(self.customers_path, store_path, self.cache_size)
+            else:
+                self.customers = CustomerStore(store_path, self.cache_size)
+        elif saved_customers is not None:
+            self.customers = {customer["customer_id"]: Customer(**customer) for customer in saved_customers}
+        elif os.path.exists(self.customers_path):
+            with open(self.customers_path, "r") as file:
                 data = json.load(file)
                 self.customers = {customer["customer_id"]: Customer(**customer) for customer in data["customers"]}
-                print("Customer data loaded.")
+        self.replay_autosave()
 
-    def save_inventory(self):
-        """Save the current state of inventory and customers to JSON files."""
-        data = {
-            "items": [item.to_dict() for item in self.inventory.values()],
-            "customers": [customer.__dict__ for customer in self.customers.values()]
-        }
-        with open("inventory.json", "w") as file:
-            json.dump(data, file, indent=4)
-        print("Inventory saved.")
+    def replay_autosave(self):
+        """Apply the records autosaved since the inventory file was last written.
+
+        A last line without its newline is the remains of a flush cut short
+        by a crash; it is truncated away so the next flush starts on a line
+        of its own. Lines that do not decode are skipped.
+        """
+        if not os.path.exists(self.autosave_path):
+            return
+        with open(self.autosave_path, "rb+") as file:
+            data = file.read()
+            if data and not data.endswith(b"\n"):
+                data = data[:data.rfind(b"\n") + 1]
+                file.truncate(len(data))
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            op = record.pop("op")
+            if op == "item":
+                self.inventory[record["item_id"]] = Item(**record)
+            elif not self.lazy_customers:
+                self.customers[record["customer_id"]] = Customer(**record)
+
+    def save(self):
+        with self.save_lock:
+            with self.dirty_lock:
+                self.dirty = {"items": set(), "customers": set()}
+            self.write_inventory()
+            if self.autosave_file is not None:
+                self.autosave_file.close()
+                self.autosave_file = None
+            if os.path.exists(self.autosave_path):
+                os.remove(self.autosave_path)
 
-    def add_item(self, item_id, name, price, quantity):
-        if item_id in self.inventory:
-            print(f"Item {name} already exists.")
+    def write_inventory(self):
+        customers = None
+        if self.lazy_customers:
+            self.customers.flush()
         else:
-            self.inventory[item_id] = Item(item_id, name, price, quantity)
-            print(f"Item {name} added successfully.")
+            customers = [customer.__dict__ for customer in self.customers.values()]
+        if self.binary:
+            if isinstance(self.inventory, snapshot.SnapshotItems):
+                rows = self.inventory.rows()
+            else:
+                rows = (row_from_item(item) for item in self.inventory.values())
+            snapshot.write(self.inventory_path, "pos", rows, {} if customers is None else {"customers": customers})
+            return
+        data = {"items": [item.to_dict() for item in self.inventory.values()]}
+        if customers is not None:
+            data["customers"] = customers
+        tmp_path = self.inventory_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file, indent=4)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.inventory_path)
+
+    def mark_dirty(self, section, keys):
+        """Note records changed since the last flush and tell the autosave how many."""
+        if self.autosave is None or (section == "customers" and self.lazy_customers):
+            return
+        with self.dirty_lock:
+            before = len(self.dirty[section])
+            self.dirty[section].update(keys)
+            added = len(self.dirty[section]) - before
+        self.autosave.note(added)
+
+    def flush_dirty(self):
+        """Append the items and customers changed since the last flush to the autosave file.
+
+        Returns the bytes written. Lazy customers are already on disk in
+        their own store and are not repeated here.
+        """
+        with self.save_lock:
+            with self.dirty_lock:
+                dirty, self.dirty = self.dirty, {"items": set(), "customers": set()}
+            records = [{"op": "item", **self.inventory[item_id].to_dict()} for item_id in dirty["items"]]
+            records += [{"op": "customer", **self.customers[customer_id].__dict__}
+                        for customer_id in dirty["customers"]]
+            if not records:
+                return 0
+            data = "".join([json.dumps(record, separators=(",", ":")) + "\n" for record in records])
+            if self.autosave_file is None:
+                self.autosave_file = open(self.autosave_path, "a")
+            self.autosave_file.write(data)
+            self.autosave_file.flush()
+            os.fsync(self.autosave_file.fileno())
+            return len(data)
+
+    def add_item(self, item):
+        self.inventory[item.item_id] = item
+        self.mark_dirty("items", (item.item_id,))
+
+    def update_item(self, item):
+        self.inventory[item.item_id] = item
+        self.mark_dirty("items", (item.item_id,))
+
+    def add_customer(self, customer):
+        self.customers[customer.customer_id] = customer
+        self.mark_dirty("customers", (customer.customer_id,))
+
+    def upsert_items(self, items):
+        inserted = 0
+        for item in items:
+            inserted += item.item_id not in self.inventory
+            self.inventory[item.item_id] = item
+        self.mark_dirty("items", [item.item_id for item in items])
+        return inserted, len(items) - inserted
+
+    def upsert_customers(self, customers):
+        if self.lazy_customers:
+            return self.customers.upsert(customers)
+        inserted = 0
+        for customer in customers:
+            inserted += customer.customer_id not in self.customers
+            self.customers[customer.customer_id] = customer
+        self.mark_dirty("customers", [customer.customer_id for customer in customers])
+        return inserted, len(customers) - inserted
+
+    def record_sale(self, transaction):
+        for line in transaction.items:
+            item = self.inventory[line.item_id]
+            item.update_quantity(item.quantity - line.quantity)
+        self.transactions[transaction.transaction_id] = transaction
+        self.mark_dirty("items", [line.item_id for line in transaction.items])
+
+    def record_sales(self, records, stock):
+        """Store a batch of SaleRecords and set the stock levels they leave, {item_id: quantity}."""
+        for item_id, quantity in stock.items():
+            self.inventory[item_id].quantity = quantity
+        for record in records:
+            self.transactions[record.transaction_id] = record
+        self.mark_dirty("items", stock)
+
+    def last_transaction_id(self):
+        return max(self.transactions, default=0)
+
+    def seed_rollup(self, rollup):
+        for transaction in self.transactions.values():
+            rollup.add(transaction)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        if self.autosave is not None:
+            self.autosave.stop()
+        if self.autosave_file is not None:
+            self.autosave_file.close()
+            self.autosave_file = None
+        if self.lazy_customers:
+            self.customers.close()
+
+class SharedStorage(DictStorage):
+    """Storage engine over the inventory file shared with cp.py and other registers.
+
+    Items and customers are kept in dicts as in DictStorage; commit() and
+    save() merge this register's changes into the shared file and pick up
+    everyone else's (see shared.py). Stock is only as fresh as the last
+    commit, so a sale can take an item below zero there when two registers
+    sell the last units at once; the count stays correct and goes negative.
+    Transactions stay local to the process.
+    """
+    def __init__(self, path=shared.SHARED_FILE):
+        super().__init__(path)
+        self.store = shared.SharedStore(path)
+
+    def load(self):
+        self.apply(self.store.load())
+
+    def apply(self, changes):
+        for item_id, record in changes["items"].items():
+            if record is None:
+                self.inventory.pop(item_id, None)
+                continue
+            item = self.inventory.get(item_id)
+            if item is None:
+                item = self.inventory[item_id] = Item(item_id, item_id, 0.0, 0)
+            item.name = record.get("name", item_id)
+            item.price = record["price"]
+            item.quantity = record["quantity"]
+            item.category = record.get("category", "")
+        for customer_id, record in changes["customers"].items():
+            if record is None:
+                self.customers.pop(customer_id, None)
+            else:
+                self.customers[customer_id] = Customer(customer_id, **record)
+
+    def record(self, section, key):
+        """Return this register's fields for a changed record, for SharedStore.sync."""
+        if section == "items":
+            item = self.inventory.get(key)
+            return None if item is None else {"name": item.name, "category": item.category,
+                                              "quantity": item.quantity, "price": item.price}
+        customer = self.customers.get(key)
+        return None if customer is None else {"name": customer.name, "email": customer.email, "phone": customer.phone}
+
+    def add_item(self, item):
+        super().add_item(item)
+        self.store.mark("items", item.item_id)
+
+    def update_item(self, item):
+        super().update_item(item)
+        self.store.mark("items", item.item_id)
+
+    def add_customer(self, customer):
+        super().add_customer(customer)
+        self.store.mark("customers", customer.customer_id)
+
+    def upsert_items(self, items):
+        for item in items:
+            self.store.mark("items", item.item_id)
+        return super().upsert_items(items)
+
+    def upsert_customers(self, customers):
+        for customer in customers:
+            self.store.mark("customers", customer.customer_id)
+        return super().upsert_customers(customers)
+
+    def record_sale(self, transaction):
+        super().record_sale(transaction)
+        for line in transaction.items:
+            self.store.mark("items", line.item_id)
+
+    def record_sales(self, records, stock):
+        super().record_sales(records, stock)
+        for item_id in stock:
+            self.store.mark("items", item_id)
+
+    def commit(self):
+        self.apply(self.store.sync(self.record))
+
+    def save(self):
+        self.commit()
+
+class SQLiteTable(Mapping):
+    """Read-only mapping over one table; lookups go through the primary key index."""
+    def __init__(self, storage, table, key, factory):
+        self.storage = storage
+        self.table = table
+        self.key = key
+        self.factory = factory
+
+    def __getitem__(self, key):
+        rows = self.storage.query(f"SELECT * FROM {self.table} WHERE {self.key} = ?", (key,))
+        if not rows:
+            raise KeyError(key)
+        return self.factory(rows[0])
+
+    def __contains__(self, key):
+        return bool(self.storage.query(f"SELECT 1 FROM {self.table} WHERE {self.key} = ?", (key,)))
+
+    def rows(self, columns, page_size=1000):
+        """Yield rows in insertion order, one page at a time, to bound memory."""
+        last = 0
+        while True:
+            page = self.storage.query(
+                f"SELECT rowid, {columns} FROM {self.table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last, page_size))
+            for row in page:
+                yield row[1:]
+            if len(page) < page_size:
+                return
+            last = page[-1][0]
+
+    def __iter__(self):
+        for row in self.rows(self.key):
+            yield row[0]
+
+    def __len__(self):
+        return self.storage.query(f"SELECT COUNT(*) FROM {self.table}")[0][0]
+
+    def values(self):
+        for row in self.rows("*"):
+            yield self.factory(row)
+
+class SQLiteStorage:
+    """Storage engine backed by a SQLite database in WAL mode.
+
+    Every write is part of a SQLite transaction that is committed after
+    batch_size writes (1 by default, i.e. every sale is durable on return).
+    Larger batches trade a window of unflushed sales for throughput; call
+    commit() to flush early. The connection is shared between threads and
+    serialized by self.lock.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS items (
+            item_id TEXT PRIMARY KEY, name TEXT, price REAL, quantity INTEGER, category TEXT DEFAULT '');
+        CREATE TABLE IF NOT EXISTS customers (
+            customer_id TEXT PRIMARY KEY, name TEXT, email TEXT, phone TEXT);
+        CREATE TABLE IF NOT EXISTS transactions (
+            transaction_id INTEGER PRIMARY KEY, customer_id TEXT, date TEXT,
+            total_amount REAL, tax REAL, final_amount REAL);
+        CREATE TABLE IF NOT EXISTS transaction_items (
+            transaction_id INTEGER, item_id TEXT, name TEXT, price REAL, quantity INTEGER,
+            category TEXT DEFAULT '');
+        CREATE INDEX IF NOT EXISTS idx_transactions_customer ON transactions (customer_id);
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+        CREATE INDEX IF NOT EXISTS idx_transaction_items_transaction ON transaction_items (transaction_id);
+        CREATE INDEX IF NOT EXISTS idx_transaction_items_item ON transaction_items (item_id);
+    """
+
+    def __init__(self, path="pos.db", batch_size=1):
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = 0
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        for table in ("items", "transaction_items"):
+            if "category" not in [row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")]:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN category TEXT DEFAULT ''")
+        self.pricing = None
+        self.inventory = SQLiteTable(self, "items", "item_id", lambda row: Item(*row))
+        self.customers = SQLiteTable(self, "customers", "customer_id", lambda row: Customer(*row))
+        self.transactions = SQLiteTable(self, "transactions", "transaction_id", self.load_transaction)
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def load_transaction(self, row):
+        transaction_id, customer_id, date = row[:3]
+        items = [Item(*line) for line in self.query(
+            "SELECT item_id, name, price, quantity, category FROM transaction_items WHERE transaction_id = ?",
+            (transaction_id,))]
+        return Transaction(transaction_id, self.customers[customer_id], items, datetime.fromisoformat(date),
+                           self.pricing)
+
+    def load(self):
+        pass
+
+    def save(self):
+        self.commit()
+
+    def begin(self):
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+
+    def written(self):
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        with self.lock:
+            if self.conn.in_transaction:
+                self.conn.execute("COMMIT")
+            self.pending = 0
+
+    def add_item(self, item):
+        with self.lock:
+            self.begin()
+            self.conn.execute("INSERT INTO items VALUES (?, ?, ?, ?, ?)",
+                              (item.item_id, item.name, item.price, item.quantity, item.category))
+            self.written()
+
+    def update_item(self, item):
+        with self.lock:
+            self.begin()
+            self.conn.execute("UPDATE items SET name = ?, price = ?, quantity = ?, category = ? WHERE item_id = ?",
+                              (item.name, item.price, item.quantity, item.category, item.item_id))
+            self.written()
+
+    def add_customer(self, customer):
+        with self.lock:
+            self.begin()
+            self.conn.execute("INSERT INTO customers VALUES (?, ?, ?, ?)",
+                              (customer.customer_id, customer.name, customer.email, customer.phone))
+            self.written()
+
+    def upsert(self, table, columns, rows):
+        key = columns[0]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+        with self.lock:
+            self.begin()
+            existing = 0
+            for start in range(0, len(rows), 500):
+                keys = [row[0] for row in rows[start:start + 500]]
+                existing += self.conn.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE {key} IN ({','.join('?' * len(keys))})", keys).fetchone()[0]
+            self.conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))}) "
+                                  f"ON CONFLICT ({key}) DO UPDATE SET {updates}", rows)
+            self.commit()
+        return len(rows) - existing, existing
+
+    def upsert_items(self, items):
+        return self.upsert("items", ("item_id", "name", "price", "quantity", "category"),
+                           [(item.item_id, item.name, item.price, item.quantity, item.category) for item in items])
+
+    def upsert_customers(self, customers):
+        return self.upsert("customers", ("customer_id", "name", "email", "phone"),
+                           [(customer.customer_id, customer.name, customer.email, customer.phone)
+                            for customer in customers])
+
+    def record_sale(self, transaction):
+        """Decrement stock and insert the transaction as one atomic unit."""
+        with self.lock:
+            self.begin()
+            self.conn.execute("SAVEPOINT sale")
+            try:
+                for line in transaction.items:
+                    cursor = self.conn.execute(
+                        "UPDATE items SET quantity = quantity - ? WHERE item_id = ? AND quantity >= ?",
+                        (line.quantity, line.item_id, line.quantity))
+                    if cursor.rowcount != 1:
+                        raise OutOfStockError(
+                            f"Item ID {line.item_id} is not available or quantity is insufficient.", [line.item_id])
+                self.conn.execute("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?)",
+                                  (transaction.transaction_id, transaction.customer.customer_id,
+                                   transaction.date.isoformat(), transaction.total_amount,
+                                   transaction.tax, transaction.final_amount))
+                self.conn.executemany("INSERT INTO transaction_items VALUES (?, ?, ?, ?, ?, ?)",
+                                      [(transaction.transaction_id, line.item_id, line.name, line.price,
+                                        line.quantity, line.category) for line in transaction.items])
+            except Exception:
+                self.conn.execute("ROLLBACK TO sale")
+                self.conn.execute("RELEASE sale")
+                raise
+            self.conn.execute("RELEASE sale")
+            self.written()
+
+    def record_sales(self, records, stock):
+        """Decrement stock for a batch of SaleRecords and insert them in one database transaction.
+
+        The decrements are recomputed from the records and applied only where
+        enough stock is left, so the database never goes negative.
+        """
+        sold = {}
+        for record in records:
+            for item_id, _, _, quantity, _ in record.sold:
+                if quantity <= 0:
+                    raise InvalidQuantityError(f"Quantity for item ID {item_id} must be positive.")
+                sold[item_id] = sold.get(item_id, 0) + quantity
+        with self.lock:
+            self.begin()
+            self.conn.execute("SAVEPOINT sales")
+            try:
+                cursor = self.conn.executemany(
+                    "UPDATE items SET quantity = quantity - ? WHERE item_id = ? AND quantity >= ?",
+                    [(quantity, item_id, quantity) for item_id, quantity in sold.items()])
+                if cursor.rowcount != len(sold):
+                    raise OutOfStockError("Stock changed while the batch was being priced. Batch failed.")
+                self.conn.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?)",
+                                      [(record.transaction_id, record.customer.customer_id, record.date.isoformat(),
+                                        record.total_amount, record.tax, record.final_amount) for record in records])
+                self.conn.executemany("INSERT INTO transaction_items VALUES (?, ?, ?, ?, ?, ?)",
+                                      [(record.transaction_id, *row) for record in records for row in record.sold])
+            except Exception:
+                self.conn.execute("ROLLBACK TO sales")
+                self.conn.execute("RELEASE sales")
+                raise
+            self.conn.execute("RELEASE sales")
+            self.commit()
+
+    def last_transaction_id(self):
+        return self.query("SELECT MAX(transaction_id) FROM transactions")[0][0] or 0
+
+    def seed_rollup(self, rollup):
+        """Fill the rollup with GROUP BY queries rather than loading every sale."""
+        units = "(SELECT SUM(quantity) FROM transaction_items WHERE transaction_id = t.transaction_id)"
+        cents = "SUM(CAST(ROUND({} * 100) AS INTEGER))"
+        for column, buckets in (("substr(date, 1, 10)", rollup.by_day), ("customer_id", rollup.by_customer)):
+            for key, revenue, tax, count in self.query(
+                    f"SELECT {column}, {cents.format('total_amount')}, {cents.format('tax')}, SUM({units}) "
+                    f"FROM transactions t GROUP BY 1"):
+                buckets[key] = [revenue, tax, count]
+        # Tax is rounded per line, so price each distinct line once and multiply by its count
+        pricing = self.pricing or DEFAULT_PRICING
+        for item_id, name, price, quantity, category, count in self.query(
+                "SELECT item_id, name, price, quantity, category, COUNT(*) FROM transaction_items "
+                "GROUP BY item_id, name, price, quantity, category"):
+            _, revenue, tax = pricing.price([Item(item_id, name, price, quantity, category)])
+            tax = sum(tax.values())
+            SalesRollup.bump(rollup.by_item, item_id, revenue * count, tax * count, quantity * count)
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+def check_cart(items_in_cart):
+    """Raise InvalidQuantityError unless every line of the cart sells at least one unit."""
+    for item_id, quantity in items_in_cart.items():
+        if quantity <= 0:
+            raise InvalidQuantityError(f"Quantity for item ID {item_id} must be positive.")
+
+class POS:
+    def __init__(self, storage=None, pricing=None, reorder=None, audit=None):
+        self.storage = storage if storage is not None else DictStorage()
+        self.pricing = pricing if pricing is not None else Pricing()
+        self.reorder = reorder if reorder is not None else ReorderQueue()
+        self.audit = audit
+        self.storage.pricing = self.pricing
+        self.item_locks = {}
+        self.locks_guard = threading.Lock()
+        self.id_lock = threading.Lock()
+        self.load_inventory()
+        if audit is not None:
+            if isinstance(self.inventory, snapshot.SnapshotItems):
+                # Read quantities off the snapshot rows instead of materializing every item.
+                audit.start((row[0], row[3]) for row in self.inventory.rows())
+            else:
+                audit.start((item.item_id, item.quantity) for item in self.inventory.values())
+        self.last_transaction_id = self.storage.last_transaction_id()
+        self.rollup = SalesRollup()
+        self.storage.seed_rollup(self.rollup)
+
+    @property
+    def inventory(self):
+        return self.storage.inventory
+
+    @property
+    def customers(self):
+        return self.storage.customers
+
+    @property
+    def transactions(self):
+        return self.storage.transactions
+
+    def load_inventory(self):
+        """Load items and customers from the storage engine."""
+        self.storage.load()
+
+    def save_inventory(self):
+        """Save the current state of inventory and customers."""
+        self.storage.save()
+
+    def item_lock(self, item_id):
+        lock = self.item_locks.get(item_id)
+        if lock is None:
+            with self.locks_guard:
+                lock = self.item_locks.setdefault(item_id, threading.Lock())
+        return lock
+
+    def next_transaction_id(self):
+        with self.id_lock:
+            self.last_transaction_id += 1
+            return self.last_transaction_id
+
+    def add_item(self, item_id, name, price, quantity, category=""):
+        """Add a new item and return it; raises ItemExistsError or InvalidQuantityError."""
+        if quantity < 0:
+            raise InvalidQuantityError("Quantity cannot be negative.")
+        with self.item_lock(item_id):
+            if item_id in self.inventory:
+                raise ItemExistsError(f"Item {name} already exists.")
+            item = Item(item_id, name, price, quantity, category)
+            self.storage.add_item(item)
+            self.reorder.update(item_id, quantity, category)
+            self.audited([(item_id, None, quantity, "add")])
+        return item
     
     def update_item_quantity(self, item_id, quantity):
-        if item_id in self.inventory:
-            self.inventory[item_id].update_quantity(quantity)
-            print(f"Quantity for item ID {item_id} updated to {quantity}.")
-        else:
-            print(f"Item ID {item_id} not found.")
+        """Set an item's stock level and return the item."""
+        with self.item_lock(item_id):
+            if item_id not in self.inventory:
+                raise ItemNotFoundError(f"Item ID {item_id} not found.")
+            item = self.inventory[item_id]
+            old_quantity = item.quantity
+            item.update_quantity(quantity)
+            self.storage.update_item(item)
+            self.reorder.update(item_id, quantity)
+            if quantity != old_quantity:
+                self.audited([(item_id, old_quantity, quantity, "update")])
+        return item
     
+    def upsert_items(self, items):
+        """Insert or overwrite a batch of items without printing.
+
+        Returns (inserted, updated) counts. Holds the locks of every item in
+        the batch so concurrent sales never act on a replaced item.
+        """
+        items = list({item.item_id: item for item in items}.values())
+        with ExitStack() as stack:
+            for item_id in sorted(item.item_id for item in items):
+                stack.enter_context(self.item_lock(item_id))
+            changes = []
+            if self.audit is not None:
+                for item in items:
+                    old = self.inventory.get(item.item_id)
+                    if old is None or old.quantity != item.quantity:
+                        changes.append((item.item_id, None if old is None else old.quantity, item.quantity, "upsert"))
+            counts = self.storage.upsert_items(items)
+            for item in items:
+                self.reorder.update(item.item_id, item.quantity, item.category)
+            self.audited(changes)
+            return counts
+
+    def upsert_customers(self, customers):
+        """Insert or overwrite a batch of customers without printing."""
+        customers = list({customer.customer_id: customer for customer in customers}.values())
+        return self.storage.upsert_customers(customers)
+
     def list_items(self):
-        """List all available items in inventory."""
-        if not self.inventory:
-            print("No items available.")
-        else:
-            for item in self.inventory.values():
-                print(item)
+        """Iterate over all items in inventory."""
+        return iter(self.inventory.values())
     
     def add_customer(self, customer_id, name, email, phone):
         if customer_id in self.customers:
-            print(f"Customer with ID {customer_id} already exists.")
-        else:
-            self.customers[customer_id] = Customer(customer_id, name, email, phone)
-            print(f"Customer {name} added successfully.")
+            raise CustomerExistsError(f"Customer with ID {customer_id} already exists.")
+        customer = Customer(customer_id, name, email, phone)
+        self.storage.add_customer(customer)
+        return customer
     
-    def process_sale(self, customer_id, items_in_cart):
-        if customer_id not in self.customers:
-            print(f"Customer with ID {customer_id} not found.")
-            return
+    def process_sale(self, customer_id, items_in_cart, all_or_nothing=False):
+        """Sell the cart to a customer and return a SaleResult.
+
+        The locks of every item in the cart are taken in sorted order, so
+        concurrent lanes can't oversell or deadlock; stock is checked,
+        decremented and the transaction recorded while they are held. Lines
+        that can't be filled are skipped and listed in the result, or fail
+        the whole sale if all_or_nothing is set. Raises CustomerNotFoundError,
+        InvalidQuantityError for a line of zero or fewer units, or
+        OutOfStockError when nothing could be sold.
+        """
+        check_cart(items_in_cart)
+        customer = self.customers.get(customer_id)
+        if customer is None:
+            raise CustomerNotFoundError(f"Customer with ID {customer_id} not found.")
         
-        customer = self.customers[customer_id]
-        transaction_id = len(self.transactions) + 1
         items = []
+        rejected = []
+        remaining = {}
         
-        for item_id, quantity in items_in_cart.items():
-            if item_id in self.inventory and self.inventory[item_id].quantity >= quantity:
-                item = self.inventory[item_id]
-                item.update_quantity(item.quantity - quantity)
-                items.append(Item(item_id, item.name, item.price, quantity))
-            else:
-                print(f"Item ID {item_id} is not available or quantity is insufficient.")
-        
-        if items:
-            transaction = Transaction(transaction_id, customer, items)
-            self.transactions[transaction_id] = transaction
-            print(f"Transaction {transaction_id} completed.")
-            print(transaction.generate_receipt())
-        else:
-            print("No valid items in the cart. Transaction failed.")
+        with ExitStack() as stack:
+            for item_id in sorted(items_in_cart):
+                stack.enter_context(self.item_lock(item_id))
+            for item_id, quantity in items_in_cart.items():
+                item = self.inventory.get(item_id)
+                if item is not None and item.quantity >= quantity:
+                    items.append(Item(item_id, item.name, item.price, quantity, item.category))
+                    remaining[item_id] = item.quantity - quantity
+                elif all_or_nothing:
+                    raise OutOfStockError(
+                        f"Item ID {item_id} is not available or quantity is insufficient.", [item_id])
+                else:
+                    rejected.append(item_id)
+            if not items:
+                raise OutOfStockError("No valid items in the cart. Transaction failed.", rejected)
+            transaction = Transaction(self.next_transaction_id(), customer, items, pricing=self.pricing)
+            self.storage.record_sale(transaction)
+            when = transaction.date.timestamp()
+            low_stock = [item.item_id for item in items
+                         if self.reorder.record_sale(item.item_id, item.quantity, remaining[item.item_id], when)]
+            self.audited([(item.item_id, remaining[item.item_id] + item.quantity, remaining[item.item_id],
+                           f"sale {transaction.transaction_id}") for item in items])
+        self.rollup.add(transaction)
+        return SaleResult(transaction, rejected, low_stock)
+
+    def process_sales_batch(self, sales, all_or_nothing=False):
+        """Sell a batch of (customer_id, cart) pairs and return a BatchResult.
+
+        Carts are checked in order, in one pass, against a running copy of
+        each item's stock, with process_sale's rules: lines that can't be
+        filled are skipped (or fail their cart with all_or_nothing), and a
+        cart with a line of zero or fewer units, nothing to sell or an
+        unknown customer fails on its own without stopping the batch. Every decrement and transaction is then
+        applied in one storage call, with the locks of all the batch's items
+        held throughout. Sales in a batch share one date, and receipts are
+        only rendered when a record's generate_receipt() is called.
+        """
+        sales = list(sales)
+        item_ids = sorted({item_id for _, cart in sales for item_id in cart})
+        customers = {}
+        results = []
+        accepted = []
+        records = []
+        low_stock = []
+        with ExitStack() as stack:
+            for item_id in item_ids:
+                stack.enter_context(self.item_lock(item_id))
+            items = {}
+            for item_id in item_ids:
+                item = self.inventory.get(item_id)
+                if item is not None:
+                    items[item_id] = item
+            before = {item_id: item.quantity for item_id, item in items.items()}
+            stock = dict(before)
+            for customer_id, cart in sales:
+                try:
+                    check_cart(cart)
+                except InvalidQuantityError as e:
+                    results.append(e)
+                    continue
+                if customer_id not in customers:
+                    customers[customer_id] = self.customers.get(customer_id)
+                customer = customers[customer_id]
+                if customer is None:
+                    results.append(CustomerNotFoundError(f"Customer with ID {customer_id} not found."))
+                    continue
+                sold = []
+                rejected = []
+                for item_id, quantity in cart.items():
+                    left = stock.get(item_id)
+                    if left is not None and left >= quantity:
+                        item = items[item_id]
+                        sold.append((item_id, item.name, item.price, quantity, item.category))
+                    else:
+                        rejected.append(item_id)
+                if rejected and all_or_nothing:
+                    results.append(OutOfStockError(
+                        f"Item ID {rejected[0]} is not available or quantity is insufficient.", rejected[:1]))
+                    continue
+                if not sold:
+                    results.append(OutOfStockError("No valid items in the cart. Transaction failed.", rejected))
+                    continue
+                for row in sold:
+                    stock[row[0]] -= row[3]
+                accepted.append((len(results), customer, sold, rejected))
+                results.append(None)
+            if accepted:
+                with self.id_lock:
+                    first = self.last_transaction_id + 1
+                    self.last_transaction_id += len(accepted)
+                date = datetime.now()
+                for transaction_id, (position, customer, sold, rejected) in enumerate(accepted, first):
+                    record = results[position] = SaleRecord(transaction_id, customer, sold, rejected, date,
+                                                            self.pricing)
+                    records.append(record)
+                changed = {item_id: quantity for item_id, quantity in stock.items() if quantity != before[item_id]}
+                self.storage.record_sales(records, changed)
+                when = date.timestamp()
+                low_stock = [item_id for item_id, quantity in changed.items()
+                             if self.reorder.record_sale(item_id, before[item_id] - quantity, quantity, when)]
+                self.audited([(item_id, before[item_id], quantity, f"sales {first}-{records[-1].transaction_id}")
+                              for item_id, quantity in changed.items()])
+        self.rollup.add_records(records)
+        return BatchResult(results, low_stock)
+
+    def reorder_queue(self):
+        """Return the reorder queue, loading current stock into it on first use."""
+        if not self.reorder.loaded:
+            self.reorder.load((item.item_id, item.quantity, item.category) for item in self.inventory.values())
+        return self.reorder
+
+    def most_urgent(self, k=10):
+        """Return up to k (item, days of cover) pairs, fewest days of cover first."""
+        return [(self.inventory[item_id], days) for item_id, days in self.reorder_queue().most_urgent(k)]
+
+    def low_stock(self):
+        """Return (item, threshold, days of cover) for items at or below their reorder threshold."""
+        return [(self.inventory[item_id], threshold, days)
+                for item_id, _, threshold, days in self.reorder_queue().low_stock()]
+
+    def start_autosave(self, interval=30.0, threshold=500):
+        """Flush changed items and customers on a background thread every interval seconds or threshold changes."""
+        if not isinstance(self.storage, DictStorage) or isinstance(self.storage, SharedStorage):
+            raise POSError("Autosave needs the json storage engine; sqlite and shared storage commit as they go.")
+        self.storage.autosave = Autosave(self.storage.flush_dirty, interval, threshold)
+        return self.storage.autosave
+
+    def audited(self, changes):
+        """Record (item ID, old quantity, new quantity, reason) stock changes in the audit log."""
+        if self.audit is not None:
+            self.audit.record_many(changes)
+
+    def stock_at(self, when):
+        """Return {item ID: quantity} as of timestamp when, rebuilt from the audit log."""
+        if self.audit is None:
+            raise POSError("Stock auditing is off; start with --audit.")
+        try:
+            return self.audit.stock_at(when)
+        except ValueError as e:
+            raise POSError(str(e))
+
+    def stock_history(self, item_id, since=None, until=None):
+        """Return the audit events of one item between timestamps since and until."""
+        if self.audit is None:
+            raise POSError("Stock auditing is off; start with --audit.")
+        return self.audit.history(item_id, since, until)
+
+    def iter_sales_report(self):
+        """Yield the lines of the sales report one transaction at a time."""
+        yield "Sales Report\n"
+        yield "-" * 40 + "\n"
+        for transaction in self.transactions.values():
+            yield (f"Transaction ID: {transaction.transaction_id}\n"
+                   f"Customer: {transaction.customer.name}\n"
+                   f"Date: {transaction.date.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                   f"Total: ${format_cents(transaction.final_cents)}\n"
+                   + "-" * 40 + "\n")
+
+    def write_sales_report(self, file):
+        """Stream the sales report to an open text file."""
+        file.writelines(self.iter_sales_report())
 
     def generate_sales_report(self):
-        """Generate a report of all transactions."""
+        """Generate a report of all transactions, or None if there are none."""
         if not self.transactions:
-            print("No transactions found.")
-            return
-        
-        report = "Sales Report\n"
-        report += "-" * 40 + "\n"
-        for transaction in self.transactions.values():
-            report += f"Transaction ID: {transaction.transaction_id}\n"
-            report += f"Customer: {transaction.customer.name}\n"
-            report += f"Date: {transaction.date.strftime('%Y-%m-%d %H:%M:%S')}\n"
-            report += f"Total: ${transaction.final_amount}\n"
-            report += "-" * 40 + "\n"
-        return report
+            return None
+        return "".join(self.iter_sales_report())
+
+    def iter_sales_summary(self, by="day"):
+        """Yield revenue, tax and units per day, customer or item from the rollup."""
+        buckets = {"day": self.rollup.by_day, "customer": self.rollup.by_customer,
+                   "item": self.rollup.by_item}[by]
+        with self.rollup.lock:
+            rows = sorted(buckets.items())
+        yield f"Sales Summary by {by}\n"
+        yield "-" * 40 + "\n"
+        for key, (revenue, tax, units) in rows:
+            yield f"{key}: Revenue: ${format_cents(revenue)}, Tax: ${format_cents(tax)}, Units: {units}\n"
+        yield "-" * 40 + "\n"
     
     def exit_system(self):
-        """Exit the system and save the data."""
-        print("Saving data...")
+        """Save the data and release the storage engine."""
         self.save_inventory()
-        print("Goodbye!")
+        self.storage.close()
+        if self.audit is not None:
+            self.audit.close()
 
 def main():
-    pos_system = POS()
+    parser = argparse.ArgumentParser(description="Point of sale system")
+    parser.add_argument("--storage", choices=["json", "sqlite", "shared"], default="json",
+                        help="storage engine (default: json); shared works on one file with cp.py and other registers")
+    parser.add_argument("--db", default="pos.db", help="SQLite database path")
+    parser.add_argument("--shared-path", default=shared.SHARED_FILE, help="shared storage: inventory file")
+    parser.add_argument("--inventory", default="inventory.json",
+                        help="json storage: inventory file; a binary snapshot or a path ending in .snap loads lazily")
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="commit SQLite writes every N operations")
+    parser.add_argument("--tax-rules", help="JSON file of tax rates by category and item ID")
+    parser.add_argument("--reorder-rules", help="JSON file of reorder thresholds by category and item ID")
+    parser.add_argument("--lazy-customers", action="store_true",
+                        help="json storage: load customers on demand from customers.ndjson")
+    parser.add_argument("--customer-cache", type=int, default=10000,
+                        help="customers kept in memory with --lazy-customers")
+    parser.add_argument("--audit", nargs="?", const=True, metavar="DIR",
+                        help="log every stock change to an audit directory (default: next to the inventory, .audit)")
+    parser.add_argument("--actor", default=getpass.getuser(),
+                        help="name recorded in the audit log (default: %(default)s)")
+    parser.add_argument("--autosave", type=float, metavar="SECONDS",
+                        help="json storage: flush changed items and customers in the background every SECONDS")
+    parser.add_argument("--autosave-changes", type=int, default=500, metavar="N",
+                        help="with --autosave, also flush as soon as N records have changed (default: %(default)s)")
+    parser.add_argument("--import-orders", metavar="PATH",
+                        help="sell the orders in an NDJSON file in batches, save and exit")
+    args = parser.parse_args()
+    if args.autosave and args.storage != "json":
+        parser.error("--autosave needs --storage json; sqlite and shared storage commit as they go")
+    pricing = Pricing(TaxRules.load(args.tax_rules)) if args.tax_rules else None
+    reorder = ReorderQueue(ReorderRules.load(args.reorder_rules)) if args.reorder_rules else None
+    audit = None
+    if args.audit:
+        path = {"sqlite": args.db, "shared": args.shared_path}.get(args.storage, args.inventory)
+        audit = AuditLog(os.path.splitext(path)[0] + ".audit" if args.audit is True else args.audit, args.actor)
+    if args.storage == "sqlite":
+        pos_system = POS(SQLiteStorage(args.db, batch_size=args.batch_size), pricing, reorder, audit)
+    elif args.storage == "shared":
+        pos_system = POS(SharedStorage(args.shared_path), pricing, reorder, audit)
+    else:
+        pos_system = POS(DictStorage(args.inventory, lazy_customers=args.lazy_customers,
+                                     cache_size=args.customer_cache), pricing, reorder, audit)
+    if reorder is not None:
+        pos_system.reorder_queue()
+    if args.autosave:
+        pos_system.start_autosave(args.autosave, args.autosave_changes)
+
+    print(f"Loaded {len(pos_system.inventory)} items and {len(pos_system.customers)} customers.")
+    if args.import_orders:
+        sold, failed, low_stock = import_orders(pos_system, args.import_orders)
+        print(f"Imported {sold + failed} orders: {sold} sold, {failed} failed.")
+        for item_id in low_stock:
+            print(f"Low stock: item ID {item_id} is at or below its reorder threshold.")
+        pos_system.exit_system()
+        return
 
     while True:
+        if args.storage == "shared":
+            pos_system.storage.commit()
         print("\nPOS System Menu:")
         print("1. List Items")
         print("2. Add Item")
@@ -183,46 +1568,134 @@ def main():
         print("4. Add Customer")
         print("5. Process Sale")
         print("6. Generate Sales Report")
-        print("7. Exit")
+        print("7. Sales Summary")
+        print("8. Low Stock")
+        print("9. Stock Audit")
+        print("10. Exit")
 
         choice = input("Select an option: ")
-
-        if choice == '1':
-            pos_system.list_items()
-        elif choice == '2':
-            item_id = input("Enter item ID: ")
-            name = input("Enter item name: ")
-            price = float(input("Enter item price: "))
-            quantity = int(input("Enter item quantity: "))
-            pos_system.add_item(item_id, name, price, quantity)
-        elif choice == '3':
-            item_id = input("Enter item ID: ")
-            quantity = int(input("Enter new quantity: "))
-            pos_system.update_item_quantity(item_id, quantity)
-        elif choice == '4':
-            customer_id = input("Enter customer ID: ")
-            name = input("Enter customer name: ")
-            email = input("Enter customer email: ")
-            phone = input("Enter customer phone: ")
-            pos_system.add_customer(customer_id, name, email, phone)
-        elif choice == '5':
-            customer_id = input("Enter customer ID: ")
-            items_in_cart = {}
-            while True:
-                item_id = input("Enter item ID to add to cart (or 'done' to finish): ")
-                if item_id.lower() == 'done':
-                    break
-                quantity = int(input(f"Enter quantity for item {item_id}: "))
-                items_in_cart[item_id] = quantity
-            pos_system.process_sale(customer_id, items_in_cart)
-        elif choice == '6':
-            report = pos_system.generate_sales_report()
-            print(report)
-        elif choice == '7':
+        if choice == '10':
+            print("Saving data...")
             pos_system.exit_system()
+            if args.autosave:
+                print(pos_system.storage.autosave.summary())
+            print("Goodbye!")
             break
+        try:
+            run_choice(pos_system, choice)
+        except POSError as e:
+            print(e)
+
+def import_orders(pos_system, path, batch_size=1000):
+    """Sell the orders of an NDJSON file, one {"customer_id", "items": {item_id: quantity}} per line, in batches.
+
+    Returns (sold, failed, low stock item IDs).
+    """
+    sold = failed = 0
+    low_stock = set()
+    with open(path, "r") as file:
+        orders = (json.loads(line) for line in file if line.strip())
+        while True:
+            batch = [(order["customer_id"], order["items"]) for order in itertools.islice(orders, batch_size)]
+            if not batch:
+                break
+            result = pos_system.process_sales_batch(batch)
+            errors = len(result.errors)
+            sold += len(batch) - errors
+            failed += errors
+            low_stock.update(result.low_stock)
+    return sold, failed, sorted(low_stock)
+
+def run_choice(pos_system, choice):
+    """Prompt for and run one menu action; POS errors propagate to the caller."""
+    if choice == '1':
+        found = False
+        for item in pos_system.list_items():
+            print(item)
+            found = True
+        if not found:
+            print("No items available.")
+    elif choice == '2':
+        item_id = input("Enter item ID: ")
+        name = input("Enter item name: ")
+        price = float(input("Enter item price: "))
+        quantity = int(input("Enter item quantity: "))
+        category = input("Enter item category (optional): ").strip()
+        pos_system.add_item(item_id, name, price, quantity, category)
+        print(f"Item {name} added successfully.")
+    elif choice == '3':
+        item_id = input("Enter item ID: ")
+        quantity = int(input("Enter new quantity: "))
+        pos_system.update_item_quantity(item_id, quantity)
+        print(f"Quantity for item ID {item_id} updated to {quantity}.")
+    elif choice == '4':
+        customer_id = input("Enter customer ID: ")
+        name = input("Enter customer name: ")
+        email = input("Enter customer email: ")
+        phone = input("Enter customer phone: ")
+        pos_system.add_customer(customer_id, name, email, phone)
+        print(f"Customer {name} added successfully.")
+    elif choice == '5':
+        customer_id = input("Enter customer ID: ")
+        items_in_cart = {}
+        while True:
+            item_id = input("Enter item ID to add to cart (or 'done' to finish): ")
+            if item_id.lower() == 'done':
+                break
+            quantity = int(input(f"Enter quantity for item {item_id}: "))
+            items_in_cart[item_id] = quantity
+        try:
+            result = pos_system.process_sale(customer_id, items_in_cart)
+        except OutOfStockError as e:
+            for item_id in e.item_ids:
+                print(f"Item ID {item_id} is not available or quantity is insufficient.")
+            print("No valid items in the cart. Transaction failed.")
+            return
+        for item_id in result.rejected:
+            print(f"Item ID {item_id} is not available or quantity is insufficient.")
+        print(f"Transaction {result.transaction.transaction_id} completed.")
+        print(result.transaction.generate_receipt())
+        for item_id in result.low_stock:
+            print(f"Low stock: item ID {item_id} is at or below its reorder threshold.")
+    elif choice == '6':
+        if pos_system.transactions:
+            pos_system.write_sales_report(sys.stdout)
+        else:
+            print("No transactions found.")
+    elif choice == '7':
+        by = input("Summarize by (day/customer/item): ").strip() or "day"
+        if by in ("day", "customer", "item"):
+            sys.stdout.writelines(pos_system.iter_sales_summary(by))
         else:
             print("Invalid choice. Please try again.")
+    elif choice == '8':
+        low_stock = pos_system.low_stock()
+        for item, threshold, days in low_stock:
+            print(f"{item} (reorder at {threshold}, {format_cover(days)})")
+        if not low_stock:
+            print("No items at or below their reorder threshold.")
+        print("Most urgent:")
+        for item, days in pos_system.most_urgent(10):
+            print(f"  {item.item_id} {item.name}: {item.quantity} left, {format_cover(days)}")
+    elif choice == '9':
+        item_id = input("Enter item ID (leave blank for every item): ")
+        when = input("As of (YYYY-MM-DD HH:MM, leave blank for now): ")
+        when = parse_time(when) if when else None
+        if item_id:
+            for event in pos_system.stock_history(item_id, until=when):
+                print(format_event(event))
+        if when is not None:
+            stock = pos_system.stock_at(when)
+            if item_id:
+                print(f"Item ID {item_id} as of {format_time(when)}: {stock.get(item_id, 'not in inventory')}")
+            else:
+                print(f"Stock as of {format_time(when)}:")
+                for key, quantity in sorted(stock.items()):
+                    print(f"  {key}: {quantity}")
+                if not stock:
+                    print("  No items.")
+    else:
+        print("Invalid choice. Please try again.")
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,316 @@
+"""Local HTTP front-end for a POS, plus a load-generator client.
+
+The server speaks plain HTTP/1.1 with keep-alive on top of asyncio, so it
+needs nothing outside the standard library. All POS calls run on a single
+worker thread, keeping the event loop free for I/O. Sales are not applied
+one request at a time: they are queued and applied in micro-batches, and
+the storage engine is committed once per batch before any of the batch's
+requests are answered.
+
+    python pos_server.py serve --port 8080 --storage sqlite
+    python pos_server.py load --port 8080 --connections 32 --requests 20000
+
+Endpoints (JSON bodies and responses unless noted):
+
+    GET  /items                   list items
+    POST /items                   {"item_id", "name", "price", "quantity", "category"}
+    PUT  /items/<item_id>         {"quantity"}
+    POST /customers               {"customer_id", "name", "email", "phone"}
+    POST /sales                   {"customer_id", "items": {item_id: quantity}}
+    GET  /report                  sales report (text/plain)
+    GET  /summary?by=day          sales summary (text/plain)
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pos
+import shared
+
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 409: "Conflict",
+               500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def error_status(error):
+    if isinstance(error, (pos.ItemNotFoundError, pos.CustomerNotFoundError)):
+        return 404
+    if isinstance(error, (pos.ItemExistsError, pos.CustomerExistsError, pos.OutOfStockError)):
+        return 409
+    return 400
+
+def transaction_dict(result):
+    transaction = result.transaction
+    return {
+        "transaction_id": transaction.transaction_id,
+        "customer_id": transaction.customer.customer_id,
+        "total_amount": transaction.total_amount,
+        "tax": transaction.tax,
+        "final_amount": transaction.final_amount,
+        "rejected": result.rejected,
+    }
+
+class POSServer:
+    def __init__(self, pos_system, max_batch=256, batch_window=0.002):
+        self.pos = pos_system
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.sales = None
+        self.batcher = None
+        self.batches = 0
+        self.batched_sales = 0
+
+    async def start(self, host="127.0.0.1", port=8080):
+        self.sales = asyncio.Queue()
+        self.batcher = asyncio.create_task(self.run_batcher())
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def write(self, function, *args):
+        """Run a POS write on the worker thread and commit it before answering."""
+        def apply():
+            result = function(*args)
+            self.pos.storage.commit()
+            return result
+        return await self.call(apply)
+
+    async def run_batcher(self):
+        """Collect queued sales into batches and apply each batch on the worker thread."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.sales.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.sales.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                results = await self.call(self.apply_sales, [(customer_id, cart) for customer_id, cart, _ in batch])
+            except Exception as e:
+                # A failed commit fails the whole batch; keep serving the next one.
+                results = [e] * len(batch)
+            self.batches += 1
+            self.batched_sales += len(batch)
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def apply_sales(self, sales):
+        results = []
+        for customer_id, cart in sales:
+            try:
+                results.append(self.pos.process_sale(customer_id, cart))
+            except pos.POSError as e:
+                results.append(e)
+        self.pos.storage.commit()
+        return results
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    body = await reader.readexactly(int(headers.get("content-length", 0)))
+                except ValueError:
+                    self.write_response(writer, 400, "application/json", {"error": "Malformed request."}, False)
+                    await writer.drain()
+                    break
+                try:
+                    status, content_type, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, content_type, payload = e.status, "application/json", {"error": str(e)}
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                self.write_response(writer, status, content_type, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def write_response(writer, status, content_type, payload, keep_alive):
+        if content_type == "application/json":
+            body = json.dumps(payload).encode()
+        else:
+            body = payload.encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body)
+
+    async def dispatch(self, method, target, body):
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            raise HTTPError(400, "Request body is not valid JSON.")
+        try:
+            if parts == ["items"] and method == "GET":
+                items = await self.call(lambda: [item.to_dict() for item in self.pos.list_items()])
+                return 200, "application/json", items
+            if parts == ["items"] and method == "POST":
+                item = await self.write(self.pos.add_item, str(data["item_id"]), data["name"],
+                                       float(data["price"]), int(data["quantity"]), str(data.get("category", "")))
+                return 201, "application/json", item.to_dict()
+            if len(parts) == 2 and parts[0] == "items" and method == "PUT":
+                item = await self.write(self.pos.update_item_quantity, parts[1], int(data["quantity"]))
+                return 200, "application/json", item.to_dict()
+            if parts == ["customers"] and method == "POST":
+                customer = await self.write(self.pos.add_customer, str(data["customer_id"]), data["name"],
+                                           data.get("email", ""), data.get("phone", ""))
+                return 201, "application/json", customer.__dict__
+            if parts == ["sales"] and method == "POST":
+                cart = {str(item_id): int(quantity) for item_id, quantity in data["items"].items()}
+                future = asyncio.get_running_loop().create_future()
+                await self.sales.put((str(data["customer_id"]), cart, future))
+                result = await future
+                if isinstance(result, pos.POSError):
+                    raise result
+                if isinstance(result, Exception):
+                    raise HTTPError(500, f"Sale could not be recorded: {result}")
+                return 201, "application/json", transaction_dict(result)
+            if parts == ["report"] and method == "GET":
+                report = await self.call(self.pos.generate_sales_report)
+                return 200, "text/plain", report or "No transactions found.\n"
+            if parts == ["summary"] and method == "GET":
+                by = parse_qs(url.query).get("by", ["day"])[0]
+                if by not in ("day", "customer", "item"):
+                    raise HTTPError(400, "by must be one of day, customer, item.")
+                summary = await self.call(lambda: "".join(self.pos.iter_sales_summary(by)))
+                return 200, "text/plain", summary
+        except pos.POSError as e:
+            raise HTTPError(error_status(e), str(e))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise HTTPError(400, f"Invalid request body: {e}")
+        raise HTTPError(404, f"No route for {method} {url.path}.")
+
+async def serve(args):
+    if args.storage == "sqlite":
+        storage = pos.SQLiteStorage(args.db, batch_size=10 ** 9)
+    elif args.storage == "shared":
+        storage = pos.SharedStorage(args.shared_path)
+    else:
+        storage = pos.DictStorage()
+    pos_system = pos.POS(storage)
+    server = POSServer(pos_system, args.max_batch, args.batch_window / 1000)
+    listener = await server.start(args.host, args.port)
+    print(f"Serving POS on http://{args.host}:{args.port}")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        pos_system.exit_system()
+        if server.batches:
+            print(f"Applied {server.batched_sales} sales in {server.batches} batches.")
+
+async def request(reader, writer, method, path, payload=None):
+    """Send one request on a keep-alive connection and return (status, body)."""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+async def load(args):
+    rng = random.Random(args.seed)
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    for i in range(args.items):
+        await request(reader, writer, "POST", "/items",
+                      {"item_id": f"L{i:05d}", "name": f"load-item-{i}", "price": 9.99, "quantity": 10 ** 9})
+    for i in range(args.customers):
+        await request(reader, writer, "POST", "/customers",
+                      {"customer_id": f"LC{i:05d}", "name": f"load-customer-{i}"})
+    writer.close()
+
+    latencies = []
+    failures = 0
+    per_connection = args.requests // args.connections
+
+    async def worker():
+        nonlocal failures
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+        for _ in range(per_connection):
+            cart = {f"L{rng.randrange(args.items):05d}": rng.randint(1, 3) for _ in range(args.cart_size)}
+            start = time.perf_counter()
+            status, _ = await request(reader, writer, "POST", "/sales",
+                                      {"customer_id": f"LC{rng.randrange(args.customers):05d}", "items": cart})
+            latencies.append(time.perf_counter() - start)
+            if status != 201:
+                failures += 1
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.connections)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(f"Sales: {len(latencies)}, Failed: {failures}, Seconds: {elapsed:.2f}")
+    print(f"Sales/sec: {len(latencies) / elapsed:.0f}, p50: {p50:.2f} ms, p99: {p99:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP front-end and load generator for the POS")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run the POS server")
+    serve_parser.add_argument("--storage", choices=["json", "sqlite", "shared"], default="json")
+    serve_parser.add_argument("--db", default="pos.db")
+    serve_parser.add_argument("--shared-path", default=shared.SHARED_FILE)
+    serve_parser.add_argument("--max-batch", type=int, default=256, help="most sales applied per batch")
+    serve_parser.add_argument("--batch-window", type=float, default=2.0,
+                              help="milliseconds to wait for more sales before applying a batch")
+    load_parser = commands.add_parser("load", help="drive a running server with concurrent sales")
+    load_parser.add_argument("--connections", type=int, default=16)
+    load_parser.add_argument("--requests", type=int, default=10000)
+    load_parser.add_argument("--items", type=int, default=100)
+    load_parser.add_argument("--customers", type=int, default=50)
+    load_parser.add_argument("--cart-size", type=int, default=3)
+    load_parser.add_argument("--seed", type=int, default=1)
+    for sub in (serve_parser, load_parser):
+        sub.add_argument("--host", default="127.0.0.1")
+        sub.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args) if args.command == "serve" else load(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
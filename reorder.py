@@ -0,0 +1,248 @@
+"""Low-stock alerting and reorder priorities, shared by cp.py and pos.py.
+
+ReorderQueue keeps an indexed min-heap of items ordered by days of cover
+(stock divided by sales velocity), updated in O(log N) whenever an item's
+stock changes, so the K most urgent items come back in O(K log K) without
+scanning the inventory. Items at or below their reorder threshold are
+tracked as they cross it.
+
+Velocity is an exponentially decayed count of units sold. Counts use
+forward decay: a sale at time t adds quantity * exp((t - landmark) / tau),
+so every item's count decays by the same factor as time passes and the
+ratio stock / count orders items by days of cover at any moment. The heap
+is therefore keyed on that ratio and never needs re-sorting as time moves
+on; the landmark is moved forward (rescaling every count) before the
+exponent can overflow.
+
+Thresholds come from a JSON file of units, most specific match first:
+
+    {"default": 5, "categories": {"garden": 20}, "items": {"I0042": 100}}
+"""
+import json
+import math
+import threading
+import time
+from heapq import heappop, heappush
+
+DAY = 86400.0
+# rescale counts before exp((t - landmark) / tau) gets anywhere near overflow
+MAX_EXPONENT = 50.0
+
+def format_cover(days):
+    return "no recent sales" if days == math.inf else f"{days:.1f} days of cover"
+
+class ReorderRules:
+    """Reorder thresholds in units: by item, then by category, then a default."""
+    def __init__(self, default=0, categories=None, items=None):
+        self.default = default
+        self.categories = categories or {}
+        self.items = items or {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as file:
+            data = json.load(file)
+        return cls(data.get('default', 0), data.get('categories'), data.get('items'))
+
+    def threshold(self, key, category=''):
+        threshold = self.items.get(key)
+        if threshold is None:
+            threshold = self.categories.get(category, self.default)
+        return threshold
+
+class ReorderQueue:
+    """Indexed min-heap of items by days of cover, with decayed sales velocity.
+
+    Velocity is recorded from the first sale; the heap itself is only
+    built when load() is given the current stock, so an app that never
+    asks for reorder priorities pays nothing but the velocity updates.
+    """
+    def __init__(self, rules=None, half_life_days=7.0, clock=time.time):
+        self.rules = rules if rules is not None else ReorderRules()
+        self.tau = half_life_days * DAY / math.log(2)
+        self.clock = clock
+        self.landmark = clock()
+        self.counts = {}
+        self.heap = None
+        self.position = {}
+        self.priority = {}
+        self.stock = {}
+        self.thresholds = {}
+        self.low = set()
+        self.lock = threading.RLock()
+
+    @property
+    def loaded(self):
+        return self.heap is not None
+
+    def weight(self, when):
+        exponent = (when - self.landmark) / self.tau
+        if exponent > MAX_EXPONENT:
+            self.rescale(when)
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def rescale(self, when):
+        """Move the landmark to when; every count, and so every priority, scales by the same factor."""
+        factor = math.exp((when - self.landmark) / self.tau)
+        self.landmark = when
+        for key in self.counts:
+            self.counts[key] /= factor
+        for key, priority in self.priority.items():
+            if 0 < priority < math.inf:
+                self.priority[key] = priority * factor
+
+    def key_priority(self, key):
+        quantity = self.stock[key]
+        if quantity <= 0:
+            return 0.0
+        count = self.counts.get(key, 0.0)
+        return quantity / count if count > 0 else math.inf
+
+    def less(self, a, b):
+        return (self.priority[a], a) < (self.priority[b], b)
+
+    def sift_up(self, index):
+        heap, position = self.heap, self.position
+        key = heap[index]
+        while index > 0:
+            parent = (index - 1) // 2
+            if not self.less(key, heap[parent]):
+                break
+            heap[index] = heap[parent]
+            position[heap[index]] = index
+            index = parent
+        heap[index] = key
+        position[key] = index
+
+    def sift_down(self, index):
+        heap, position = self.heap, self.position
+        key = heap[index]
+        size = len(heap)
+        while True:
+            child = 2 * index + 1
+            if child >= size:
+                break
+            if child + 1 < size and self.less(heap[child + 1], heap[child]):
+                child += 1
+            if not self.less(heap[child], key):
+                break
+            heap[index] = heap[child]
+            position[heap[index]] = index
+            index = child
+        heap[index] = key
+        position[key] = index
+
+    def reposition(self, key):
+        index = self.position[key]
+        self.sift_up(index)
+        self.sift_down(self.position[key])
+
+    def load(self, entries):
+        """Build the heap from (key, quantity, category) entries; a sorted list is a valid heap."""
+        with self.lock:
+            self.stock, self.thresholds, self.priority, self.low = {}, {}, {}, set()
+            for key, quantity, category in entries:
+                self.stock[key] = quantity
+                self.thresholds[key] = self.rules.threshold(key, category)
+                self.priority[key] = self.key_priority(key)
+                if quantity <= self.thresholds[key]:
+                    self.low.add(key)
+            self.heap = sorted(self.priority, key=lambda key: (self.priority[key], key))
+            self.position = {key: index for index, key in enumerate(self.heap)}
+
+    def set_stock(self, key, quantity):
+        """Store a tracked item's stock; returns True if this took it to or below its threshold."""
+        self.stock[key] = quantity
+        if quantity <= self.thresholds[key]:
+            crossed = key not in self.low
+            self.low.add(key)
+            return crossed
+        self.low.discard(key)
+        return False
+
+    def update(self, key, quantity, category=None):
+        """Set an item's stock (adding it if new); returns True if this took it to or below its threshold."""
+        with self.lock:
+            if self.heap is None:
+                return False
+            if key not in self.position:
+                self.thresholds[key] = self.rules.threshold(key, category or '')
+                self.heap.append(key)
+                self.position[key] = len(self.heap) - 1
+            elif category is not None:
+                self.thresholds[key] = self.rules.threshold(key, category)
+            crossed = self.set_stock(key, quantity)
+            self.priority[key] = self.key_priority(key)
+            self.reposition(key)
+            return crossed
+
+    def discard(self, key):
+        with self.lock:
+            self.counts.pop(key, None)
+            if self.heap is None or key not in self.position:
+                return
+            index = self.position.pop(key)
+            last = self.heap.pop()
+            if last != key:
+                self.heap[index] = last
+                self.position[last] = index
+                self.reposition(last)
+            del self.stock[key], self.priority[key], self.thresholds[key]
+            self.low.discard(key)
+
+    def record_sale(self, key, quantity, stock=None, when=None):
+        """Count units sold at when (a timestamp, default now) towards the item's velocity.
+
+        stock, if given, is the item's stock after the sale. Returns True if
+        the sale took the item to or below its threshold.
+        """
+        with self.lock:
+            weight = self.weight(self.clock() if when is None else when)
+            self.counts[key] = self.counts.get(key, 0.0) + quantity * weight
+            crossed = False
+            if self.heap is not None and key in self.position:
+                if stock is not None:
+                    crossed = self.set_stock(key, stock)
+                self.priority[key] = self.key_priority(key)
+                self.reposition(key)
+            return crossed
+
+    def velocity(self, key, now=None):
+        """Units sold per day, decayed to now."""
+        now = self.clock() if now is None else now
+        return self.counts.get(key, 0.0) * math.exp(-(now - self.landmark) / self.tau) / self.tau * DAY
+
+    def cover(self, priority, now):
+        """Convert a heap priority into days of cover at now."""
+        if priority in (0.0, math.inf):
+            return priority
+        return priority * self.tau * math.exp((now - self.landmark) / self.tau) / DAY
+
+    def days_of_cover(self, key, now=None):
+        with self.lock:
+            return self.cover(self.priority[key], self.clock() if now is None else now)
+
+    def most_urgent(self, k, now=None):
+        """Return up to k (key, days of cover) pairs, fewest days first, in O(k log k)."""
+        with self.lock:
+            now = self.clock() if now is None else now
+            heap, priority = self.heap, self.priority
+            result = []
+            if not heap:
+                return result
+            frontier = [(priority[heap[0]], heap[0], 0)]
+            while frontier and len(result) < k:
+                value, key, index = heappop(frontier)
+                result.append((key, self.cover(value, now)))
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(heap):
+                        heappush(frontier, (priority[heap[child]], heap[child], child))
+            return result
+
+    def low_stock(self, now=None):
+        """Return (key, quantity, threshold, days of cover) for items at or below threshold, fewest days first."""
+        with self.lock:
+            now = self.clock() if now is None else now
+            keys = sorted(self.low, key=lambda key: (self.priority[key], key))
+            return [(key, self.stock[key], self.thresholds[key], self.cover(self.priority[key], now)) for key in keys]
@@ -0,0 +1,387 @@
+"""Sharded cp inventory: items partitioned over worker processes.
+
+Items are placed on shards by a consistent hash of their name (a ring of
+blake2b points, replicas per shard), and each shard is a worker process
+owning its own journaled cp.Inventory (shard-<n>.json plus its journal)
+in one directory. ShardedInventory is the coordinator: it routes
+add_item/update_item/view_item/delete_item to the owning shard, fans
+list_items, search and the aggregate queries out to every shard and
+merges the answers, and keeps users on shard 0.
+
+Requests are pipelined: route() returns a Pending at once and requests
+are sent to each worker's pipe in batches of batch_size, with at most
+window batches in flight per shard, so workers stay busy while the
+coordinator keeps routing. The plain methods wait for their own answer.
+
+Opening a directory with a different shard count moves only the items
+whose owner changed, which is what the consistent hash is for.
+
+    python sharded.py --shards 4 --directory shards
+"""
+import argparse
+import bisect
+import getpass
+import hashlib
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+
+import cp
+from audit import AuditLog
+from reorder import ReorderQueue, ReorderRules
+
+LAYOUT_FILE = 'shards.json'
+
+def key_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+class HashRing:
+    """Consistent hash ring with replicas points per shard."""
+    def __init__(self, shards, replicas=64):
+        self.shards = shards
+        self.replicas = replicas
+        points = sorted((key_hash(f"shard-{shard}-{replica}"), shard)
+                        for shard in range(shards) for replica in range(replicas))
+        self.hashes = [point for point, _ in points]
+        self.owners = [shard for _, shard in points]
+
+    def shard(self, key):
+        return self.owners[bisect.bisect(self.hashes, key_hash(key)) % len(self.owners)]
+
+def shard_list(inventory):
+    return list(inventory.list_items())
+
+def shard_search(inventory, *args):
+    return list(inventory.search(*args))
+
+def shard_count(inventory):
+    return len(inventory.items)
+
+def shard_total_value(inventory):
+    return inventory.total_value()
+
+def shard_value_by_category(inventory):
+    return inventory.value_by_category()
+
+def shard_top_by_value(inventory, n):
+    return [(value, name) for name, value in inventory.top_by_value(n)]
+
+def shard_misplaced(inventory, shard, shards, replicas):
+    """Return the (name, category, quantity, price) rows another shard owns under a new ring."""
+    ring = HashRing(shards, replicas)
+    return [(item.name, item.category, item.quantity, item.price)
+            for item in inventory.list_items() if ring.shard(item.name) != shard]
+
+def shard_drop(inventory, names):
+    """Delete the named items, once their new owner holds them."""
+    for name in names:
+        if name in inventory.items:
+            inventory.delete_item(name)
+
+QUERIES = {
+    'list': shard_list, 'search': shard_search, 'count': shard_count, 'total_value': shard_total_value,
+    'value_by_category': shard_value_by_category, 'top_by_value': shard_top_by_value, 'misplaced': shard_misplaced,
+    'drop': shard_drop,
+}
+ROUTED = {
+    'add_item', 'update_item', 'view_item', 'delete_item', 'upsert_items', 'add_user', 'view_user',
+    'delete_user', 'most_urgent', 'low_stock', 'save_inventory', 'stock_at', 'stock_history',
+}
+
+def serve(connection, path, journal, compact_threshold, rules, actor):
+    """Worker loop: apply each batch of (method, args) to this shard's Inventory and send back the results."""
+    audit = AuditLog(os.path.splitext(path)[0] + '.audit', actor) if actor is not None else None
+    inventory = cp.Inventory(path, journal=journal, compact_threshold=compact_threshold,
+                             reorder=ReorderQueue(rules), audit=audit)
+    connection.send(inventory.loaded)
+    while True:
+        batch = connection.recv()
+        if batch is None:
+            break
+        results = []
+        for method, args in batch:
+            try:
+                if method in QUERIES:
+                    results.append((True, QUERIES[method](inventory, *args)))
+                elif method in ROUTED:
+                    results.append((True, getattr(inventory, method)(*args)))
+                else:
+                    raise cp.InvalidValueError(f"{method} is not a shard operation.")
+            except Exception as e:
+                results.append((False, e))
+        connection.send(results)
+    inventory.save_inventory()
+    inventory.close()
+    connection.send(None)
+
+class Pending:
+    """Answer to a routed request, filled in when its batch comes back."""
+    __slots__ = ('owner', 'shard', 'done', 'ok', 'value')
+
+    def __init__(self, owner, shard):
+        self.owner = owner
+        self.shard = shard
+        self.done = False
+
+    def result(self):
+        if not self.done:
+            self.owner.wait(self)
+        if not self.ok:
+            raise self.value
+        return self.value
+
+class Shard:
+    def __init__(self, number, path, journal, compact_threshold, rules, actor):
+        self.number = number
+        self.path = path
+        self.connection, worker_end = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=serve, args=(worker_end, path, journal, compact_threshold,
+                                                                   rules, actor), daemon=True)
+        self.process.start()
+        self.loaded = self.connection.recv()
+        self.batch = []
+        self.pending = []
+        self.in_flight = deque()
+
+    def files(self):
+        journal_path = os.path.splitext(self.path)[0] + '.journal'
+        return [self.path, journal_path, journal_path + '.1']
+
+    def audit_directory(self):
+        return os.path.splitext(self.path)[0] + '.audit'
+
+class ShardedInventory:
+    """Coordinator over shards worker processes, each owning a journaled cp.Inventory.
+
+    Given an actor, each shard also keeps a stock audit log in
+    shard-<n>.audit, recorded under that name.
+    """
+    def __init__(self, directory, shards=4, journal=True, compact_threshold=10000, batch_size=256, window=4,
+                 replicas=64, rules=None, actor=None):
+        if shards < 1:
+            raise cp.InvalidValueError("A sharded inventory needs at least one shard.")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.window = window
+        self.store = None
+        self.autosave = None
+        layout_path = os.path.join(directory, LAYOUT_FILE)
+        layout = {'shards': shards, 'replicas': replicas}
+        if os.path.exists(layout_path):
+            with open(layout_path, 'r') as file:
+                previous = json.load(file)
+        else:
+            previous = layout
+        self.shards = [Shard(n, os.path.join(directory, f"shard-{n}.json"), journal, compact_threshold, rules,
+                             actor)
+                       for n in range(max(shards, previous['shards']))]
+        self.loaded = any(shard.loaded for shard in self.shards)
+        self.ring = HashRing(shards, replicas)
+        if previous != layout:
+            self.reshard(shards, replicas)
+        with open(layout_path, 'w') as file:
+            json.dump(layout, file)
+
+    def reshard(self, shards, replicas):
+        """Move items whose owner changed to their new shard, then retire shards beyond the new count.
+
+        Items are upserted on their new owner before they are dropped from
+        the old one, and shards.json is only rewritten afterwards, so a
+        crash part way leaves at worst duplicates that the next open
+        moves again. A retired shard's audit log is kept, renamed to
+        shard-<n>.audit.retired-<time>, so a later reshard starts afresh.
+        """
+        moved = self.fan_out('misplaced', lambda shard: (shard.number, shards, replicas))
+        by_owner = {}
+        for rows in moved:
+            for row in rows:
+                by_owner.setdefault(self.ring.shard(row[0]), []).append(row)
+        pendings = [self.submit(self.shards[owner], 'upsert_items', rows) for owner, rows in by_owner.items()]
+        self.flush()
+        for pending in pendings:
+            pending.result()
+        pendings = [self.submit(shard, 'drop', [row[0] for row in rows])
+                    for shard, rows in zip(self.shards[:shards], moved) if rows]
+        self.flush()
+        for pending in pendings:
+            pending.result()
+        retired = time.strftime('%Y%m%d%H%M%S')
+        for shard in self.shards[shards:]:
+            self.stop(shard)
+            for path in shard.files():
+                if os.path.exists(path):
+                    os.remove(path)
+            if os.path.exists(shard.audit_directory()):
+                os.replace(shard.audit_directory(), f"{shard.audit_directory()}.retired-{retired}")
+        del self.shards[shards:]
+
+    def submit(self, shard, method, *args):
+        pending = Pending(self, shard)
+        shard.batch.append((method, args))
+        shard.pending.append(pending)
+        if len(shard.batch) >= self.batch_size:
+            self.send(shard)
+        return pending
+
+    def route(self, method, name, *args):
+        """Queue method(name, *args) on the shard owning name and return its Pending."""
+        return self.submit(self.shards[self.ring.shard(name)], method, name, *args)
+
+    def send(self, shard):
+        if not shard.batch:
+            return
+        while len(shard.in_flight) >= self.window:
+            self.receive(shard)
+        shard.connection.send(shard.batch)
+        shard.in_flight.append(shard.pending)
+        shard.batch, shard.pending = [], []
+
+    def receive(self, shard):
+        results = shard.connection.recv()
+        for pending, (ok, value) in zip(shard.in_flight.popleft(), results):
+            pending.ok, pending.value, pending.done = ok, value, True
+
+    def wait(self, pending):
+        shard = pending.shard
+        if not pending.done and any(p is pending for p in shard.pending):
+            self.send(shard)
+        while not pending.done:
+            self.receive(shard)
+
+    def flush(self):
+        """Send every queued request and wait for all answers."""
+        for shard in self.shards:
+            self.send(shard)
+        for shard in self.shards:
+            while shard.in_flight:
+                self.receive(shard)
+
+    def fan_out(self, method, args=lambda shard: ()):
+        pendings = [self.submit(shard, method, *args(shard)) for shard in self.shards]
+        self.flush()
+        return [pending.result() for pending in pendings]
+
+    def add_item(self, name, category, quantity, price):
+        return self.route('add_item', name, category, quantity, price).result()
+
+    def update_item(self, name, quantity=None, price=None):
+        return self.route('update_item', name, quantity, price).result()
+
+    def view_item(self, name):
+        return self.route('view_item', name).result()
+
+    def delete_item(self, name):
+        return self.route('delete_item', name).result()
+
+    def update_many(self, updates):
+        """Pipeline (name, quantity, price) updates; returns each updated item or the InventoryError it raised."""
+        pendings = [self.route('update_item', name, quantity, price) for name, quantity, price in updates]
+        self.flush()
+        return [pending.value for pending in pendings]
+
+    def upsert_items(self, rows):
+        by_owner = {}
+        for row in rows:
+            by_owner.setdefault(self.ring.shard(row[0]), []).append(row)
+        pendings = [self.submit(self.shards[owner], 'upsert_items', rows) for owner, rows in by_owner.items()]
+        self.flush()
+        inserted = updated = 0
+        for pending in pendings:
+            shard_inserted, shard_updated = pending.result()
+            inserted += shard_inserted
+            updated += shard_updated
+        return inserted, updated
+
+    def list_items(self):
+        return itertools.chain.from_iterable(self.fan_out('list'))
+
+    def search(self, category=None, prefix=None, min_price=None, max_price=None):
+        """Merge the shards' matches in Inventory.search order: by name, or by price when only prices are given."""
+        if prefix is not None or category is not None:
+            key = lambda item: item.name
+        else:
+            key = lambda item: (item.price, item.name)
+        return heapq.merge(*self.fan_out('search', lambda shard: (category, prefix, min_price, max_price)), key=key)
+
+    def __len__(self):
+        return sum(self.fan_out('count'))
+
+    def total_value(self):
+        return sum(self.fan_out('total_value'))
+
+    def value_by_category(self):
+        totals = {}
+        for shard_totals in self.fan_out('value_by_category'):
+            for category, value in shard_totals.items():
+                totals[category] = totals.get(category, 0.0) + value
+        return totals
+
+    def top_by_value(self, n):
+        return [(name, value) for value, name in heapq.nlargest(n, itertools.chain.from_iterable(
+            self.fan_out('top_by_value', lambda shard: (n,))))]
+
+    def most_urgent(self, k=10):
+        return heapq.nsmallest(k, itertools.chain.from_iterable(self.fan_out('most_urgent', lambda shard: (k,))),
+                               key=lambda pair: pair[1])
+
+    def low_stock(self):
+        return sorted(itertools.chain.from_iterable(self.fan_out('low_stock')), key=lambda entry: entry[2])
+
+    def stock_at(self, when):
+        stock = {}
+        for shard_stock in self.fan_out('stock_at', lambda shard: (when,)):
+            stock.update(shard_stock)
+        return stock
+
+    def stock_history(self, name, since=None, until=None):
+        return self.route('stock_history', name, since, until).result()
+
+    def add_user(self, username, role):
+        return self.submit(self.shards[0], 'add_user', username, role).result()
+
+    def view_user(self, username):
+        return self.submit(self.shards[0], 'view_user', username).result()
+
+    def delete_user(self, username):
+        return self.submit(self.shards[0], 'delete_user', username).result()
+
+    def login(self, username):
+        return self.view_user(username)
+
+    def save_inventory(self):
+        self.fan_out('save_inventory')
+
+    def stop(self, shard):
+        self.send(shard)
+        while shard.in_flight:
+            self.receive(shard)
+        shard.connection.send(None)
+        shard.connection.recv()
+        shard.process.join()
+
+    def close(self):
+        """Flush, then have every worker save its inventory and exit."""
+        for shard in self.shards:
+            self.stop(shard)
+        self.shards = []
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory system over a sharded inventory")
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--directory', default='shards', help="directory holding the shard files")
+    parser.add_argument('--reorder-rules', help="JSON file of reorder thresholds by category and item name")
+    parser.add_argument('--audit', action='store_true', help="log stock changes to an audit directory per shard")
+    parser.add_argument('--actor', default=getpass.getuser(), help="name recorded in the audit log")
+    args = parser.parse_args()
+    rules = ReorderRules.load(args.reorder_rules) if args.reorder_rules else None
+    actor = args.actor if args.audit else None
+    system = cp.InventorySystem(inventory=ShardedInventory(args.directory, args.shards, rules=rules, actor=actor))
+    system.main_menu()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""Inventory file shared by cp.py and pos.py processes running side by side.
+
+Each process keeps its own objects in memory, marks the records it
+changes, and calls SharedStore.sync to exchange changes with the shared
+file. sync takes an advisory lock on <path>.lock, re-reads the file only
+if another process has written it since (the version at the head of the
+file moved),
+merges this process's changes into it and writes it back atomically.
+Nothing is overwritten wholesale:
+
+- item quantities are merged as deltas against the value this process
+  last saw, so concurrent sales and restocks all count;
+- other fields are merged one at a time, and a process only writes a
+  field it actually changed;
+- a record deleted elsewhere stays deleted; local changes to it are
+  dropped and counted in conflicts.
+
+Items are keyed by cp's name or pos's item_id; cp's users and pos's
+customers are kept alongside. Every record carries the version that last
+wrote it. Readers need no lock because the file is only ever replaced by
+rename.
+
+    python shared.py import shared_inventory.json inventory.json
+    python shared.py info shared_inventory.json
+"""
+import argparse
+import json
+import os
+import threading
+import time
+
+import snapshot
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+SHARED_FILE = 'shared_inventory.json'
+SECTIONS = ('items', 'users', 'customers')
+# fields each section's records carry; 'v' is the version stamp
+FIELDS = {
+    'items': ('name', 'category', 'quantity', 'price'),
+    'users': ('role',),
+    'customers': ('name', 'email', 'phone'),
+}
+
+class FileLock:
+    """Exclusive advisory lock on a lock file, held for the body of a with block."""
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            self.file.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info):
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+def fields(record):
+    return {field: value for field, value in record.items() if field != 'v'}
+
+class SharedStore:
+    """One process's view of the shared file: what it last saw and what it has changed since."""
+    def __init__(self, path=SHARED_FILE):
+        self.path = path
+        self.lock = FileLock(path + '.lock')
+        self.version = 0
+        self.base = {section: {} for section in SECTIONS}
+        self.dirty = {section: set() for section in SECTIONS}
+        self.syncs = 0
+        self.merges = 0
+        self.conflicts = 0
+        self.guard = threading.Lock()
+
+    def file_version(self):
+        """Read just the version, which write puts first in the file."""
+        try:
+            with open(self.path, 'rb') as file:
+                head = file.read(32)
+        except FileNotFoundError:
+            return 0
+        return int(head.split(b',', 1)[0].split(b':', 1)[1])
+
+    def read(self):
+        """Return (version, sections) as currently on disk."""
+        if not os.path.exists(self.path):
+            return 0, {section: {} for section in SECTIONS}
+        with open(self.path, 'r') as file:
+            data = json.load(file)
+        return data['version'], {section: data.get(section, {}) for section in SECTIONS}
+
+    def write(self, version, sections):
+        data = {'version': version, **sections}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(data, file, separators=(',', ':'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        """Read the file and return every record as {section: {key: fields}}."""
+        with self.guard:
+            self.version, self.base = self.read()
+            self.dirty = {section: set() for section in SECTIONS}
+            return {section: {key: fields(record) for key, record in records.items()}
+                    for section, records in self.base.items()}
+
+    def mark(self, section, key):
+        """Note that this process changed (or deleted) a record."""
+        self.dirty[section].add(key)
+
+    def merge(self, section, key, mine, version, remote):
+        """Merge this process's record (None if deleted) into remote; returns False on a conflict."""
+        records = remote[section]
+        base = self.base[section].get(key)
+        theirs = records.get(key)
+        if mine is None:
+            if base is not None:
+                records.pop(key, None)
+            return True
+        if theirs is None and base is not None:
+            return False
+        if theirs is None or base is None:
+            record = dict(theirs or {})
+            record.update(mine)
+        else:
+            record = dict(theirs)
+            for field, value in mine.items():
+                if section == 'items' and field == 'quantity':
+                    record[field] = theirs[field] + value - base[field]
+                elif value != base.get(field):
+                    record[field] = value
+        record['v'] = version
+        records[key] = record
+        return True
+
+    def sync(self, current):
+        """Merge this process's changes into the shared file and pick up everyone else's.
+
+        current(section, key) returns this process's fields for a marked
+        record, or None if it deleted it. Returns {section: {key: fields or
+        None}} for every record that changed since the last sync, so the
+        caller can bring its objects up to date.
+        """
+        with self.guard:
+            dirty, self.dirty = self.dirty, {section: set() for section in SECTIONS}
+            previous = self.version
+            with self.lock:
+                reread = self.file_version() != self.version
+                if reread:
+                    version, remote = self.read()
+                    self.merges += 1
+                else:
+                    version, remote = self.version, self.base
+                if any(dirty.values()):
+                    version += 1
+                    for section, keys in dirty.items():
+                        for key in keys:
+                            if not self.merge(section, key, current(section, key), version, remote):
+                                self.conflicts += 1
+                    self.write(version, remote)
+            self.syncs += 1
+            changes = {section: {} for section in SECTIONS}
+            for section in SECTIONS:
+                records, changed = remote[section], changes[section]
+                if reread:
+                    for key, record in records.items():
+                        if record['v'] > previous:
+                            changed[key] = fields(record)
+                    for key in self.base[section].keys() - records.keys():
+                        changed[key] = None
+                else:
+                    for key in dirty[section]:
+                        record = records.get(key)
+                        changed[key] = None if record is None else fields(record)
+            self.version, self.base = version, remote
+            return changes
+
+    def stats(self):
+        return {'version': self.version, 'syncs': self.syncs, 'merges': self.merges, 'conflicts': self.conflicts}
+
+def import_inventory(path, sources):
+    """Merge cp or pos inventory files (JSON or binary snapshots) into the shared file."""
+    store = SharedStore(path)
+    store.load()
+    incoming = {section: {} for section in SECTIONS}
+    for source in sources:
+        if snapshot.is_snapshot(source):
+            snap = snapshot.SnapshotFile(source)
+            schema, rows, meta = snap.schema, list(snap.rows()), snap.meta
+            snap.close()
+        else:
+            schema, rows, meta = snapshot.read_json(source)
+        for key, name, category, quantity, price in rows:
+            incoming['items'][key] = {'name': name or key, 'category': category, 'quantity': quantity, 'price': price}
+            store.mark('items', key)
+        for user in meta.get('users', []):
+            incoming['users'][user['username']] = {'role': user['role']}
+            store.mark('users', user['username'])
+        for customer in meta.get('customers', []):
+            incoming['customers'][customer['customer_id']] = {field: customer[field] for field in FIELDS['customers']}
+            store.mark('customers', customer['customer_id'])
+    store.sync(lambda section, key: incoming[section][key])
+    return {section: len(records) for section, records in incoming.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared inventory file for cp.py and pos.py")
+    commands = parser.add_subparsers(dest='command', required=True)
+    import_parser = commands.add_parser('import', help="merge cp or pos inventory files into the shared file")
+    import_parser.add_argument('path')
+    import_parser.add_argument('sources', nargs='+')
+    info_parser = commands.add_parser('info', help="describe the shared file")
+    info_parser.add_argument('path')
+    args = parser.parse_args()
+    if args.command == 'import':
+        counts = import_inventory(args.path, args.sources)
+        print(f"Imported {counts['items']} items, {counts['users']} users and {counts['customers']} customers.")
+    else:
+        version, sections = SharedStore(args.path).read()
+        print(f"{args.path}: version {version}, " + ", ".join(f"{len(sections[s])} {s}" for s in SECTIONS))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""Versioned binary inventory snapshots, memory-mapped and read lazily.
+
+A snapshot is a header, then one fixed-width record per item sorted by
+key, then a string table holding every key and name as UTF-8, then a JSON
+meta block (category table, users or customers). Loading maps the file and
+reads nothing else: SnapshotItems looks items up by binary search over
+the records and materializes an Item only when it is first accessed. JSON
+stays the interchange format; this module converts between the two.
+
+    python snapshot.py convert inventory.json inventory.snap
+    python snapshot.py convert inventory.snap inventory.json
+    python snapshot.py info inventory.snap
+
+Both apps store rows as (key, name, category, quantity, price). cp keys
+items by name and leaves name empty; pos keys them by item_id.
+"""
+import argparse
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+from collections.abc import MutableMapping
+
+MAGIC = b'INVS'
+VERSION = 1
+SCHEMAS = {'cp': 1, 'pos': 2}
+# magic, version, schema, record count, records offset, strings offset, strings size, meta offset, meta size
+HEADER = struct.Struct('<4sHHQQQQQQ')
+# key offset, key length, name offset, name length, category code, quantity, price
+RECORD = struct.Struct('<IIIIIqd')
+
+def is_snapshot(path):
+    if not os.path.exists(path):
+        return False
+    with open(path, 'rb') as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+def write(path, schema, rows, meta):
+    """Write (key, name, category, quantity, price) rows and a meta dict atomically."""
+    rows = sorted(rows, key=lambda row: row[0])
+    records = bytearray(len(rows) * RECORD.size)
+    strings = bytearray()
+    categories = {}
+    for position, (key, name, category, quantity, price) in enumerate(rows):
+        key, name = key.encode(), name.encode()
+        code = categories.get(category)
+        if code is None:
+            code = categories[category] = len(categories)
+        RECORD.pack_into(records, position * RECORD.size, len(strings), len(key),
+                         len(strings) + len(key), len(name), code, quantity, price)
+        strings += key
+        strings += name
+    meta = json.dumps(dict(meta, categories=list(categories)), separators=(',', ':')).encode()
+    records_offset = HEADER.size
+    strings_offset = records_offset + len(records)
+    meta_offset = strings_offset + len(strings)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, SCHEMAS[schema], len(rows), records_offset,
+                               strings_offset, len(strings), meta_offset, len(meta)))
+        file.write(records)
+        file.write(strings)
+        file.write(meta)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+class KeyView:
+    """Sequence of the encoded keys of a SnapshotFile, for bisect."""
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.count
+
+    def __getitem__(self, position):
+        return self.snapshot.key_bytes(position)
+
+class SnapshotFile:
+    """Read-only, memory-mapped view of a snapshot file."""
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, schema, self.count, self.records_offset, self.strings_offset,
+         strings_size, meta_offset, meta_size) = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an inventory snapshot.")
+        if version != VERSION:
+            raise ValueError(f"{path} is snapshot version {version}; this build reads version {VERSION}.")
+        self.schema = {code: name for name, code in SCHEMAS.items()}[schema]
+        self.meta = json.loads(self.map[meta_offset:meta_offset + meta_size])
+        self.categories = self.meta.pop('categories')
+        self.keys = KeyView(self)
+
+    def string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.map[start:start + length]
+
+    def key_bytes(self, position):
+        key_offset, key_length = struct.unpack_from('<II', self.map, self.records_offset + position * RECORD.size)
+        return self.string(key_offset, key_length)
+
+    def record(self, position):
+        """Return the (key, name, category, quantity, price) row at position."""
+        key_offset, key_length, name_offset, name_length, code, quantity, price = RECORD.unpack_from(
+            self.map, self.records_offset + position * RECORD.size)
+        return (self.string(key_offset, key_length).decode(), self.string(name_offset, name_length).decode(),
+                self.categories[code], quantity, price)
+
+    def find(self, key):
+        """Return the position of key, or -1."""
+        target = key.encode()
+        position = bisect.bisect_left(self.keys, target)
+        if position < self.count and self.key_bytes(position) == target:
+            return position
+        return -1
+
+    def rows(self):
+        """Yield every row in key order without materializing items."""
+        view = memoryview(self.map)[self.records_offset:self.records_offset + self.count * RECORD.size]
+        try:
+            strings, categories = self.strings_offset, self.categories
+            for key_offset, key_length, name_offset, name_length, code, quantity, price in RECORD.iter_unpack(view):
+                key = self.map[strings + key_offset:strings + key_offset + key_length].decode()
+                name = self.map[strings + name_offset:strings + name_offset + name_length].decode()
+                yield key, name, categories[code], quantity, price
+        finally:
+            view.release()
+
+    def close(self):
+        self.map.close()
+
+class SnapshotItems(MutableMapping):
+    """Dict of items backed by a SnapshotFile, materialized on first access.
+
+    factory turns a row into an Item and row_of turns an Item back into a
+    row. Materialized and newly added items are kept in live, so changes
+    to them stick; deleted keys hide their snapshot records. Iteration is
+    in key order, followed by items added since loading.
+    """
+    def __init__(self, snapshot, factory, row_of):
+        self.snapshot = snapshot
+        self.factory = factory
+        self.row_of = row_of
+        self.live = {}
+        self.added = set()
+        self.deleted = set()
+        self.length = snapshot.count
+        self.lock = threading.Lock()
+
+    def in_snapshot(self, key):
+        return key not in self.deleted and self.snapshot.find(key) >= 0
+
+    def __getitem__(self, key):
+        item = self.live.get(key)
+        if item is not None:
+            return item
+        with self.lock:
+            item = self.live.get(key)
+            if item is None:
+                position = -1 if key in self.deleted else self.snapshot.find(key)
+                if position < 0:
+                    raise KeyError(key)
+                item = self.live[key] = self.factory(self.snapshot.record(position))
+        return item
+
+    def __contains__(self, key):
+        return key in self.live or self.in_snapshot(key)
+
+    def __setitem__(self, key, item):
+        with self.lock:
+            if key not in self.live and not self.in_snapshot(key):
+                self.length += 1
+                if key in self.deleted or self.snapshot.find(key) < 0:
+                    self.added.add(key)
+            self.live[key] = item
+
+    def __delitem__(self, key):
+        with self.lock:
+            if key not in self.live and not self.in_snapshot(key):
+                raise KeyError(key)
+            self.live.pop(key, None)
+            if key in self.added:
+                self.added.discard(key)
+            else:
+                self.deleted.add(key)
+            self.length -= 1
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        deleted = self.deleted
+        for key, _, _, _, _ in self.snapshot.rows():
+            if key not in deleted:
+                yield key
+        yield from list(self.added)
+
+    def rows(self):
+        """Yield the current (key, name, category, quantity, price) rows, reading untouched items straight from the file."""
+        live, deleted = self.live, self.deleted
+        for row in self.snapshot.rows():
+            key = row[0]
+            if key in deleted:
+                continue
+            item = live.get(key)
+            yield row if item is None else self.row_of(item)
+        for key in list(self.added):
+            yield self.row_of(live[key])
+
+def read_json(path, schema=None):
+    """Read an app's JSON file as (schema, rows, meta)."""
+    with open(path, 'r') as file:
+        data = json.load(file)
+    if schema is None:
+        if 'users' in data:
+            schema = 'cp'
+        elif 'customers' in data or any('item_id' in item for item in data['items'][:1]):
+            schema = 'pos'
+        else:
+            raise ValueError(f"Cannot tell whether {path} is a cp or a pos inventory; pass a schema.")
+    if schema == 'cp':
+        rows = [(item['name'], '', item['category'], item['quantity'], item['price']) for item in data['items']]
+        meta = {'users': data.get('users', [])}
+    else:
+        rows = [(item['item_id'], item['name'], item.get('category', ''), item['quantity'], item['price'])
+                for item in data['items']]
+        meta = {'customers': data.get('customers', [])}
+    return schema, rows, meta
+
+def write_json(path, schema, rows, meta, indent=4):
+    if schema == 'cp':
+        items = [{'name': key, 'category': category, 'quantity': quantity, 'price': price}
+                 for key, name, category, quantity, price in rows]
+        data = {'items': items, 'users': meta.get('users', [])}
+    else:
+        items = [{'item_id': key, 'name': name, 'price': price, 'quantity': quantity, 'category': category}
+                 for key, name, category, quantity, price in rows]
+        data = {'items': items, 'customers': meta.get('customers', [])}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(data, file, indent=indent)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+def convert(source, target, schema=None):
+    """Convert between JSON and snapshot files, in whichever direction source implies; returns the row count."""
+    if is_snapshot(source):
+        snapshot = SnapshotFile(source)
+        try:
+            rows = list(snapshot.rows())
+            write_json(target, snapshot.schema, rows, snapshot.meta)
+        finally:
+            snapshot.close()
+    else:
+        schema, rows, meta = read_json(source, schema)
+        write(target, schema, rows, meta)
+    return len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert inventories between JSON and binary snapshots")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert_parser = commands.add_parser('convert', help="JSON to snapshot or snapshot to JSON")
+    convert_parser.add_argument('source')
+    convert_parser.add_argument('target')
+    convert_parser.add_argument('--schema', choices=list(SCHEMAS), help="JSON layout, if it cannot be detected")
+    info_parser = commands.add_parser('info', help="describe a snapshot")
+    info_parser.add_argument('path')
+    args = parser.parse_args()
+    if args.command == 'convert':
+        count = convert(args.source, args.target, args.schema)
+        print(f"Converted {count} items from {args.source} to {args.target}.")
+    else:
+        snapshot = SnapshotFile(args.path)
+        print(f"{args.path}: {snapshot.schema} snapshot v{VERSION}, {snapshot.count} items, "
+              f"{len(snapshot.categories)} categories, {os.path.getsize(args.path)} bytes")
+        snapshot.close()
+
+if __name__ == '__main__':
+    main()
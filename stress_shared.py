@@ -0,0 +1,131 @@
+"""Multi-process stress run for the shared inventory file.
+
+Starts several pos registers (SharedStorage) and cp back-office processes
+(Inventory with shared_file) on one shared file. Registers sell random
+carts and add customers; back-office processes restock by setting new
+absolute quantities, reprice items and add users. Every process syncs
+every few operations and reports exactly what it did. At the end the
+file must hold every item at initial - sold + restocked, the last price
+each back-office process set for the items only it reprices, and every
+customer and user that was added; any lost update fails the run.
+
+    python stress_shared.py --registers 4 --back-office 2 --operations 500
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import cp
+import pos
+import shared
+
+INITIAL_STOCK = 10 ** 6
+
+def register(path, number, items, operations, sync_every, seed, results):
+    rng = random.Random(seed)
+    system = pos.POS(pos.SharedStorage(path))
+    sold = {}
+    customers = []
+    for operation in range(operations):
+        if operation % 50 == 0:
+            customer_id = f"R{number}-C{operation}"
+            system.add_customer(customer_id, f"customer {customer_id}", "", "")
+            customers.append(customer_id)
+        cart = {f"I{rng.randrange(items):04d}": rng.randint(1, 5) for _ in range(rng.randint(1, 3))}
+        result = system.process_sale(customers[-1], cart)
+        for line in result.transaction.items:
+            sold[line.item_id] = sold.get(line.item_id, 0) + line.quantity
+        if operation % sync_every == 0:
+            system.storage.commit()
+    system.save_inventory()
+    results.put(('register', sold, customers, {}, system.storage.store.stats()))
+
+def back_office(path, number, offices, items, operations, sync_every, seed, results):
+    rng = random.Random(seed)
+    inventory = cp.Inventory(path, shared_file=True)
+    restocked = {}
+    prices = {}
+    users = []
+    for operation in range(operations):
+        name = f"I{rng.randrange(items):04d}"
+        amount = rng.randint(1, 20)
+        inventory.update_item(name, quantity=inventory.view_item(name).quantity + amount)
+        restocked[name] = restocked.get(name, 0) + amount
+        if operation % 10 == 0:
+            # each process reprices only its own items, so the last price it set must survive
+            repriced = f"I{rng.randrange(number, items, offices):04d}"
+            price = round(rng.uniform(1, 100), 2)
+            inventory.update_item(repriced, price=price)
+            prices[repriced] = price
+        if operation % 100 == 0:
+            username = f"B{number}-U{operation}"
+            inventory.add_user(username, 'clerk')
+            users.append(username)
+        if operation % sync_every == 0:
+            inventory.sync()
+    inventory.save_inventory()
+    results.put(('back-office', restocked, users, prices, inventory.store.stats()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent cp and pos processes on one shared inventory")
+    parser.add_argument("--registers", type=int, default=4)
+    parser.add_argument("--back-office", type=int, default=2)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--operations", type=int, default=500, help="sales or restocks per process")
+    parser.add_argument("--sync-every", type=int, default=5, help="operations between syncs")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, shared.SHARED_FILE)
+        seed_system = pos.POS(pos.SharedStorage(path))
+        for i in range(args.items):
+            seed_system.add_item(f"I{i:04d}", f"item {i}", 10.0, INITIAL_STOCK, "stress")
+        seed_system.save_inventory()
+
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=register, args=(path, n, args.items, args.operations,
+                                                                     args.sync_every, args.seed + n, results))
+                     for n in range(args.registers)]
+        processes += [multiprocessing.Process(target=back_office, args=(path, n, args.back_office, args.items,
+                                                                         args.operations, args.sync_every,
+                                                                         args.seed + 1000 + n, results))
+                      for n in range(args.back_office)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        version, sections = shared.SharedStore(path).read()
+        expected = {f"I{i:04d}": INITIAL_STOCK for i in range(args.items)}
+        names, syncs, merges, conflicts = [], 0, 0, 0
+        prices = {}
+        for kind, counts, added, repriced, stats in reports:
+            sign = -1 if kind == 'register' else 1
+            for item_id, quantity in counts.items():
+                expected[item_id] += sign * quantity
+            names += [(kind, name) for name in added]
+            prices.update(repriced)
+            syncs += stats['syncs']
+            merges += stats['merges']
+            conflicts += stats['conflicts']
+        lost = [item_id for item_id, quantity in expected.items() if sections['items'][item_id]['quantity'] != quantity]
+        lost += [name for name, price in prices.items() if sections['items'][name]['price'] != price]
+        lost += [name for kind, name in names
+                 if name not in sections['customers' if kind == 'register' else 'users']]
+        print(f"Processes: {len(processes)}, Seconds: {elapsed:.2f}, Version: {version}, "
+              f"Syncs: {syncs}, Merges: {merges}, Conflicts: {conflicts}")
+        if lost:
+            print(f"Lost updates on {len(lost)} records, e.g. {lost[:5]}")
+            sys.exit(1)
+        print(f"No lost updates: {args.items} items, {len(names)} customers and users, {len(prices)} prices match.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import pytest
+
+from audit import AuditLog
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_stock_at_across_checkpoints_and_segments(tmp_path):
+    clock = Clock(100.0)
+    log = AuditLog(str(tmp_path / "inventory.audit"), actor="ann", segment_events=3, clock=clock)
+    stock = {"A": 10, "B": 5}
+    log.start(stock.items())
+    expected = [(100.0, dict(stock))]
+    changes = [("A", 7), ("B", 9), ("C", 1), ("A", 4), ("B", None), ("C", 3), ("A", 12), ("B", 2), ("C", 0),
+               ("A", 11)]
+    for key, quantity in changes:
+        clock.now += 1
+        log.record(key, stock.get(key), quantity, "update")
+        if quantity is None:
+            del stock[key]
+        else:
+            stock[key] = quantity
+        expected.append((clock.now, dict(stock)))
+    assert len(log.checkpoints) == 4
+
+    for reopen in (False, True):
+        if reopen:
+            log.close()
+            log = AuditLog(str(tmp_path / "inventory.audit"), actor="ann", segment_events=3, clock=clock)
+        for when, stock_then in expected:
+            assert log.stock_at(when) == stock_then
+            assert log.stock_at(when + 0.5) == stock_then
+        with pytest.raises(ValueError):
+            log.stock_at(99.0)
+    assert [event[4] for event in log.history("B")] == [9, None, 2]
+    log.close()
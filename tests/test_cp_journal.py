@@ -0,0 +1,23 @@
+import cp
+
+
+def test_replay_drops_a_torn_journal_line(tmp_path):
+    path = str(tmp_path / "inventory.json")
+    inventory = cp.Inventory(path, journal=True)
+    inventory.add_item("A", "Fruit", 10, 1.0)
+    inventory.add_item("B", "Bakery", 20, 2.0)
+    inventory.update_item("A", quantity=7)
+    inventory.close()
+    with open(inventory.journal_path, "a") as file:
+        file.write('{"op":"item","name":"B","category":"Bakery","qua')
+
+    reopened = cp.Inventory(path, journal=True)
+    assert reopened.items["A"].quantity == 7
+    assert reopened.items["B"].quantity == 20
+    reopened.update_item("B", quantity=15)
+    reopened.close()
+
+    again = cp.Inventory(path, journal=True)
+    assert again.items["A"].quantity == 7
+    assert again.items["B"].quantity == 15
+    again.close()
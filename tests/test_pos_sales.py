@@ -0,0 +1,36 @@
+import pytest
+
+import pos
+
+
+@pytest.fixture
+def system(tmp_path):
+    system = pos.POS(pos.DictStorage(str(tmp_path / "inventory.json"), str(tmp_path / "customers.json")))
+    system.add_item("A", "Apple", 1.0, 10, "Fruit")
+    system.add_customer("C1", "Ann", "ann@example.com", "555-0100")
+    return system
+
+
+@pytest.mark.parametrize("quantity", [0, -3])
+def test_process_sale_rejects_non_positive_quantities(system, quantity):
+    with pytest.raises(pos.InvalidQuantityError):
+        system.process_sale("C1", {"A": quantity})
+    assert system.inventory["A"].quantity == 10
+    assert system.last_transaction_id == 0
+
+
+@pytest.mark.parametrize("engine", ["json", "sqlite"])
+def test_sales_batch_fails_carts_with_non_positive_quantities(tmp_path, engine):
+    if engine == "sqlite":
+        storage = pos.SQLiteStorage(str(tmp_path / "pos.db"))
+    else:
+        storage = pos.DictStorage(str(tmp_path / "inventory.json"), str(tmp_path / "customers.json"))
+    system = pos.POS(storage)
+    system.add_item("A", "Apple", 1.0, 10, "Fruit")
+    system.add_customer("C1", "Ann", "ann@example.com", "555-0100")
+
+    result = system.process_sales_batch([("C1", {"A": -5}), ("C1", {"A": 0}), ("C1", {"A": 2})])
+
+    assert [type(entry) for entry in result.results[:2]] == [pos.InvalidQuantityError] * 2
+    assert [record.transaction_id for record in result.records] == [1]
+    assert system.inventory["A"].quantity == 8
@@ -0,0 +1,24 @@
+import pytest
+
+import pos
+
+
+@pytest.mark.parametrize("batch_size", [1, 10])
+def test_sale_rolls_back_when_a_later_line_is_out_of_stock(tmp_path, batch_size):
+    storage = pos.SQLiteStorage(str(tmp_path / "pos.db"), batch_size=batch_size)
+    system = pos.POS(storage)
+    system.add_item("A", "Apple", 1.0, 10, "Fruit")
+    system.add_item("B", "Bread", 2.0, 5, "Bakery")
+    system.add_customer("C1", "Ann", "ann@example.com", "555-0100")
+    system.process_sale("C1", {"A": 1})
+    customer = system.customers["C1"]
+    lines = [pos.Item("A", "Apple", 1.0, 2, "Fruit"), pos.Item("B", "Bread", 2.0, 6, "Bakery")]
+
+    with pytest.raises(pos.OutOfStockError):
+        storage.record_sale(pos.Transaction(2, customer, lines))
+    storage.commit()
+
+    reopened = pos.SQLiteStorage(str(tmp_path / "pos.db"))
+    assert reopened.inventory["A"].quantity == 9
+    assert reopened.inventory["B"].quantity == 5
+    assert sorted(reopened.transactions) == [1]
@@ -0,0 +1,58 @@
+import pos
+
+
+def open_pos(directory, **options):
+    storage = pos.DictStorage(str(directory / "inventory.json"), str(directory / "customers.json"), **options)
+    return pos.POS(storage)
+
+
+def test_customers_survive_clean_exit_with_autosave(tmp_path):
+    system = open_pos(tmp_path)
+    system.start_autosave(interval=3600, threshold=10 ** 6)
+    system.add_customer("C1", "Ann", "ann@example.com", "555-0100")
+    system.exit_system()
+
+    reopened = open_pos(tmp_path)
+    assert list(reopened.customers) == ["C1"]
+    assert reopened.customers["C1"].name == "Ann"
+
+
+def test_customers_survive_clean_exit_in_binary_snapshot(tmp_path):
+    storage = pos.DictStorage(str(tmp_path / "inventory.snap"), str(tmp_path / "customers.json"))
+    system = pos.POS(storage)
+    system.add_customer("C1", "Ann", "ann@example.com", "555-0100")
+    system.exit_system()
+
+    reopened = pos.POS(pos.DictStorage(str(tmp_path / "inventory.snap"), str(tmp_path / "customers.json")))
+    assert list(reopened.customers) == ["C1"]
+
+
+def test_torn_autosave_tail_is_dropped_before_the_next_session_appends(tmp_path):
+    system = open_pos(tmp_path)
+    system.add_item("A", "Apple", 1.0, 10, "Fruit")
+    system.add_item("B", "Bread", 2.0, 20, "Bakery")
+    system.exit_system()
+    with open(tmp_path / "inventory.autosave", "w") as file:
+        file.write('{"op":"item","item_id":"A","name":"Apple","price":1.0,"quantity":7,"category":"Fruit"}\n')
+        file.write('{"op":"item","item_id":"B","na')
+
+    system = open_pos(tmp_path)
+    assert system.inventory["A"].quantity == 7
+    system.start_autosave(interval=3600, threshold=10 ** 6)
+    system.update_item_quantity("B", 15)
+    system.storage.close()  # crash after the flush, before the inventory file is rewritten
+
+    reopened = open_pos(tmp_path)
+    assert reopened.inventory["A"].quantity == 7
+    assert reopened.inventory["B"].quantity == 15
+
+
+def test_undecodable_autosave_line_is_skipped(tmp_path):
+    system = open_pos(tmp_path)
+    system.add_item("A", "Apple", 1.0, 10, "Fruit")
+    system.exit_system()
+    with open(tmp_path / "inventory.autosave", "w") as file:
+        file.write('{"op":"item","item_id":"A"{"op":"item"}\n')
+        file.write('{"op":"item","item_id":"A","name":"Apple","price":1.0,"quantity":3,"category":"Fruit"}\n')
+
+    assert open_pos(tmp_path).inventory["A"].quantity == 3
@@ -0,0 +1,57 @@
+import math
+import random
+
+import pytest
+
+from reorder import DAY, ReorderQueue, ReorderRules
+
+
+def make_queue(stock, now=0.0):
+    queue = ReorderQueue(ReorderRules(default=5), clock=lambda: now)
+    queue.load((key, quantity, "") for key, quantity in stock.items())
+    return queue
+
+
+def test_most_urgent_follows_velocity_updates():
+    queue = make_queue({"A": 100, "B": 100, "C": 100, "D": 0})
+    assert [key for key, _ in queue.most_urgent(4)] == ["D", "A", "B", "C"]
+    assert queue.most_urgent(4)[1][1] == math.inf
+
+    queue.record_sale("C", 10, 90, when=0.0)
+    queue.record_sale("B", 2, 98, when=0.0)
+    assert [key for key, _ in queue.most_urgent(3)] == ["D", "C", "B"]
+
+    # a week later, recent sales of B outweigh C's older ones at the same stock
+    queue.record_sale("B", 10, 88, when=7 * DAY)
+    queue.update("C", 88)
+    assert [key for key, _ in queue.most_urgent(3)] == ["D", "B", "C"]
+    assert queue.most_urgent(1) == [("D", 0.0)]
+
+
+def test_most_urgent_matches_a_full_sort_after_random_updates():
+    rng = random.Random(7)
+    stock = {f"I{i:03d}": rng.randint(0, 50) for i in range(200)}
+    queue = make_queue(stock)
+    for step in range(2000):
+        key = rng.choice(list(stock))
+        when = step * 600.0
+        if rng.random() < 0.8 and stock[key] > 0:
+            sold = rng.randint(1, stock[key])
+            stock[key] -= sold
+            queue.record_sale(key, sold, stock[key], when=when)
+        else:
+            stock[key] += rng.randint(1, 20)
+            queue.update(key, stock[key])
+
+    now = 2000 * 600.0
+    expected = sorted(stock, key=lambda key: (queue.days_of_cover(key, now), key))[:20]
+    urgent = queue.most_urgent(20, now)
+    assert [key for key, _ in urgent] == expected
+    for key, days in urgent:
+        velocity = queue.velocity(key, now)
+        if stock[key] == 0:
+            assert days == 0.0
+        elif velocity == 0:
+            assert days == math.inf
+        else:
+            assert days == pytest.approx(stock[key] / velocity)
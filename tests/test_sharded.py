@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+import sharded
+
+
+def stock(inventory):
+    return {item.name: (item.category, item.quantity, item.price) for item in inventory.list_items()}
+
+
+@pytest.mark.parametrize("shards", [[2, 4], [4, 1], [3, 5, 2]])
+def test_items_survive_resharding(tmp_path, shards):
+    directory = str(tmp_path / "shards")
+    rows = [(f"I{i:04d}", f"C{i % 7}", i, 0.25 * i) for i in range(300)]
+    inventory = sharded.ShardedInventory(directory, shards=shards[0])
+    inventory.upsert_items(rows)
+    inventory.add_user("admin", "admin")
+    expected = stock(inventory)
+    inventory.close()
+
+    for count in shards[1:]:
+        inventory = sharded.ShardedInventory(directory, shards=count)
+        try:
+            assert len(inventory) == len(rows)
+            assert stock(inventory) == expected
+            for name, _, quantity, _ in rows[::37]:
+                assert inventory.view_item(name).quantity == quantity
+            assert inventory.view_user("admin").role == "admin"
+        finally:
+            inventory.close()
+
+    assert not os.path.exists(os.path.join(directory, f"shard-{shards[-1]}.json"))
@@ -0,0 +1,32 @@
+import shared
+
+
+def writer(path, records):
+    store = shared.SharedStore(str(path))
+    store.load()
+    return store, lambda section, key: records[key]
+
+
+def test_two_writers_merge_quantity_deltas(tmp_path):
+    path = tmp_path / "shared_inventory.json"
+    records = {"A": {"name": "A", "category": "Fruit", "quantity": 10, "price": 1.0}}
+    seed, seed_current = writer(path, records)
+    seed.mark("items", "A")
+    seed.sync(seed_current)
+
+    first_records = {"A": dict(records["A"])}
+    second_records = {"A": dict(records["A"])}
+    first, first_current = writer(path, first_records)
+    second, second_current = writer(path, second_records)
+    first_records["A"]["quantity"] = 7  # sold 3
+    first.mark("items", "A")
+    second_records["A"]["quantity"] = 15  # restocked 5
+    second_records["A"]["price"] = 1.5
+    second.mark("items", "A")
+    first.sync(first_current)
+    changes = second.sync(second_current)
+
+    assert changes["items"]["A"]["quantity"] == 12
+    assert first.sync(first_current)["items"]["A"] == {"name": "A", "category": "Fruit", "quantity": 12, "price": 1.5}
+    assert shared.SharedStore(str(path)).load()["items"]["A"]["quantity"] == 12
+    assert first.stats()["conflicts"] == second.stats()["conflicts"] == 0